@@ -8,16 +8,11 @@ import streamlit.components.v1 as components
 from htbuilder import HtmlElement, div, ul, li, br, hr, a, p, img, styles, classes, fonts
 from htbuilder.units import percent, px
 from htbuilder.funcs import rgba, rgb
+from data_cache import get_data_cache
 from footer import footer
+from ticker_registry import get_ticker_registry
 
-# Connect to MongoDB
-#client = MongoClient("mongodb://localhost:27017/")
-#db = client["finance"]
-#collection = db["tickers_meta_ref"]
-
-#Creating a copy for streamlit deployment (as pymongo can work only on local host)
-json_tickers_copy = pd.read_json("Raw (Extra)/finance.tickers_meta_ref.json")
-st.session_state["json_tickers_meta"] = json_tickers_copy
+# Metadata comes from MongoDB when STONKS_MONGO_URI is set, otherwise from the bundled JSON dump (see ticker_meta.py)
 
 #Setting basic page configuration
 st.set_page_config(
@@ -31,50 +26,27 @@ st.set_page_config(
 st.title("STONKS RABBI - A Market Analyser & Forecaster")
 st.sidebar.success("Select a page above.")
 
-#Function to get dropdown options
-@st.cache_data
-def get_options():
-    #PyMongo Code
-    # Find all names and symbols in the collection
-    #name_options = []
-    #symbol_options = []
-    #for doc in collection.find({}, {'Name': 1, 'Symbol': 1}):
-        #name_options.append(doc['Name'])
-        #symbol_options.append(doc['Symbol'])
-        
-    #Streanlit Easy deployment Code
-    name_options = json_tickers_copy.Name.values
-    symbol_options = json_tickers_copy.Symbol.values
-
-    return name_options, symbol_options
-    
-
+# Histories live in the process-wide data cache (data_cache.py), loaded from the local store (falling
+# back to the provider on first use) once per symbol and shared by every session viewing it
+data_cache = get_data_cache()
 
-# Importing data from yfinance and returning the pandas datafrane
-@st.cache_data
-def load_data(symbol):
-    # Query the ticker data using yfinance
-    ticker_data = yf.download(symbol, period='max', progress=False)
-
-    # Filter for the required columns
-    ticker_data = ticker_data[['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']]
-
-    return ticker_data
-
-# Get options for dropdown menu
-name_options, symbol_options = get_options()
+# Lookup tables shared by every session (name -> symbol, prefix / fuzzy search)
+ticker_registry = get_ticker_registry()
 
+# Search box narrowing the dropdown, so only the matching names are sent to the browser
+search_query = st.text_input('**SEARCH COMPANY NAME OR SYMBOL**', key='company_search')
+name_options = ticker_registry.search(search_query, limit=50)
+if not name_options:
+    st.warning("No company matches the search, showing the full listing instead.")
+    name_options = ticker_registry.search('', limit=50)
 
 # Option Selectbox (1) --> Company Listed Name
 name_option_sb = st.selectbox('**COMPANY LISTING NAME**', name_options, key='selected_name_1',)
 
-data_symbol = json_tickers_copy[json_tickers_copy["Name"]==name_option_sb]['Symbol'].values[0]
+data_symbol = ticker_registry.symbol_for_name(name_option_sb)
 st.markdown("**COMPANY LISTING SYMBOL**")
 st.write(data_symbol)
 
-# Option Selectbox (2) (Auto-Filled) --> Company Listed Symbol
-#PyMongo : ---> data_symbol = [data['Symbol'] for data in collection.find({'Name': name_option_sb}, {'Symbol': 1})]
-
 #symbol_option_sb = st.selectbox('**COMPANY LISTING SYMBOL**', data_symbol[0], key='selected_name_2', disabled=True)
 
 # On clicking Analyse Button
@@ -87,8 +59,8 @@ if st.button('Analyse'):
     with st.spinner("Fetching Stonkkkss..."):
         image = Image.open('stonks_cover.jpg')
         st.image(image,width=450)
-        hist = load_data(data_symbol)
-        st.session_state['data'] = hist # loading data into session state so that it can be used ahead.
+        # the session keeps only the symbol; the lease keeps its dataset cached while the session uses it
+        st.session_state['data_lease'] = data_cache.lease(data_symbol)
     
     #Confirmation and re-route suggestion message
     st.write("**Chose Options From the Sidebar!**")
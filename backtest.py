@@ -0,0 +1,112 @@
+import argparse
+import copy
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from forecasting import ArimaForecaster, TRAIN_RATIO, error_metrics
+from worker_pool import SpawnPool
+
+BacktestResult = namedtuple('BacktestResult', ['cutoffs', 'forecasts', 'actuals', 'folds', 'horizon_scores',
+                                               'summary', 'elapsed'])
+
+
+# Forecast origins: every `step` bars from `initial` (a bar count, or a share of the series)
+# up to the last origin that still has `horizon` bars of actuals after it
+def rolling_cutoffs(n, horizon, initial=TRAIN_RATIO, step=1, max_folds=None):
+    first = int(n * initial) if initial < 1 else int(initial)
+    cutoffs = np.arange(max(first, 2), n - horizon + 1, step)
+    if max_folds and len(cutoffs) > max_folds:
+        cutoffs = cutoffs[-max_folds:]
+    return cutoffs
+
+
+# One contiguous run of folds: fit once at the first origin, then only feed each fold's new
+# bars to the fitted state before forecasting the next `horizon` bars
+def _run_chunk(prototype, values, cutoffs, horizon):
+    forecasts = np.empty((len(cutoffs), horizon))
+    if len(cutoffs) == 0:
+        return forecasts
+    model = copy.deepcopy(prototype).fit(values[:cutoffs[0]])
+    previous = cutoffs[0]
+    for position, cutoff in enumerate(cutoffs):
+        if cutoff > previous:
+            model.update(values[previous:cutoff])
+            previous = cutoff
+        forecasts[position] = model.predict(horizon)
+    return forecasts
+
+
+# Error metrics for every fold at once: MAE / RMSE / MAPE per fold and per horizon step, plus
+# directional accuracy (did the forecast move the same way as the price from the origin's close)
+def score(values, cutoffs, forecasts, actuals):
+    origin = values[cutoffs - 1][:, None]
+    direction_hits = np.sign(forecasts - origin) == np.sign(actuals - origin)
+
+    fold_metrics = error_metrics(actuals, forecasts)
+    fold_metrics['directional_accuracy'] = direction_hits.mean(axis=1)
+    horizon_metrics = error_metrics(actuals.T, forecasts.T)
+    horizon_metrics['directional_accuracy'] = direction_hits.mean(axis=0)
+
+    overall = error_metrics(actuals.ravel(), forecasts.ravel())
+    summary = {key: float(value) for key, value in overall.items()}
+    summary['directional_accuracy'] = float(direction_hits.mean())
+    summary['folds'] = len(cutoffs)
+    return (pd.DataFrame(fold_metrics), pd.DataFrame(horizon_metrics, index=np.arange(1, forecasts.shape[1] + 1)),
+            summary)
+
+
+# Rolling-origin backtest of `prototype` (any fit / update / predict forecaster, fitted copies are
+# made per chunk). Without a prototype the auto_arima order is searched once on the first window
+# and kept for every fold. Folds are split into `workers` contiguous chunks run in parallel; each
+# chunk fits once at its first origin, so results differ from a single sequential run only by
+# where the parameters were last estimated.
+def backtest(series, prototype=None, horizon=5, initial=TRAIN_RATIO, step=1, max_folds=None, workers=1):
+    started = time.perf_counter()
+    values = np.asarray(series, dtype='float64')
+    cutoffs = rolling_cutoffs(len(values), horizon, initial=initial, step=step, max_folds=max_folds)
+    if len(cutoffs) == 0:
+        raise ValueError(f"Series of {len(values)} bars is too short for a {horizon}-bar backtest")
+
+    if prototype is None:
+        fitted = ArimaForecaster().fit(values[:cutoffs[0]])
+        prototype = ArimaForecaster(order=fitted.order, seasonal_order=fitted.seasonal_order)
+
+    chunks = [chunk for chunk in np.array_split(cutoffs, max(1, min(workers, len(cutoffs)))) if len(chunk)]
+    if len(chunks) == 1:
+        forecasts = _run_chunk(prototype, values, chunks[0], horizon)
+    else:
+        with SpawnPool(max_workers=len(chunks)) as pool:
+            forecasts = np.vstack(list(pool.map(_run_chunk, [prototype] * len(chunks), [values] * len(chunks),
+                                                chunks, [horizon] * len(chunks))))
+
+    actuals = values[cutoffs[:, None] + np.arange(horizon)]
+    folds, horizon_scores, summary = score(values, cutoffs, forecasts, actuals)
+    if isinstance(series, pd.Series):
+        folds.index = series.index[cutoffs]
+        cutoffs = series.index[cutoffs]
+    return BacktestResult(cutoffs, forecasts, actuals, folds, horizon_scores, summary,
+                          time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    from price_store import FileProvider
+
+    parser = argparse.ArgumentParser(description="Walk-forward backtest on the bundled sample series.")
+    parser.add_argument('--horizon', type=int, default=5)
+    parser.add_argument('--step', type=int, default=1)
+    parser.add_argument('--folds', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--order', type=int, nargs=3, default=None, help="skip the order search, e.g. 1 1 0")
+    args = parser.parse_args()
+
+    close = FileProvider().fetch('MSFT')['Close']
+    prototype = ArimaForecaster(order=tuple(args.order)) if args.order else None
+    result = backtest(close, prototype=prototype, horizon=args.horizon, step=args.step,
+                      max_folds=args.folds, workers=args.workers)
+    print(result.horizon_scores)
+    print(result.summary)
+    print(f"{len(result.cutoffs)} folds in {result.elapsed:.1f}s")
@@ -0,0 +1,103 @@
+import warnings
+
+import numpy as np
+from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+# Cheap forecasters sharing ArimaForecaster's fit / update / predict interface, so the page can draw
+# them instantly while auto_arima fits in the background and the backtest can score them all alike.
+# Each keeps only the state its forecast needs, so update() is O(new bars).
+
+
+# Last observed value carried forward
+class NaiveForecaster:
+    name = 'naive'
+
+    def fit(self, y):
+        self.last_ = float(np.asarray(y, dtype='float64')[-1])
+        return self
+
+    def update(self, y_new):
+        y_new = np.asarray(y_new, dtype='float64')
+        if len(y_new):
+            self.last_ = float(y_new[-1])
+        return self
+
+    def predict(self, n_periods):
+        return np.full(n_periods, self.last_)
+
+
+# Last full season repeated (m=5 is one trading week of daily bars)
+class SeasonalNaiveForecaster:
+    name = 'seasonal naive'
+
+    def __init__(self, m=5):
+        self.m = m
+
+    def fit(self, y):
+        self.season_ = np.asarray(y, dtype='float64')[-self.m:].copy()
+        return self
+
+    def update(self, y_new):
+        self.season_ = np.concatenate([self.season_, np.asarray(y_new, dtype='float64')])[-self.m:]
+        return self
+
+    def predict(self, n_periods):
+        steps = np.arange(n_periods) % len(self.season_)
+        return self.season_[steps]
+
+
+# Straight line from the first to the last observation, extended forward
+class DriftForecaster:
+    name = 'drift'
+
+    def fit(self, y):
+        y = np.asarray(y, dtype='float64')
+        self.first_, self.last_, self.n_ = float(y[0]), float(y[-1]), len(y)
+        return self
+
+    def update(self, y_new):
+        y_new = np.asarray(y_new, dtype='float64')
+        if len(y_new):
+            self.last_, self.n_ = float(y_new[-1]), self.n_ + len(y_new)
+        return self
+
+    def predict(self, n_periods):
+        slope = (self.last_ - self.first_) / max(self.n_ - 1, 1)
+        return self.last_ + slope * np.arange(1, n_periods + 1)
+
+
+# Holt's exponential smoothing with an additive damped trend (statsmodels). update() runs the
+# smoothing recursion over the new bars with the fitted parameters instead of re-estimating them.
+class HoltForecaster:
+    name = 'holt (damped)'
+
+    def fit(self, y):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            results = ExponentialSmoothing(np.asarray(y, dtype='float64'), trend='add', damped_trend=True).fit()
+        self.alpha_ = float(results.params['smoothing_level'])
+        self.beta_ = float(results.params['smoothing_trend'])
+        self.phi_ = float(results.params['damping_trend'])
+        self.level_, self.trend_ = float(results.level[-1]), float(results.trend[-1])
+        return self
+
+    def update(self, y_new):
+        alpha, beta, phi = self.alpha_, self.beta_, self.phi_
+        level, trend = self.level_, self.trend_
+        for value in np.asarray(y_new, dtype='float64'):
+            previous = level
+            level = alpha * value + (1 - alpha) * (level + phi * trend)
+            trend = beta * (level - previous) + (1 - beta) * phi * trend
+        self.level_, self.trend_ = level, trend
+        return self
+
+    def predict(self, n_periods):
+        return self.level_ + np.cumsum(self.phi_ ** np.arange(1, n_periods + 1)) * self.trend_
+
+
+BASELINES = [NaiveForecaster, SeasonalNaiveForecaster, DriftForecaster, HoltForecaster]
+
+
+# Test-period forecasts of every baseline fitted on train, keyed by forecaster name
+def baseline_forecasts(train, n_periods):
+    return {forecaster.name: forecaster().fit(train).predict(n_periods) for forecaster in BASELINES}
@@ -0,0 +1,200 @@
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from forecasting import ARIMA_PARAMS, error_metrics, fingerprint, fit_autoarima, forecast_split, model_symbol
+from model_registry import MODEL_DIR, ModelRegistry
+from prefetch import NASDAQ_CSV, read_symbols, yahoo_symbol
+from price_store import PROVIDERS, STORE_DIR, PriceStore, get_provider, load_history
+
+# Result tables: one summary row per symbol and one prediction row per test-set bar
+RESULTS_DIR = os.environ.get("STONKS_FORECAST_RESULTS", "data/forecasts")
+SUMMARY_FILE = "summary.parquet"
+PREDICTIONS_FILE = "predictions.parquet"
+
+# Per-symbol results of a run in progress (<SYMBOL>.summary.parquet / .predictions.parquet),
+# folded into the two tables when the run ends
+PARTS_DIR = "parts"
+
+
+# Same pipeline as the forecasting page for one symbol: 70/30 split (forecast_split), auto_arima on
+# the training part, forecast over the test part. The fitted model goes into the model registry
+# under the page's key (model_symbol), so opening the symbol afterwards is a registry hit instead
+# of a live fit.
+def forecast_symbol(symbol, store_root=STORE_DIR, model_dir=MODEL_DIR, provider_name=None, params=None):
+    params = params or ARIMA_PARAMS
+    symbol = model_symbol(symbol)
+    started = time.perf_counter()
+    history = load_history(symbol, store=PriceStore(store_root), provider=get_provider(provider_name))
+    train_data, test_data = forecast_split(history['Close'])
+    if len(train_data) + len(test_data) < 50:
+        raise ValueError(f"only {len(train_data) + len(test_data)} bars available")
+
+    train_values = train_data.to_numpy(dtype='float64')
+    train_fingerprint = fingerprint(train_values)
+    registry = ModelRegistry(model_dir)
+    model = registry.get(symbol, train_fingerprint, params)
+    if model is None:
+        model = fit_autoarima(train_values, params)
+        registry.put(symbol, train_fingerprint, params, model, n_train=len(train_values))
+
+    predicted = np.asarray(model.predict(n_periods=len(test_data)))
+    metrics = error_metrics(test_data.to_numpy(), predicted)
+    summary = {
+        'symbol': symbol,
+        'last_bar': test_data.index[-1],
+        'n_train': len(train_data),
+        'n_test': len(test_data),
+        'train_fingerprint': train_fingerprint,
+        'order': str(model.order),
+        'seasonal_order': str(model.seasonal_order),
+        'aic': float(model.aic()),
+        'mae': float(metrics['mae']),
+        'rmse': float(metrics['rmse']),
+        'mape': float(metrics['mape']),
+        'wall_time': time.perf_counter() - started,
+        'computed_at': pd.Timestamp.now(),
+    }
+    predictions = pd.DataFrame({
+        'symbol': symbol,
+        'Date': test_data.index,
+        'actual': test_data.to_numpy(),
+        'predicted': predicted,
+    })
+    return summary, predictions
+
+
+def _write_parquet(frame, path):
+    tmp_path = path + '.tmp'
+    frame.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+# Replacing the rows of the symbols just computed, keeping every other symbol's results
+def _upsert(path, frame, symbols):
+    if os.path.exists(path):
+        existing = pd.read_parquet(path)
+        frame = pd.concat([existing[~existing['symbol'].isin(symbols)], frame], ignore_index=True)
+    _write_parquet(frame, path)
+
+
+def _part_paths(symbol, results_dir=RESULTS_DIR):
+    base = os.path.join(results_dir, PARTS_DIR, symbol.replace('/', '_'))
+    return base + '.summary.parquet', base + '.predictions.parquet'
+
+
+# One symbol's results, written as soon as it finishes so an interrupted run keeps them.
+# The summary goes last: a symbol counts as done once its summary part exists.
+def write_part(summary, predictions, results_dir=RESULTS_DIR):
+    summary_path, predictions_path = _part_paths(summary['symbol'], results_dir)
+    os.makedirs(os.path.dirname(summary_path), exist_ok=True)
+    _write_parquet(predictions, predictions_path)
+    _write_parquet(pd.DataFrame([summary]), summary_path)
+
+
+def has_part(symbol, results_dir=RESULTS_DIR):
+    return os.path.exists(_part_paths(symbol, results_dir)[0])
+
+
+# Folding every finished part (this run's and any interrupted run's) into the two result tables
+# with one rewrite each, then removing the parts. Returns the number of symbols merged.
+def merge_parts(results_dir=RESULTS_DIR):
+    folder = os.path.join(results_dir, PARTS_DIR)
+    if not os.path.isdir(folder):
+        return 0
+    summary_paths = sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                           if name.endswith('.summary.parquet'))
+    if not summary_paths:
+        return 0
+    predictions_paths = [path[:-len('.summary.parquet')] + '.predictions.parquet' for path in summary_paths]
+    summary = pd.concat([pd.read_parquet(path) for path in summary_paths], ignore_index=True)
+    predictions = pd.concat([pd.read_parquet(path) for path in predictions_paths], ignore_index=True)
+    symbols = summary['symbol'].tolist()
+    _upsert(os.path.join(results_dir, SUMMARY_FILE), summary, symbols)
+    _upsert(os.path.join(results_dir, PREDICTIONS_FILE), predictions, symbols)
+    for path in summary_paths + predictions_paths:
+        os.remove(path)
+    return len(symbols)
+
+
+# Precomputed summary row for one symbol (None when the batch job has not covered it)
+def load_summary(symbol, results_dir=RESULTS_DIR):
+    path = os.path.join(results_dir, SUMMARY_FILE)
+    if not os.path.exists(path):
+        return None
+    rows = pd.read_parquet(path, filters=[('symbol', '=', symbol)])
+    return rows.iloc[-1].to_dict() if len(rows) else None
+
+
+def load_predictions(symbol, results_dir=RESULTS_DIR):
+    path = os.path.join(results_dir, PREDICTIONS_FILE)
+    if not os.path.exists(path):
+        return None
+    rows = pd.read_parquet(path, filters=[('symbol', '=', symbol)])
+    return rows.set_index('Date')[['actual', 'predicted']] if len(rows) else None
+
+
+# Forecasting every symbol on `workers` processes. Each symbol's results are written as a part
+# file when it finishes and the parts are merged into the result tables at the end, so an
+# interrupted run loses nothing; resume=True skips the symbols that already have a part.
+def run(symbols, workers=None, store_root=STORE_DIR, model_dir=MODEL_DIR, provider_name=None,
+        results_dir=RESULTS_DIR, params=None, resume=False):
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    summaries, failed = [], {}
+    if resume:
+        done = [symbol for symbol in symbols if has_part(symbol, results_dir)]
+        symbols = [symbol for symbol in symbols if symbol not in set(done)]
+        print(f"Resuming: {len(done)} symbols already done, {len(symbols)} to go", flush=True)
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {pool.submit(forecast_symbol, symbol, store_root, model_dir, provider_name, params): symbol
+                   for symbol in symbols}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                summary, prediction = future.result()
+            except Exception as error:
+                failed[symbol] = repr(error)
+                print(f"FAILED {symbol}: {error!r}", flush=True)
+                continue
+            write_part(summary, prediction, results_dir)
+            summaries.append(summary)
+            print(f"{symbol}: {summary['order']}{summary['seasonal_order']} AIC={summary['aic']:.1f} "
+                  f"MAPE={summary['mape']:.2f}% in {summary['wall_time']:.1f}s", flush=True)
+
+    merge_parts(results_dir)
+    elapsed = time.perf_counter() - started
+    print(f"{len(summaries)} forecasts, {len(failed)} failed in {elapsed:.1f}s "
+          f"({len(summaries) / elapsed:.2f} symbols/s, {workers} workers)")
+    return summaries, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit and score auto_arima forecasts for many symbols.")
+    parser.add_argument('--symbols-file', default=NASDAQ_CSV)
+    parser.add_argument('--symbols', nargs='*', help="explicit symbols (overrides --symbols-file)")
+    parser.add_argument('--limit', type=int, help="only the first N symbols")
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--provider', choices=sorted(PROVIDERS), help="used for symbols not in the store yet")
+    parser.add_argument('--store', default=STORE_DIR)
+    parser.add_argument('--models', default=MODEL_DIR)
+    parser.add_argument('--out', default=RESULTS_DIR)
+    parser.add_argument('--resume', action='store_true', help="skip symbols finished by an interrupted run")
+    args = parser.parse_args(argv)
+
+    symbols = [yahoo_symbol(symbol) for symbol in args.symbols] if args.symbols else read_symbols(args.symbols_file)
+    if args.limit:
+        symbols = symbols[:args.limit]
+    _, failed = run(symbols, workers=args.workers, store_root=args.store, model_dir=args.models,
+                    provider_name=args.provider, results_dir=args.out, resume=args.resume)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict, namedtuple
+
+import streamlit as st
+
+from dataset import dataset_handle
+from price_series import load_series
+from price_store import PriceStore, get_provider
+
+# Size limits of the process-wide data cache; least recently used symbols no session holds go first
+MAX_DATASETS = int(os.environ.get("STONKS_DATA_CACHE_ENTRIES", "256"))
+MAX_DATASET_BYTES = int(os.environ.get("STONKS_DATA_CACHE_BYTES", str(256 * 1024 * 1024)))
+
+# One cached symbol: its shared series, the pages' cache key for it and usage counters
+CacheEntry = namedtuple('CacheEntry', ['series', 'handle', 'loaded_at'])
+
+
+# Proof that a session is looking at a symbol. Sessions keep it in their state next to the symbol;
+# while any lease on a symbol is alive its dataset is never evicted. There is no release call:
+# a lease is dropped with the session state that holds it (or replaced by the next Analyse).
+class DataLease:
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    def __repr__(self):
+        return f"DataLease({self.symbol!r})"
+
+
+# Immutable per-symbol datasets (price_series.PriceSeries) shared by every session of the process.
+# Sessions hold only the symbol key (and a lease); pages ask the cache for a frame, which is a
+# zero-copy view of the shared series, so N sessions on one symbol cost one dataset.
+class DataCache:
+
+    def __init__(self, loader, max_entries=MAX_DATASETS, max_bytes=MAX_DATASET_BYTES):
+        self.loader = loader
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.leases = {}
+        self.entry_hits = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, symbol):
+        with self.lock:
+            return symbol in self.entries
+
+    def get(self, symbol):
+        with self.lock:
+            entry = self.entries.get(symbol)
+            if entry is not None:
+                self.entries.move_to_end(symbol)
+                self.hits += 1
+                self.entry_hits[symbol] += 1
+                return entry
+            self.misses += 1
+        # Loaded outside the lock so one slow symbol does not hold up the others
+        series = self.loader(symbol)
+        with self.lock:
+            entry = self.entries.setdefault(symbol, CacheEntry(series, dataset_handle(symbol, series.to_frame()),
+                                                               time.time()))
+            self.entries.move_to_end(symbol)
+            self.entry_hits.setdefault(symbol, 0)
+        self.evict()
+        return entry
+
+    def frame(self, symbol):
+        return self.get(symbol).series.to_frame()
+
+    def handle(self, symbol):
+        return self.get(symbol).handle
+
+    # Loading the symbol if needed and returning a new lease on it
+    def lease(self, symbol):
+        self.get(symbol)
+        lease = DataLease(symbol)
+        with self.lock:
+            self.leases.setdefault(symbol, weakref.WeakSet()).add(lease)
+        return lease
+
+    def refs(self, symbol):
+        with self.lock:
+            return self._refs(symbol)
+
+    def _refs(self, symbol):
+        return len(self.leases.get(symbol, ()))
+
+    def _bytes(self):
+        return sum(entry.series.nbytes for entry in self.entries.values())
+
+    # Dropping least recently used unleased symbols until the cache fits its limits
+    # (unused=True drops every unleased symbol). Leased symbols stay even when over the limits.
+    def evict(self, unused=False):
+        evicted = 0
+        with self.lock:
+            total = self._bytes()
+            for symbol in list(self.entries):
+                if not unused and len(self.entries) <= self.max_entries and total <= self.max_bytes:
+                    break
+                if self._refs(symbol):
+                    continue
+                total -= self.entries.pop(symbol).series.nbytes
+                self.entry_hits.pop(symbol, None)
+                self.leases.pop(symbol, None)
+                evicted += 1
+            self.evictions += evicted
+        return evicted
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'leased': sum(1 for symbol in self.entries if self._refs(symbol)),
+                'sessions': sum(self._refs(symbol) for symbol in self.entries),
+                'bytes': self._bytes(),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+            }
+
+    # One row per cached symbol, most recently used first
+    def snapshot(self):
+        with self.lock:
+            return [{'symbol': symbol, 'rows': len(entry.series), 'bytes': entry.series.nbytes,
+                     'sessions': self._refs(symbol), 'hits': self.entry_hits[symbol],
+                     'loaded_at': entry.loaded_at}
+                    for symbol, entry in reversed(self.entries.items())]
+
+
+# Built once per process and shared by every session
+@st.cache_resource
+def get_data_cache():
+    store, provider = PriceStore(), get_provider()
+    return DataCache(lambda symbol: load_series(symbol, store=store, provider=provider))
@@ -0,0 +1,73 @@
+import argparse
+import hashlib
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# What the cached page functions key on instead of the history itself: the symbol, the row count,
+# first / last bar and a digest of every bar (index and values). Any change to the stored history,
+# including a full rewrite that revises older bars after a split or dividend, gives a new handle.
+# The digest is computed once when a dataset is loaded (data_cache.py) and the handle is passed
+# around from there; the frame travels next to it as an underscore argument, which st.cache_data
+# does not hash.
+DatasetHandle = namedtuple('DatasetHandle', ['symbol', 'rows', 'first_bar', 'last_bar', 'version'])
+
+
+# Short digest of a frame's index and column values
+def content_digest(frame):
+    digest = hashlib.sha1(np.ascontiguousarray(frame.index.values).view('int64').tobytes())
+    for column in frame.columns:
+        digest.update(np.ascontiguousarray(frame[column].to_numpy()).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def dataset_handle(symbol, frame):
+    if len(frame) == 0:
+        return DatasetHandle(symbol, 0, None, None, '')
+    return DatasetHandle(symbol, len(frame), frame.index[0], frame.index[-1], content_digest(frame))
+
+
+# Seconds st.cache_data spends hashing one argument (best of `repeat` runs)
+def hash_seconds(value, repeat=5):
+    from streamlit.runtime.caching.hashing import CacheType, update_hash
+
+    best = np.inf
+    for _ in range(repeat):
+        started = time.perf_counter()
+        update_hash(value, hashlib.new('md5'), CacheType.DATA)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+# Cache-key hashing cost of the whole frame (what the overview page used to pass) vs building and
+# hashing its handle
+def benchmark(frame, symbol):
+    handle = dataset_handle(symbol, frame)
+    frame_seconds = hash_seconds(frame)
+    started = time.perf_counter()
+    for _ in range(1000):
+        dataset_handle(symbol, frame)
+    build_seconds = (time.perf_counter() - started) / 1000
+    handle_seconds = hash_seconds(handle) + build_seconds
+    print(f"{symbol}, {len(frame):,} rows: frame {frame_seconds * 1000:.3f}ms  "
+          f"handle {handle_seconds * 1000:.3f}ms (build {build_seconds * 1000:.3f}ms)  "
+          f"{frame_seconds / handle_seconds:.0f}x")
+    return frame_seconds, handle_seconds
+
+
+if __name__ == "__main__":
+    import pandas as pd
+    from price_store import PriceStore
+
+    parser = argparse.ArgumentParser(description="Time st.cache_data key hashing: whole frame vs dataset handle.")
+    parser.add_argument('--symbols', nargs='*', help="stored symbols (default: every symbol in the store)")
+    parser.add_argument('--repeat', type=int, default=1, help="also try the history concatenated N times")
+    args = parser.parse_args()
+
+    store = PriceStore()
+    for symbol in args.symbols or store.symbols():
+        history = store.read(symbol)
+        for copies in sorted({1, args.repeat}):
+            frame = history if copies == 1 else pd.concat([history] * copies)
+            benchmark(frame, symbol if copies == 1 else f"{symbol} x{copies}")
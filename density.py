@@ -0,0 +1,89 @@
+import argparse
+import time
+
+import numpy as np
+from scipy.signal import fftconvolve
+from scipy.stats import gaussian_kde
+
+# Grid points the density is evaluated on (what plot_distribution has always drawn)
+GRID_POINTS = 1000
+
+# Gaussian kernel truncated at this many bandwidths (the tail beyond is below 1e-7 of the peak)
+KERNEL_SIGMAS = 6
+
+
+# Scott's rule, as gaussian_kde uses by default: n^(-1/5) times the sample standard deviation
+def scott_bandwidth(values):
+    return len(values) ** (-1 / 5) * np.std(values, ddof=1)
+
+
+# Spreading every sample over its two neighbouring grid points in proportion to distance.
+# Returns the weight per grid point (summing to len(values)).
+def linear_binning(values, lo, hi, points):
+    delta = (hi - lo) / (points - 1)
+    position = (values - lo) / delta
+    left = np.clip(np.floor(position).astype('int64'), 0, points - 2)
+    right_share = position - left
+    weights = np.bincount(left, weights=1 - right_share, minlength=points)
+    weights += np.bincount(left + 1, weights=right_share, minlength=points)
+    return weights
+
+
+# Gaussian KDE of values on linspace(min, max, points): linear binning onto the grid, then one
+# FFT convolution with the sampled kernel. O(n + points log points) instead of gaussian_kde's
+# O(n * points); NaNs are dropped. Returns (x, density).
+def binned_kde(values, points=GRID_POINTS, bandwidth=None):
+    values = np.asarray(values, dtype='float64')
+    values = values[~np.isnan(values)]
+    if len(values) < 2 or values.min() == values.max():
+        raise ValueError("a density needs at least two distinct values")
+
+    lo, hi = values.min(), values.max()
+    x = np.linspace(lo, hi, points)
+    h = bandwidth or scott_bandwidth(values)
+    delta = x[1] - x[0]
+
+    weights = linear_binning(values, lo, hi, points)
+    half_width = min(int(np.ceil(KERNEL_SIGMAS * h / delta)), points - 1)
+    offsets = np.arange(-half_width, half_width + 1) * delta
+    kernel = np.exp(-0.5 * (offsets / h) ** 2) / (h * np.sqrt(2 * np.pi))
+    density = fftconvolve(weights, kernel, mode='same') / len(values)
+    return x, np.maximum(density, 0)
+
+
+# Agreement with scipy's exact gaussian_kde on the same grid: largest error relative to the peak
+def max_relative_error(values, points=GRID_POINTS):
+    x, density = binned_kde(values, points)
+    exact = gaussian_kde(values)(x)
+    return float(np.max(np.abs(density - exact)) / exact.max())
+
+
+# Exact vs binned timings (and their agreement) for several sample sizes
+def benchmark(sizes=(10_000, 100_000, 1_000_000), points=GRID_POINTS, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for size in sizes:
+        # Random-walk prices: skewed and multi-modal, like a long closing-price history
+        values = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size)) / np.sqrt(size / 7500))
+
+        started = time.perf_counter()
+        x = np.linspace(values.min(), values.max(), points)
+        exact = gaussian_kde(values)(x)
+        exact_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        _, density = binned_kde(values, points)
+        binned_seconds = time.perf_counter() - started
+
+        error = float(np.max(np.abs(density - exact)) / exact.max())
+        rows.append((size, exact_seconds, binned_seconds, error))
+        print(f"{size:>9,} points: exact {exact_seconds:8.3f}s  binned {binned_seconds:.4f}s  "
+              f"({exact_seconds / binned_seconds:,.0f}x)  max error {error:.2e} of peak", flush=True)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the binned KDE with scipy's gaussian_kde.")
+    parser.add_argument('--sizes', type=int, nargs='*', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+    benchmark(args.sizes)
@@ -0,0 +1,184 @@
+import argparse
+import os
+import pickle
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.seasonal import seasonal_decompose
+from statsmodels.tsa.stattools import adfuller
+
+from density import binned_kde
+from forecasting import fingerprint
+
+# Diagnostics results on disk: <root>/<SYMBOL>/<data fingerprint>/<name>.pkl
+DIAGNOSTICS_DIR = os.environ.get("STONKS_DIAGNOSTICS_DIR", "data/diagnostics")
+
+# Results also kept in process memory, most recently used first
+MEMORY_ENTRIES = 128
+
+
+# Augmented Dickey-Fuller test, laid out the way the forecasting page prints it
+def adf_test(close):
+    adft = adfuller(np.asarray(close, dtype='float64'), autolag='AIC')
+    output = pd.Series(adft[0:4],
+                       index=['Test Statistics', 'p-value', 'No. of lags used', 'Number of observations used'])
+    for key, values in adft[4].items():
+        output['critical value (%s)' % key] = values
+    return output
+
+
+# Multiplicative decomposition; a frame with observed / trend / seasonal / resid columns
+def seasonal_components(close, period=30):
+    result = seasonal_decompose(close, model='multiplicative', period=period)
+    return pd.DataFrame({'observed': result.observed, 'trend': result.trend,
+                         'seasonal': result.seasonal, 'resid': result.resid})
+
+
+# Density of the closing prices on an evenly spaced grid (binned KDE, see density.py)
+def density_curve(close, points=1000):
+    x, density = binned_kde(close, points)
+    return {'x': x, 'density': density}
+
+
+DIAGNOSTICS = {
+    'adf': adf_test,
+    'decompose': seasonal_components,
+    'kde': density_curve,
+}
+
+
+def _result_key(name, params):
+    if not params:
+        return name
+    return name + '-' + '-'.join(f'{key}={params[key]}' for key in sorted(params))
+
+
+# Disk + memory cache of diagnostics results (not figures) keyed by symbol and data fingerprint.
+# Writing results for a new fingerprint drops the symbol's older fingerprints.
+class DiagnosticsCache:
+
+    def __init__(self, root=DIAGNOSTICS_DIR, memory_entries=MEMORY_ENTRIES):
+        self.root = root
+        self.memory = OrderedDict()
+        self.memory_entries = memory_entries
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _folder(self, symbol, data_fingerprint):
+        return os.path.join(self.root, symbol.upper().replace('/', '_'), data_fingerprint)
+
+    def get(self, symbol, close, name, data_fingerprint=None, **params):
+        data_fingerprint = data_fingerprint or fingerprint(close)
+        key = (symbol, data_fingerprint, _result_key(name, params))
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return self.memory[key]
+
+        path = os.path.join(self._folder(symbol, data_fingerprint), key[2] + '.pkl')
+        try:
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+            with self.lock:
+                self.hits += 1
+        except (OSError, pickle.UnpicklingError, EOFError):
+            result = DIAGNOSTICS[name](close, **params)
+            self._write(symbol, data_fingerprint, path, result)
+            with self.lock:
+                self.misses += 1
+
+        with self.lock:
+            self.memory[key] = result
+            if len(self.memory) > self.memory_entries:
+                self.memory.popitem(last=False)
+        return result
+
+    # A fingerprint's folder appears atomically: the first result is written into a private temp
+    # folder that os.replace moves into place; later results are renamed into the existing folder.
+    # Other fingerprints' folders are removed afterwards, best-effort, since concurrent writers
+    # (threads or processes) may be replacing or removing them at the same time.
+    def _write(self, symbol, data_fingerprint, path, result):
+        folder, name = os.path.split(path)
+        symbol_folder = os.path.dirname(folder)
+        tmp_folder = os.path.join(symbol_folder, f'.{data_fingerprint}.{os.getpid()}.{threading.get_ident()}.tmp')
+        os.makedirs(tmp_folder, exist_ok=True)
+        try:
+            with open(os.path.join(tmp_folder, name), 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            try:
+                os.replace(tmp_folder, folder)
+            except OSError:
+                # the folder already holds other results
+                try:
+                    os.makedirs(folder, exist_ok=True)
+                    os.replace(os.path.join(tmp_folder, name), path)
+                except FileNotFoundError:
+                    pass  # removed meanwhile by a writer of another fingerprint; recomputed next time
+        finally:
+            shutil.rmtree(tmp_folder, ignore_errors=True)
+        self._remove_stale(symbol_folder, data_fingerprint)
+
+    @staticmethod
+    def _remove_stale(symbol_folder, data_fingerprint):
+        try:
+            entries = os.listdir(symbol_folder)
+        except OSError:
+            return
+        for entry in entries:
+            # dot entries are other writers' temp folders, still in use
+            if entry != data_fingerprint and not entry.startswith('.'):
+                shutil.rmtree(os.path.join(symbol_folder, entry), ignore_errors=True)
+
+    # Every diagnostic with its default parameters, as run by the batch job
+    def precompute(self, symbol, close):
+        data_fingerprint = fingerprint(close)
+        for name in DIAGNOSTICS:
+            self.get(symbol, close, name, data_fingerprint=data_fingerprint)
+
+
+# Filling the cache for many symbols ahead of time, so the page only ever reads results
+def main(argv=None):
+    from prefetch import NASDAQ_CSV, read_symbols, yahoo_symbol
+    from price_store import STORE_DIR, PriceStore
+
+    parser = argparse.ArgumentParser(description="Precompute forecasting-page diagnostics for stored symbols.")
+    parser.add_argument('--symbols', nargs='*', help="explicit symbols (default: every symbol in the store)")
+    parser.add_argument('--symbols-file', help=f"symbols csv / json, e.g. {NASDAQ_CSV}")
+    parser.add_argument('--store', default=STORE_DIR)
+    parser.add_argument('--out', default=DIAGNOSTICS_DIR)
+    args = parser.parse_args(argv)
+
+    store = PriceStore(args.store)
+    if args.symbols:
+        symbols = [yahoo_symbol(symbol) for symbol in args.symbols]
+    elif args.symbols_file:
+        symbols = read_symbols(args.symbols_file)
+    else:
+        symbols = store.symbols()
+
+    cache = DiagnosticsCache(args.out)
+    failed = 0
+    for symbol in symbols:
+        history = store.read(symbol)
+        if history is None or len(history) < 60:
+            print(f"skipping {symbol}: not enough stored history", flush=True)
+            continue
+        started = time.perf_counter()
+        try:
+            cache.precompute(symbol, history['Close'])
+        except Exception as error:
+            failed += 1
+            print(f"FAILED {symbol}: {error!r}", flush=True)
+            continue
+        print(f"{symbol}: {time.perf_counter() - started:.2f}s", flush=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
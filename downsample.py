@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+import streamlit as st
+
+# Points per trace sent to the browser by the long history charts
+CHART_POINTS = int(os.environ.get("STONKS_CHART_POINTS", "1500"))
+
+
+# Largest-Triangle-Three-Buckets: first and last point plus, for each of points-2 equal buckets,
+# the point forming the largest triangle with the previously kept point and the next bucket's
+# average. Keeps the visual shape (peaks and troughs) of a line with far fewer points.
+def lttb_indices(x, y, points=CHART_POINTS):
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, points - 1).astype('int64')
+    keep = np.empty(points, dtype='int64')
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for bucket in range(points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        keep[bucket + 1] = a
+    return keep
+
+
+# Per equal-sized bucket, the rows holding the lowest low and the highest high (in time order),
+# so no extreme is lost when bars or a spiky line are thinned out
+def minmax_indices(low, high, points=CHART_POINTS):
+    n = len(low)
+    buckets = max(points // 2, 1)
+    if points >= n:
+        return np.arange(n)
+
+    starts = np.linspace(0, n, buckets + 1).astype('int64')[:-1]
+    bucket_of = np.repeat(np.arange(buckets), np.diff(np.append(starts, n)))
+    order = np.lexsort((low, bucket_of))
+    lows = order[starts]
+    order = np.lexsort((-high, bucket_of))
+    highs = order[starts]
+    return np.unique(np.concatenate([lows, highs]))
+
+
+def _positions(index):
+    return index.asi8.astype('float64') if hasattr(index, 'asi8') else np.asarray(index, dtype='float64')
+
+
+# Rows of a frame / series kept by LTTB on one column (NaN rows, e.g. a rolling window's warm-up, are skipped)
+def lttb(data, column=None, points=CHART_POINTS):
+    values = (data[column] if column else data).to_numpy(dtype='float64')
+    finite = np.flatnonzero(np.isfinite(values))
+    keep = lttb_indices(_positions(data.index)[finite], values[finite], points)
+    return data.iloc[finite[keep]]
+
+
+# Rows of an OHLC frame kept by minmax_indices on its Low / High columns
+def minmax(frame, points=CHART_POINTS, low='Low', high='High'):
+    keep = minmax_indices(frame[low].to_numpy(dtype='float64'), frame[high].to_numpy(dtype='float64'), points)
+    return frame.iloc[keep]
+
+
+# Date-range slider in front of a long chart. Charts are downsampled to the same number of points
+# whatever the range, so narrowing it is how the user zooms into full daily resolution.
+def visible_window(frame, key):
+    first, last = frame.index[0].date(), frame.index[-1].date()
+    if first == last:
+        return frame
+    start, end = st.slider('**Visible Range**', min_value=first, max_value=last, value=(first, last),
+                           format='YYYY-MM-DD', key=key)
+    return frame.loc[str(start):str(end)]
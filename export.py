@@ -0,0 +1,132 @@
+import argparse
+import os
+import tempfile
+import zipfile
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet as pq
+
+from price_store import COLUMNS, STORE_DIR, PriceStore, day_bounds, days_index
+
+# Rows converted and written at a time; an export never holds more than one chunk in memory
+CHUNK_ROWS = 10_000
+
+# Export format -> (mime type, file extension)
+FORMATS = OrderedDict([
+    ('csv', ('text/csv', '.csv')),
+    ('parquet', ('application/vnd.apache.parquet', '.parquet')),
+    ('feather', ('application/vnd.apache.arrow.file', '.feather')),
+])
+
+
+def _chunk_frame(days, values, columns):
+    frame = pd.DataFrame({column: values[COLUMNS.index(column)] for column in columns}, index=days_index(days))
+    if 'Volume' in frame.columns:
+        frame['Volume'] = frame['Volume'].round().astype('Int64')
+    return frame
+
+
+# The stored history of one symbol as DataFrames of at most chunk_rows rows, sliced straight out
+# of the memory-mapped store arrays (only the requested rows and columns are ever read)
+def iter_chunks(store, symbol, start=None, end=None, columns=None, chunk_rows=CHUNK_ROWS):
+    columns = [column for column in COLUMNS if column in (columns or COLUMNS)]
+    arrays = store.read_arrays(symbol, mmap=True)
+    if arrays is None:
+        raise KeyError(f"{symbol} is not in the price store")
+    days, values = arrays
+    first, stop = day_bounds(days, start, end)
+    if first == stop:
+        yield _chunk_frame(days[:0], values[:, :0], columns)
+    for offset in range(first, stop, chunk_rows):
+        rows = slice(offset, min(offset + chunk_rows, stop))
+        yield _chunk_frame(np.asarray(days[rows]), np.asarray(values[:, rows]), columns)
+
+
+def write_csv(chunks, fileobj):
+    for number, chunk in enumerate(chunks):
+        fileobj.write(chunk.to_csv(header=number == 0).encode('utf-8'))
+
+
+def write_parquet(chunks, fileobj):
+    writer = None
+    for chunk in chunks:
+        table = pa.Table.from_pandas(chunk, preserve_index=True)
+        if writer is None:
+            writer = pq.ParquetWriter(fileobj, table.schema, compression='snappy')
+        writer.write_table(table)
+    writer.close()
+
+
+# Feather v2 is the Arrow IPC file format, written here one record batch per chunk
+def write_feather(chunks, fileobj):
+    writer = None
+    for chunk in chunks:
+        table = pa.Table.from_pandas(chunk, preserve_index=True)
+        if writer is None:
+            writer = pa.ipc.new_file(fileobj, table.schema, options=pa.ipc.IpcWriteOptions(compression='lz4'))
+        writer.write_table(table)
+    writer.close()
+
+
+WRITERS = {'csv': write_csv, 'parquet': write_parquet, 'feather': write_feather}
+
+
+def export_symbol(store, symbol, fmt, fileobj, start=None, end=None, columns=None, chunk_rows=CHUNK_ROWS):
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {list(FORMATS)}")
+    WRITERS[fmt](iter_chunks(store, symbol, start, end, columns, chunk_rows), fileobj)
+
+
+# Exporting one symbol to <path> or several into a zip at <path> (one member per symbol, each
+# streamed into the archive in turn). Returns the path written.
+def export(store, symbols, fmt, path, start=None, end=None, columns=None, chunk_rows=CHUNK_ROWS):
+    if len(symbols) == 1:
+        with open(path, 'wb') as f:
+            export_symbol(store, symbols[0], fmt, f, start, end, columns, chunk_rows)
+        return path
+    extension = FORMATS[fmt][1]
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for symbol in symbols:
+            with archive.open(symbol + extension, 'w', force_zip64=True) as member:
+                export_symbol(store, symbol, fmt, member, start, end, columns, chunk_rows)
+    return path
+
+
+# Export into a new temporary file; the caller removes it once it has been served.
+# Returns (path, file name to offer, mime type).
+def export_to_tempfile(store, symbols, fmt, start=None, end=None, columns=None):
+    mime, extension = FORMATS[fmt]
+    name = (symbols[0] + extension) if len(symbols) == 1 else 'stocks_data.zip'
+    handle, path = tempfile.mkstemp(prefix='stonks-export-', suffix=os.path.splitext(name)[1])
+    os.close(handle)
+    try:
+        export(store, symbols, fmt, path, start, end, columns)
+    except Exception:
+        os.remove(path)
+        raise
+    return path, name, mime if len(symbols) == 1 else 'application/zip'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export stored price histories.")
+    parser.add_argument('symbols', nargs='+')
+    parser.add_argument('--format', choices=list(FORMATS), default='csv')
+    parser.add_argument('--out', required=True, help="output file (a zip when several symbols are given)")
+    parser.add_argument('--start')
+    parser.add_argument('--end')
+    parser.add_argument('--columns', nargs='*', choices=COLUMNS)
+    parser.add_argument('--store', default=STORE_DIR)
+    args = parser.parse_args(argv)
+
+    export(PriceStore(args.store), [symbol.upper() for symbol in args.symbols], args.format, args.out,
+           args.start, args.end, args.columns)
+    print(f"{args.out}: {os.path.getsize(args.out):,} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from forecasting import ARIMA_PARAMS, fingerprint, full_search_due, refresh_model
+from model_registry import ModelRegistry, model_key
+from worker_pool import SpawnPool
+
+# Worker processes used for model fitting
+FORECAST_WORKERS = int(os.environ.get("STONKS_FORECAST_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+
+# Finished jobs kept around for late pollers before the oldest are forgotten
+MAX_FINISHED_JOBS = 256
+
+
+# A submitted fit; status is derived from the underlying future
+class ForecastJob:
+
+    def __init__(self, job_id, symbol, params, future, cached=False):
+        self.job_id = job_id
+        self.symbol = symbol
+        self.params = params
+        self.future = future
+        self.cached = cached
+        self.submitted_at = time.time()
+        self.finished_at = None
+        future.add_done_callback(self._finished)
+
+    def _finished(self, future):
+        self.finished_at = time.time()
+
+    # 'cached', 'full', 'update' or 'full (degraded)' once finished
+    @property
+    def mode(self):
+        if not self.future.done() or self.future.cancelled() or self.future.exception() is not None:
+            return None
+        return self.future.result()[1]
+
+    @property
+    def status(self):
+        if self.future.cancelled():
+            return 'cancelled'
+        if not self.future.done():
+            return 'running' if self.future.running() else 'pending'
+        return 'failed' if self.future.exception() is not None else 'done'
+
+    @property
+    def elapsed(self):
+        return (self.finished_at or time.time()) - self.submitted_at
+
+
+# Process-pool backed queue of auto_arima fits. Jobs are identified by symbol, training data
+# fingerprint and search parameters, so concurrent requests for the same fit share one job,
+# and models already in the registry are served without fitting at all.
+class ForecastJobs:
+
+    def __init__(self, max_workers=FORECAST_WORKERS, registry=None):
+        # workers never re-import the page that created the pool (worker_pool.py)
+        self.pool = SpawnPool(max_workers=max_workers)
+        self.registry = registry if registry is not None else ModelRegistry()
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+
+    def submit(self, symbol, train_values, params=None):
+        params = params or ARIMA_PARAMS
+        train_fingerprint = fingerprint(train_values)
+        new_id = model_key(symbol, train_fingerprint, params)
+        with self.lock:
+            if self._live(new_id):
+                return new_id
+
+        # Registry reads (file reads and unpickling) run outside the lock; the job map is checked
+        # again below, so a request that registered the same job meanwhile is joined instead
+        model = self.registry.get(symbol, train_fingerprint, params)
+        if model is None:
+            base_model, n_base = self._warm_start(symbol, train_values, params)
+        with self.lock:
+            if self._live(new_id):
+                return new_id
+
+            if model is not None:
+                future = Future()
+                future.set_result((model, 'cached'))
+                self.jobs[new_id] = ForecastJob(new_id, symbol, params, future, cached=True)
+            else:
+                future = self.pool.submit(refresh_model, train_values, params, base_model, n_base)
+                future.add_done_callback(
+                    lambda done: self._store(done, symbol, train_fingerprint, params, len(train_values)))
+                self.jobs[new_id] = ForecastJob(new_id, symbol, params, future)
+            self._forget_old_jobs()
+        return new_id
+
+    # Whether an identical job is queued, running or done (called under the lock)
+    def _live(self, job_id):
+        job = self.jobs.get(job_id)
+        return job is not None and job.status not in ('failed', 'cancelled')
+
+    # Previous model for the same symbol and search space, when the new training window only
+    # extends its window and the full-search schedule is not due yet
+    def _warm_start(self, symbol, train_values, params):
+        latest = self.registry.latest(symbol, params)
+        if latest is None or full_search_due(latest) or latest['n_train'] > len(train_values):
+            return None, 0
+        if fingerprint(train_values[:latest['n_train']]) != latest['fingerprint']:
+            return None, 0
+        entry = self.registry.get_entry(latest['key'])
+        if entry is None:
+            return None, 0
+        return entry['model'], latest['n_train']
+
+    def _store(self, future, symbol, train_fingerprint, params, n_train):
+        if future.cancelled() or future.exception() is not None:
+            return
+        model, mode = future.result()
+        self.registry.put(symbol, train_fingerprint, params, model, n_train=n_train, mode=mode)
+
+    def _forget_old_jobs(self):
+        finished = [key for key, job in self.jobs.items() if job.future.done()]
+        for key in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[key]
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def status(self, job_id):
+        job = self.get(job_id)
+        return job.status if job is not None else 'unknown'
+
+    # Fitted model of a finished job (re-raises the worker's exception for failed ones)
+    def result(self, job_id, timeout=None):
+        return self.get(job_id).future.result(timeout=timeout)[0]
+
+    def stats(self):
+        with self.lock:
+            statuses = [job.status for job in self.jobs.values()]
+        return {status: statuses.count(status) for status in set(statuses)}
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pmdarima
+
+# Share of the history used to fit the model, the rest is forecast and compared against
+TRAIN_RATIO = 0.7
+
+# Worker processes for the order search. Above 1, the search space below is searched exhaustively
+# (stepwise=False) on that many processes (order_search.py) instead of stepwise in one process; the
+# mode is part of the parameters, so models found either way never share a registry key.
+SEARCH_WORKERS = int(os.environ.get("STONKS_SEARCH_WORKERS", "0"))
+
+# auto_arima search space used by the forecasting page
+ARIMA_PARAMS = dict(
+    start_p=0, start_q=0,
+    test='adf',  # use adftest to find optimal 'd'
+    max_p=3, max_q=3,  # maximum p and q
+    m=7,  # frequency of series
+    max_d=5,
+    d=None,  # let model determine 'd'
+    seasonal=True,
+    start_P=0,
+    D=0,
+    error_action='ignore',
+    suppress_warnings=True,
+    stepwise=SEARCH_WORKERS <= 1,
+)
+
+
+# Warm-start policy: a full order search is forced after this many days or warm updates,
+# or when the model's error on the new bars exceeds MAX_ERROR_RATIO times its in-sample error
+FULL_SEARCH_EVERY_DAYS = 7
+MAX_WARM_UPDATES = 30
+MAX_ERROR_RATIO = 3.0
+
+# Recent residuals the new bars' errors are compared against (prices are heteroskedastic, so not the whole history)
+RESIDUAL_WINDOW = 60
+
+
+def train_test_split(series, ratio=TRAIN_RATIO):
+    cut = int(len(series) * ratio)
+    return series[:cut], series[cut:]
+
+
+# Training and test closes of a history, as the page and the batch job both fit and score them:
+# missing closes dropped, then split at TRAIN_RATIO
+def forecast_split(close, ratio=TRAIN_RATIO):
+    return train_test_split(close.dropna(), ratio)
+
+
+# Symbol models are registered under: Yahoo notation (BRK-A), whether the caller has the ticker
+# metadata's symbol (BRK/A) or Yahoo's
+def model_symbol(symbol):
+    from prefetch import yahoo_symbol
+
+    return yahoo_symbol(symbol)
+
+
+# MAE / RMSE / MAPE (in %) along the last axis, so one call scores a single forecast or a whole stack of them
+def error_metrics(actual, predicted):
+    actual = np.asarray(actual, dtype='float64')
+    errors = np.asarray(predicted, dtype='float64') - actual
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ape = np.abs(errors) / np.abs(actual)
+    return {
+        'mae': np.mean(np.abs(errors), axis=-1),
+        'rmse': np.sqrt(np.mean(errors ** 2, axis=-1)),
+        'mape': 100 * np.nanmean(np.where(np.isfinite(ape), ape, np.nan), axis=-1),
+    }
+
+
+# Search space with any overrides applied
+def arima_params(**overrides):
+    params = dict(ARIMA_PARAMS)
+    params.update(overrides)
+    return params
+
+
+# Short stable hash of the values a model is trained on (the index is not needed, bars are daily and ordered).
+# Hashed at float32 precision so the pages' compact series (price_series.py) and the float64 store
+# used by the batch jobs give the same key.
+def fingerprint(values):
+    values = np.ascontiguousarray(np.asarray(values, dtype='float32'))
+    return hashlib.sha1(values.tobytes()).hexdigest()[:16]
+
+
+def params_key(params):
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+# auto_arima on the training values: the stepwise search in this process, or with stepwise=False the
+# same exhaustive search auto_arima runs, spread over SEARCH_WORKERS processes (order_search.py).
+# Kept free of Streamlit so it can run in worker processes.
+def fit_autoarima(train_values, params=None):
+    from order_search import search
+
+    params = params or ARIMA_PARAMS
+    if not params.get('stepwise', True):
+        return search(train_values, params).model
+    return pmdarima.auto_arima(np.asarray(train_values, dtype='float64'), **params)
+
+
+# Mean absolute one-step residual over the last `last` observations, never including the
+# burn-in residuals that carry the differencing start-up error
+def residual_scale(model, last=RESIDUAL_WINDOW):
+    resid = np.asarray(model.resid())[model.order[1] + 1:]
+    resid = resid[-last:]
+    return float(np.mean(np.abs(resid))) if len(resid) else np.nan
+
+
+# Bringing a model up to date with train_values. With a base model fitted on the first n_base
+# values, the previously selected order is kept and only the new observations are fed in
+# (pmdarima's update). Without a base model, or when the one-step errors on the new bars exceed
+# MAX_ERROR_RATIO times the base model's recent residual scale, the full stepwise search runs instead.
+# Returns (model, mode) where mode is 'full', 'update' or 'full (degraded)'.
+def refresh_model(train_values, params=None, base_model=None, n_base=0):
+    train_values = np.asarray(train_values, dtype='float64')
+    if base_model is None or n_base <= 0 or n_base > len(train_values):
+        return fit_autoarima(train_values, params), 'full'
+
+    new_values = train_values[n_base:]
+    if len(new_values) == 0:
+        return base_model, 'update'
+
+    baseline = residual_scale(base_model)
+    base_model.update(new_values)
+    if not baseline or np.isnan(baseline) or residual_scale(base_model, last=len(new_values)) > MAX_ERROR_RATIO * baseline:
+        return fit_autoarima(train_values, params), 'full (degraded)'
+    return base_model, 'update'
+
+
+# Whether the schedule asks for a fresh order search instead of another warm update
+def full_search_due(latest, now=None):
+    now = now or time.time()
+    return (now - latest['full_fit_at'] > FULL_SEARCH_EVERY_DAYS * 86400
+            or latest['updates'] >= MAX_WARM_UPDATES)
+
+
+# auto_arima wrapped in the fit / update / predict interface shared by every forecaster.
+# fit() runs the order search unless an order is given; update() extends the fitted state with new
+# observations through the Kalman filter (parameters stay fixed), so rolling forecasts never refit.
+class ArimaForecaster:
+    name = 'auto_arima'
+
+    def __init__(self, order=None, seasonal_order=(0, 0, 0, 0), params=None):
+        self.order = order
+        self.seasonal_order = seasonal_order
+        self.params = params or ARIMA_PARAMS
+
+    def fit(self, y):
+        y = np.asarray(y, dtype='float64')
+        if self.order is None:
+            self.model_ = fit_autoarima(y, self.params)
+            self.order, self.seasonal_order = self.model_.order, self.model_.seasonal_order
+        else:
+            self.model_ = pmdarima.ARIMA(order=self.order, seasonal_order=self.seasonal_order,
+                                         suppress_warnings=True,
+                                         with_intercept=self.order[1] + self.seasonal_order[1] < 2).fit(y)
+        self.results_ = self.model_.arima_res_
+        return self
+
+    def update(self, y_new):
+        self.results_ = self.results_.extend(np.asarray(y_new, dtype='float64'))
+        return self
+
+    def predict(self, n_periods):
+        return np.asarray(self.results_.forecast(n_periods))
@@ -0,0 +1,205 @@
+import functools
+import threading
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+# Technical indicators as vectorized NumPy over float32 / float64 arrays. Results come back in the
+# input's float dtype with NaN wherever a window is not full yet or covers a missing value; sums are
+# accumulated in float64 either way. Nothing here writes to its inputs.
+
+
+def _as_array(values):
+    values = np.asarray(values)
+    return values if values.dtype in (np.float32, np.float64) else values.astype('float64')
+
+
+# Simple returns x[t] / x[t-1] - 1
+def returns(values):
+    values = _as_array(values)
+    out = np.full_like(values, np.nan)
+    out[1:] = values[1:] / values[:-1] - 1
+    return out
+
+
+def log_returns(values):
+    values = _as_array(values)
+    out = np.full_like(values, np.nan)
+    out[1:] = np.diff(np.log(values))
+    return out
+
+
+# Rolling mean and standard deviation for several windows from a single cumulative-sum pass.
+# Values are centred on their mean first so the sum of squares does not cancel catastrophically.
+# Returns (means, stds), each of shape (len(windows), n).
+def rolling_mean_std(values, windows, ddof=1):
+    values = _as_array(values)
+    n = len(values)
+    missing = np.isnan(values)
+    centred = np.where(missing, 0.0, values.astype('float64'))
+    shift = centred[~missing].mean() if (~missing).any() else 0.0
+    centred[~missing] -= shift
+
+    sums = np.concatenate([[0.0], np.cumsum(centred)])
+    squares = np.concatenate([[0.0], np.cumsum(centred * centred)])
+    gaps = np.concatenate([[0], np.cumsum(missing)])
+
+    means = np.full((len(windows), n), np.nan)
+    stds = np.full((len(windows), n), np.nan)
+    for row, window in enumerate(windows):
+        if window > n:
+            continue
+        total = sums[window:] - sums[:-window]
+        total_sq = squares[window:] - squares[:-window]
+        full = gaps[window:] - gaps[:-window] == 0
+        mean = total / window
+        var = (total_sq - total * mean) / max(window - ddof, 1)
+        means[row, window - 1:] = np.where(full, mean + shift, np.nan)
+        stds[row, window - 1:] = np.where(full, np.sqrt(np.maximum(var, 0)), np.nan)
+    return means.astype(values.dtype, copy=False), stds.astype(values.dtype, copy=False)
+
+
+# First-order recursion y[t] = alpha * x[t] + (1 - alpha) * y[t-1] run in C by lfilter, seeded with
+# the mean of the first `warmup` values (the first value by default; NaN before the seed). Missing
+# values hold the previous level and come back as NaN.
+def _smooth(values, alpha, warmup=1):
+    values = _as_array(values)
+    out = np.full(len(values), np.nan)
+    finite = np.flatnonzero(~np.isnan(values))
+    if len(values) - (finite[0] if len(finite) else len(values)) < warmup:
+        return out.astype(values.dtype)
+    start = finite[0]
+    filled = pd.Series(values[start:]).ffill().to_numpy(dtype='float64')
+    seed = filled[:warmup].mean()
+    out[start + warmup - 1] = seed
+    if len(filled) > warmup:
+        out[start + warmup:], _ = lfilter([alpha], [1, alpha - 1], filled[warmup:], zi=[(1 - alpha) * seed])
+    out[np.isnan(values)] = np.nan
+    return out.astype(values.dtype)
+
+
+# Exponential moving average with pandas' ewm(span=span, adjust=False) weighting
+def ema(values, span):
+    return _smooth(values, 2 / (span + 1))
+
+
+# Wilder's relative strength index: average gain and loss seeded with the mean of the first window
+# changes, then smoothed with alpha = 1 / window
+def rsi(values, window=14):
+    values = _as_array(values)
+    change = np.diff(values)
+    gains = _smooth(np.clip(change, 0, None), 1 / window, warmup=window)
+    losses = _smooth(np.clip(-change, 0, None), 1 / window, warmup=window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        index = 100 - 100 / (1 + gains / losses)
+    index = np.where(losses == 0, 100, index)
+    out = np.full_like(values, np.nan)
+    out[window:] = index[window - 1:]
+    return out
+
+
+# MACD line (fast EMA - slow EMA), its signal EMA and their difference; shape (3, n)
+def macd(values, fast=12, slow=26, signal=9):
+    line = ema(values, fast) - ema(values, slow)
+    signal_line = ema(line, signal)
+    return np.stack([line, signal_line, line - signal_line])
+
+
+# Middle, upper and lower Bollinger bands (population standard deviation); shape (3, n)
+def bollinger(values, window=20, k=2.0):
+    means, stds = rolling_mean_std(values, [window], ddof=0)
+    return np.stack([means[0], means[0] + k * stds[0], means[0] - k * stds[0]])
+
+
+# Wilder's average true range: the mean of the first window true ranges, then smoothed with
+# alpha = 1 / window
+def atr(high, low, close, window=14):
+    high, low, close = _as_array(high), _as_array(low), _as_array(close)
+    previous = np.concatenate([[np.nan], close[:-1]])
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - previous), np.abs(low - previous)))
+    return _smooth(true_range, 1 / window, warmup=window)
+
+
+# Lists / arrays of parameters (e.g. several rolling windows) as hashable tuples
+def _key_part(value):
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return tuple(_key_part(item) for item in value)
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _memoized(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, _key_part(args),
+               tuple(sorted((name, _key_part(value)) for name, value in kwargs.items())))
+        with self.lock:
+            if key in self.memo:
+                self.hits += 1
+                return self.memo[key]
+        result = method(self, *args, **kwargs)
+        for array in ([result.to_numpy()] if isinstance(result, pd.Series) else
+                      [result[column].to_numpy() for column in result.columns]):
+            array.flags.writeable = False
+        with self.lock:
+            self.memo[key] = result
+        return result
+    return wrapper
+
+
+# The indicators of one symbol's frame, each computed once per set of parameters and shared
+# afterwards. The frame's columns are copied in at construction, so the frame itself is never
+# touched; returned Series / frames are read-only.
+class Indicators:
+
+    def __init__(self, frame, dtype='float64'):
+        self.index = frame.index
+        self.columns = {column: frame[column].to_numpy(dtype=dtype, copy=True) for column in frame.columns
+                        if pd.api.types.is_numeric_dtype(frame[column])}
+        self.memo = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+
+    def _series(self, values, name):
+        return pd.Series(values, index=self.index, name=name)
+
+    def _frame(self, rows, names):
+        return pd.DataFrame(dict(zip(names, rows)), index=self.index)
+
+    @_memoized
+    def returns(self, column='Close'):
+        return self._series(returns(self.columns[column]), 'returns')
+
+    @_memoized
+    def log_returns(self, column='Close'):
+        return self._series(log_returns(self.columns[column]), 'log_returns')
+
+    # Columns mean_<w> / std_<w> for every window, from one pass (log=True works on log prices)
+    @_memoized
+    def rolling(self, windows, column='Close', log=False):
+        windows = [int(windows)] if np.isscalar(windows) else [int(window) for window in windows]
+        values = np.log(self.columns[column]) if log else self.columns[column]
+        means, stds = rolling_mean_std(values, windows)
+        return self._frame(list(means) + list(stds),
+                           [f'mean_{w}' for w in windows] + [f'std_{w}' for w in windows])
+
+    @_memoized
+    def ema(self, span, column='Close'):
+        return self._series(ema(self.columns[column], span), f'ema_{span}')
+
+    @_memoized
+    def rsi(self, window=14, column='Close'):
+        return self._series(rsi(self.columns[column], window), f'rsi_{window}')
+
+    @_memoized
+    def macd(self, fast=12, slow=26, signal=9, column='Close'):
+        return self._frame(macd(self.columns[column], fast, slow, signal), ['macd', 'signal', 'histogram'])
+
+    @_memoized
+    def bollinger(self, window=20, k=2.0, column='Close'):
+        return self._frame(bollinger(self.columns[column], window, k), ['middle', 'upper', 'lower'])
+
+    @_memoized
+    def atr(self, window=14):
+        return self._series(atr(self.columns['High'], self.columns['Low'], self.columns['Close'], window),
+                            f'atr_{window}')
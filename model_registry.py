@@ -0,0 +1,143 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+
+from forecasting import params_key
+
+# Fitted models on disk, one pickle per (symbol, training data, search space)
+MODEL_DIR = os.environ.get("STONKS_MODEL_DIR", "data/models")
+
+# Eviction limits, least recently used models go first
+MAX_MODELS = int(os.environ.get("STONKS_MAX_MODELS", "500"))
+MAX_MODEL_BYTES = int(os.environ.get("STONKS_MAX_MODEL_BYTES", str(512 * 1024 * 1024)))
+
+
+def model_key(symbol, train_fingerprint, params):
+    raw = f"{symbol}|{train_fingerprint}|{params_key(params)}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:24]
+
+
+# Key of the "most recent model" pointer for a symbol and search space
+def series_key(symbol, params):
+    raw = f"{symbol}|{params_key(params)}"
+    return 'latest-' + hashlib.sha1(raw.encode()).hexdigest()[:24]
+
+
+# Persistent cache of fitted auto_arima models with LRU / size eviction and hit-miss counters.
+# File mtimes double as the recency order, so the LRU survives restarts and is shared by processes.
+class ModelRegistry:
+
+    def __init__(self, root=MODEL_DIR, max_models=MAX_MODELS, max_bytes=MAX_MODEL_BYTES):
+        self.root = root
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, key + '.pkl')
+
+    def get(self, symbol, train_fingerprint, params):
+        entry = self.get_entry(model_key(symbol, train_fingerprint, params))
+        return entry['model'] if entry is not None else None
+
+    def get_entry(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+            os.utime(path)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        return entry
+
+    # Storing a model; mode 'update' marks a warm update of the previous model for the same series,
+    # anything else a full order search (which resets the warm-update schedule)
+    def put(self, symbol, train_fingerprint, params, model, n_train, mode='full', **extra):
+        key = model_key(symbol, train_fingerprint, params)
+        now = time.time()
+        entry = {
+            'symbol': symbol,
+            'fingerprint': train_fingerprint,
+            'params': params,
+            'model': model,
+            'n_train': n_train,
+            'mode': mode,
+            'fitted_at': now,
+        }
+        entry.update(extra)
+        self._dump(self.path(key), entry)
+
+        previous = self.latest(symbol, params)
+        warm = mode == 'update' and previous is not None
+        self._dump(os.path.join(self.root, series_key(symbol, params) + '.ptr'), {
+            'key': key,
+            'fingerprint': train_fingerprint,
+            'n_train': n_train,
+            'full_fit_at': previous['full_fit_at'] if warm else now,
+            'updates': previous['updates'] + 1 if warm else 0,
+        })
+        self.evict()
+        return key
+
+    # Pointer to the most recently stored model for this symbol and search space (or None)
+    def latest(self, symbol, params):
+        try:
+            with open(os.path.join(self.root, series_key(symbol, params) + '.ptr'), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _dump(self, path, payload):
+        tmp_path = path + f'.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    # (mtime, size, path) of every stored model, oldest first
+    def _entries(self):
+        entries = []
+        for item in os.scandir(self.root):
+            if item.name.endswith('.pkl'):
+                stat = item.stat()
+                entries.append((stat.st_mtime, stat.st_size, item.path))
+        entries.sort()
+        return entries
+
+    def evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        while entries and (len(entries) > self.max_models or total > self.max_bytes):
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        with self.lock:
+            self.evictions += evicted
+        return evicted
+
+    def stats(self):
+        entries = self._entries()
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'models': len(entries),
+                'bytes': sum(size for _, size, _ in entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,191 @@
+import argparse
+import itertools
+import os
+import time
+import warnings
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import numpy as np
+import pmdarima
+from pmdarima.arima import ndiffs, nsdiffs
+from pmdarima.utils import diff
+
+from forecasting import ARIMA_PARAMS, SEARCH_WORKERS
+from worker_pool import SpawnPool, worker_count
+
+# Seconds the search may spend before returning the best model found so far (0 = no limit)
+SEARCH_TIME_BUDGET = float(os.environ.get("STONKS_SEARCH_TIME_BUDGET", "0"))
+
+SearchResult = namedtuple('SearchResult', ['model', 'order', 'seasonal_order', 'aic', 'evaluated',
+                                           'candidates', 'elapsed', 'timed_out'])
+
+
+# auto_arima's defaults for the parameters the search space depends on
+AUTO_ARIMA_DEFAULTS = dict(max_p=5, max_q=5, max_P=2, max_Q=2, max_d=2, max_D=1, max_order=5, m=1, d=None, D=None,
+                           seasonal=True, test='kpss', seasonal_test='ocsb', alpha=0.05, method='lbfgs',
+                           maxiter=50, information_criterion='aic')
+
+SearchSpace = namedtuple('SearchSpace', ['candidates', 'with_intercept', 'params'])
+
+
+# The grid auto_arima(stepwise=False) fits for these values, worked out the way auto_arima does:
+# D (seasonal unit-root test) and d (unit-root test on the seasonally differenced series) chosen
+# once, p / q capped at a third of the series and below m when seasonal terms are searched, the
+# constant decided from d + D, and the (p,d,q)(P,D,Q,m) candidates in auto_arima's order.
+def search_space(values, params=None):
+    params = dict(AUTO_ARIMA_DEFAULTS, **(params or ARIMA_PARAMS))
+    seasonal = params['seasonal']
+    m, D = (params['m'], params['D']) if seasonal else (-1, -1)
+    max_P, max_Q = params['max_P'], params['max_Q']
+    max_p = int(min(params['max_p'], len(values) // 3))
+    max_q = int(min(params['max_q'], len(values) // 3))
+
+    if m == 1:
+        D = max_P = max_Q = 0
+    elif D is None:
+        D = nsdiffs(values, m=m, test=params['seasonal_test'], max_D=params['max_D'])
+    seasonal_diff = diff(values, differences=D, lag=m) if D > 0 else values
+    d = params['d']
+    if d is None:
+        d = ndiffs(seasonal_diff, test=params['test'], alpha=params['alpha'], max_d=params['max_d'])
+    if m > 1:
+        max_p = min(max_p, m - 1) if max_P > 0 else max_p
+        max_q = min(max_q, m - 1) if max_Q > 0 else max_q
+
+    max_order = np.inf if params['max_order'] is None else params['max_order']
+    if seasonal:
+        candidates = [((p, d, q), (P, D, Q, m))
+                      for p, q, P, Q in itertools.product(range(max_p + 1), range(max_q + 1),
+                                                          range(max_P + 1), range(max_Q + 1))
+                      if p + q + P + Q <= max_order]
+    else:
+        candidates = [((p, d, q), (0, 0, 0, 0))
+                      for p, q in itertools.product(range(max_p + 1), range(max_q + 1)) if p + q <= max_order]
+    return SearchSpace(candidates, (d + D) in (0, 1), params)
+
+
+def candidate_orders(values, params=None):
+    return search_space(np.asarray(values, dtype='float64'), params).candidates
+
+
+def _fit(values, order, seasonal_order, space):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return pmdarima.ARIMA(order=order, seasonal_order=seasonal_order, method=space.params['method'],
+                              maxiter=space.params['maxiter'], suppress_warnings=True,
+                              with_intercept=space.with_intercept).fit(values)
+
+
+# auto_arima's check on a fitted candidate: an inverse root within 0.01 of the unit circle
+# disqualifies it (as there, the MA roots replace the AR roots' maximum when both exist)
+def _near_unit_root(model):
+    (p, _, q), (P, _, Q, _) = model.order, model.seasonal_order
+    max_invroot = 0
+    if p + P > 0:
+        max_invroot = max(0, *np.abs(1 / model.arroots()))
+    if q + Q > 0:
+        max_invroot = max(0, *np.abs(1 / model.maroots()))
+    return max_invroot > 1 - 1e-2
+
+
+# Information criterion of one candidate (inf when the fit fails, like auto_arima's
+# error_action='ignore', or when it is near non-invertible)
+def evaluate(values, order, seasonal_order, space):
+    try:
+        model = _fit(values, order, seasonal_order, space)
+        score = getattr(model, space.params['information_criterion'])()
+        if np.isfinite(score) and _near_unit_root(model):
+            return np.inf
+    except Exception:
+        return np.inf
+    return score if np.isfinite(score) else np.inf
+
+
+def _evaluate_batch(values, batch, space):
+    return [(position, evaluate(values, order, seasonal_order, space)) for position, order, seasonal_order in batch]
+
+
+# auto_arima's exhaustive (stepwise=False) search over search_space, keeping the lowest
+# information criterion; ties go to the earlier candidate, as in auto_arima, so the sequential and
+# parallel paths always agree with it. Candidates are spread over `workers` processes (capped at the
+# available CPUs); once time_budget seconds have passed no more results are waited for.
+# The returned aic field holds the criterion the search used.
+def search(values, params=None, workers=SEARCH_WORKERS, time_budget=SEARCH_TIME_BUDGET, batch_size=2):
+    values = np.asarray(values, dtype='float64')
+    started = time.perf_counter()
+    space = search_space(values, params)
+    candidates = space.candidates
+    workers = min(worker_count(workers), -(-len(candidates) // batch_size)) if workers > 1 else 1
+    aics = np.full(len(candidates), np.inf)
+    evaluated = 0
+    timed_out = False
+
+    def out_of_time():
+        return time_budget and time.perf_counter() - started > time_budget
+
+    if workers <= 1:
+        for position, (order, seasonal_order) in enumerate(candidates):
+            if out_of_time():
+                timed_out = True
+                break
+            aics[position] = evaluate(values, order, seasonal_order, space)
+            evaluated += 1
+    else:
+        batches = [[(position, order, seasonal_order)
+                    for position, (order, seasonal_order) in enumerate(candidates)][start:start + batch_size]
+                   for start in range(0, len(candidates), batch_size)]
+        pool = SpawnPool(max_workers=workers)
+        try:
+            pending = {pool.submit(_evaluate_batch, values, batch, space) for batch in batches}
+            while pending:
+                remaining = time_budget - (time.perf_counter() - started) if time_budget else None
+                if remaining is not None and remaining <= 0:
+                    timed_out = True
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for position, aic in future.result():
+                        aics[position] = aic
+                        evaluated += 1
+        finally:
+            pool.shutdown(wait=not timed_out, cancel_futures=True)
+
+    if not np.isfinite(aics).any():
+        if timed_out:
+            raise TimeoutError(f"No ARIMA candidate finished within the {time_budget}s search budget")
+        raise ValueError("No candidate ARIMA order could be fitted")
+    best = int(np.argmin(aics))
+    order, seasonal_order = candidates[best]
+    model = _fit(values, order, seasonal_order, space)
+    return SearchResult(model, order, seasonal_order, float(aics[best]), evaluated, len(candidates),
+                        time.perf_counter() - started, timed_out)
+
+
+# Sequential vs parallel timings on the same series; both must select the same order
+def compare(values, params=None, workers=None):
+    workers = worker_count(workers)
+    sequential = search(values, params, workers=1, time_budget=0)
+    parallel = search(values, params, workers=workers, time_budget=0)
+    if (sequential.order, sequential.seasonal_order) != (parallel.order, parallel.seasonal_order):
+        raise RuntimeError(f"parallel search selected {parallel.order}{parallel.seasonal_order}, "
+                           f"the sequential one {sequential.order}{sequential.seasonal_order}")
+    print(f"{sequential.candidates} candidates, best {parallel.order}{parallel.seasonal_order} AIC={parallel.aic:.2f}")
+    print(f"sequential: {sequential.elapsed:.1f}s")
+    print(f"parallel ({workers} workers): {parallel.elapsed:.1f}s "
+          f"({sequential.elapsed / parallel.elapsed:.1f}x speed-up)")
+    return sequential, parallel
+
+
+if __name__ == "__main__":
+    from price_store import FileProvider
+    from forecasting import train_test_split
+
+    parser = argparse.ArgumentParser(description="Time the sequential and parallel ARIMA order searches.")
+    parser.add_argument('--bars', type=int, default=1000, help="most recent bars of the sample series to use")
+    parser.add_argument('--workers', type=int, default=None, help="default: one per available CPU")
+    args = parser.parse_args()
+
+    close = FileProvider().fetch('MSFT')['Close'].iloc[-args.bars:]
+    train, _ = train_test_split(close)
+    compare(train.to_numpy(), workers=args.workers)
@@ -1,17 +1,29 @@
+import os
+from collections import OrderedDict
+
 import plotly.graph_objects as go
 import plotly.express as px
 import streamlit as st
 import pandas as pd
+import numpy as np
 from pymongo import MongoClient
 import yfinance as yf
 # Import SessionState
 from streamlit.runtime.state import SessionState
+from data_cache import get_data_cache
+from density import binned_kde
+from downsample import CHART_POINTS, lttb, minmax, visible_window
+from export import FORMATS, export_to_tempfile
 from footer import footer
+from indicators import Indicators
+from partitions import PartitionIndex
+from price_store import COLUMNS, PriceStore
+from render import PlotRegistry
+from resample import MAX_BARS, choose_granularity, resample_ohlcv
+from table import PAGE_SIZES, PagedTable, payload_bytes
+from ticker_registry import get_ticker_registry
 
-# Connect to MongoDB
-#client = MongoClient("mongodb://localhost:27017/")
-#db = client["finance"]
-#tickers_meta = db["tickers_meta_ref"]
+# Metadata comes from MongoDB when STONKS_MONGO_URI is set, otherwise from the bundled JSON dump (see ticker_meta.py)
 
 st.set_page_config(
     page_title="STONKS RABBI (Company Overview)",
@@ -20,16 +32,14 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Loading data from pymongo database finance to local environment
+# Every analysis of the page; only the selected view's analyses are computed on a rerun
+registry = PlotRegistry()
+
+# Loading the company document from the metadata backend (pymongo database finance or the JSON dump)
 @st.cache_data(experimental_allow_widgets=True)
 def get_data(symbol):
-    #PyMongo Code
-    # Find document with given symbol
-    #doc_i = tickers_meta.find({"Symbol": symbol}, {})
-    #for doc in doc_i:
-    
-    #Streamlit Easy Deployment Replacement
-    doc = (tickers_meta_j[tickers_meta_j["Symbol"]==symbol]).to_dict("records")[0]
+    # Symbol -> document lookup shared across sessions (single-document query on the backend)
+    doc = get_ticker_registry().document(symbol)
     if doc:
         # Display basic fields
         st.write(f"## {doc['Name']} ({doc['Symbol']})")
@@ -57,18 +67,57 @@ def get_data(symbol):
 
 
 
+# The cached functions below are keyed on the session history's handle (hist_handle, built once by
+# the data cache) and get the history itself as an underscore argument, so Streamlit never hashes a
+# frame. Frames derived from the history are never keyed on: they reuse the history's indicators
+# and partitions.
+
+# Memoized indicators of one frame (indicators.py), shared by every rerun and session showing it
+@st.cache_resource(max_entries=32)
+def get_indicators(handle, _frame):
+    return Indicators(_frame)
+
+
+# Year / month -> row slice index of the symbol's history, built once per dataset
+@st.cache_resource(max_entries=64)
+def get_partitions(handle, _hist):
+    return PartitionIndex(_hist.index)
+
+
+# Year / month partitions of frame, which is the history or a frame on the history's index (the
+# partitions only depend on the dates)
+def partitions_of(frame):
+    partitions = get_partitions(hist_handle, hist)
+    if len(frame) != partitions.rows:
+        raise ValueError(f"frame has {len(frame)} rows, the history {partitions.rows}")
+    return partitions
+
+
+# Year dropdown and month slider (0 = the whole year) shared by the YEAR-WISE charts.
+# Returns the selected rows with the chosen year and month.
+def select_year_month(hist):
+    partitions = partitions_of(hist)
+    # Create a dropdown to select the year
+    selected_year = st.selectbox('**Select Year**', partitions.years)
+    # Create a slider to select the month
+    selected_month = st.slider('**Select Month**', min_value=0, max_value=12, value=0, step=1)
+    return partition_rows(hist, selected_year, selected_month), selected_year, selected_month
+
+
+# Rows of one year (month 0) or one month of the history
+def partition_rows(hist, year, month=0):
+    partitions = partitions_of(hist)
+    return hist.iloc[partitions.rows_for(year, month)]
+
+
 # Visualising Price Movement of Stocks (Candlestick Chart)
+@registry.register('candlestick')
 def candlestick_plot(df):
-    # Extract unique years from the index
-    year_range = df.index.year.unique()
-    year_range = [int(year) for year in year_range]
-    # Set the default selected year to the most recent year in the data
-    selected_year = year_range[-1]
-    # Create a slider to select the year
-    selected_year = st.slider('**Select Year**', min_value=year_range[0], max_value=year_range[-1], value=selected_year)
-    # Filter the data based on the selected year
-    filtered_df = df[df.index.year == selected_year]
-    filtered_df = filtered_df.sort_index()
+    partitions = partitions_of(df)
+    year_range = partitions.years
+    # Create a slider to select the year, defaulting to the most recent year in the data
+    selected_year = st.slider('**Select Year**', min_value=year_range[0], max_value=year_range[-1], value=year_range[-1])
+    filtered_df = df.iloc[partitions.rows_for(selected_year)]
     # Create the candlestick chart
     fig = go.Figure(data=[go.Candlestick(
         x=filtered_df.index,
@@ -89,30 +138,14 @@ def candlestick_plot(df):
 # Opening vs Closing Price
 def plot_open_close(hist, all_years=True):
     if all_years:
-        max_year, min_year = hist.index.year.unique()[-1], hist.index.year.unique()[0]
+        max_year, min_year = hist.index[-1].year, hist.index[0].year
         fig = px.bar(hist, x=hist.index, y=['Open', 'Close'], barmode='group')
         fig.update_layout(title=f'Opening vs Closing Price {min_year}-{max_year}', xaxis_title='Date',
                           yaxis_title='Price')
         return fig
 
     else:
-        # Extract unique years and months from the index
-        year_range = hist.index.year.unique()
-        year_range = [int(year) for year in year_range]
-        month_range = range(0, 13)
-        # Set the default selected year and month to the most recent year and None
-        selected_year = year_range[-1]
-        selected_month = 0
-        # Create a dropdown to select the year
-        selected_year = st.selectbox('**Select Year**', year_range)
-        # Create a slider to select the month
-        selected_month = st.slider('**Select Month**', min_value=0, max_value=12, value=selected_month, step=1)
-        # Filter the data based on the selected year and month (if any)
-        filtered_df = hist[hist.index.year == selected_year]
-
-        if selected_month != 0:
-            filtered_df = filtered_df[filtered_df.index.month == selected_month]
-
+        filtered_df, selected_year, selected_month = select_year_month(hist)
         fig = px.bar(filtered_df, x=filtered_df.index, y=['Open', 'Close'], barmode='group')
 
         if selected_month == 0:
@@ -128,7 +161,7 @@ def plot_open_close(hist, all_years=True):
 # Comparing High vs Low Price
 def plot_high_low(hist, all_years=True):
     if all_years:
-        max_year, min_year = hist.index.year.unique()[-1], hist.index.year.unique()[0]
+        max_year, min_year = hist.index[-1].year, hist.index[0].year
         fig = px.bar(hist, x=hist.index, y=['High', 'Low'], barmode='group',
                      color_discrete_map={'High': 'green', 'Low': 'yellow'})
         fig.update_layout(title=f'High vs Low {min_year}-{max_year}', xaxis_title='Date',
@@ -138,23 +171,7 @@ def plot_high_low(hist, all_years=True):
         return fig
 
     else:
-        # Extract unique years and months from the index
-        year_range = hist.index.year.unique()
-        year_range = [int(year) for year in year_range]
-        month_range = range(0, 13)
-        # Set the default selected year and month to the most recent year and None
-        selected_year = year_range[-1]
-        selected_month = 0
-        # Create a dropdown to select the year
-        selected_year = st.selectbox('**Select Year**', year_range)
-        # Create a slider to select the month
-        selected_month = st.slider('**Select Month**', min_value=0, max_value=12, value=selected_month, step=1)
-        # Filter the data based on the selected year and month (if any)
-        filtered_df = hist[hist.index.year == selected_year]
-
-        if selected_month != 0:
-            filtered_df = filtered_df[filtered_df.index.month == selected_month]
-
+        filtered_df, selected_year, selected_month = select_year_month(hist)
         fig = px.bar(filtered_df, x=filtered_df.index, y=['High', 'Low'], barmode='group',
                      color_discrete_map={'High': 'green', 'Low': 'yellow'})
 
@@ -171,7 +188,7 @@ def plot_high_low(hist, all_years=True):
 
 def plot_closing_price_over_time(hist, all_years=True):
     if all_years:
-        hist = hist.sort_index()
+        hist = lttb(hist.sort_index(), 'Close')
         fig = px.line(hist, x=hist.index, y='Close', color_discrete_map={'Close': 'purple'})
         fig.update_layout(title='Closing Price over Time',
                           xaxis_title='Date', yaxis_title='Price',
@@ -180,25 +197,8 @@ def plot_closing_price_over_time(hist, all_years=True):
                           )
 
     else:
-        # Extract unique years and months from the index
-        year_range = hist.index.year.unique()
-        year_range = [int(year) for year in year_range]
-        month_range = range(0, 13)
-        # Set the default selected year and month to the most recent year and None
-        selected_year = year_range[-1]
-        selected_month = 0
-        # Create a dropdown to select the year
-        selected_year = st.selectbox('**Select Year**', year_range)
-        # Create a slider to select the month
-        selected_month = st.slider('**Select Month**', min_value=0, max_value=12, value=selected_month, step=1)
-        # Filter the data based on the selected year and month (if any)
-        filtered_df = hist[hist.index.year == selected_year]
-        prev_year_df = hist[hist.index.year == selected_year-1]
-
-        if selected_month != 0:
-            filtered_df = filtered_df[filtered_df.index.month == selected_month]
-
-        filtered_df = filtered_df.sort_index()
+        filtered_df, selected_year, selected_month = select_year_month(hist)
+        prev_year_df = partition_rows(hist, selected_year - 1)
         fig = px.line(filtered_df, x=filtered_df.index, y='Close', color_discrete_map={'Close': 'purple'})
         st.write(filtered_df['Close'].mean())
 
@@ -225,34 +225,19 @@ def plot_closing_price_over_time(hist, all_years=True):
     return fig
 
 
-def plot_volume_over_time(hist, all_years=True):
+# period: the bar size of hist ('Daily', 'Weekly', ...); longer bars hold the period's total volume
+def plot_volume_over_time(hist, all_years=True, period='Daily'):
     if all_years:
+        hist = lttb(hist, 'Volume')
         fig = px.line(hist, x=hist.index, y='Volume', color_discrete_map={'Volume': 'Block'})
-        fig.update_layout(title='Volume of Stocks Traded over Time', xaxis_title='Date',
-                          yaxis_title='Volume',
+        fig.update_layout(title=f'{period} Volume of Stocks Traded over Time', xaxis_title='Date',
+                          yaxis_title=f'{period} Volume',
                           plot_bgcolor='rgba(0, 0, 0, 0)',
                           paper_bgcolor='rgba(0, 0, 0, 0)'
                           )
 
     else:
-        # Extract unique years and months from the index
-        year_range = hist.index.year.unique()
-        year_range = [int(year) for year in year_range]
-        month_range = range(0, 13)
-        # Set the default selected year and month to the most recent year and None
-        selected_year = year_range[-1]
-        selected_month = 0
-        # Create a dropdown to select the year
-        selected_year = st.selectbox('**Select Year**', year_range)
-        # Create a slider to select the month
-        selected_month = st.slider('**Select Month**', min_value=0, max_value=12, value=selected_month, step=1)
-        # Filter the data based on the selected year and month (if any)
-        filtered_df = hist[hist.index.year == selected_year]
-
-        if selected_month != 0:
-            filtered_df = filtered_df[filtered_df.index.month == selected_month]
-
-        filtered_df = filtered_df.sort_index()
+        filtered_df, selected_year, selected_month = select_year_month(hist)
         fig = px.line(filtered_df, x=filtered_df.index, y='Volume', color_discrete_map={'Volume': 'Black'})
 
         if selected_month == 0:
@@ -268,33 +253,21 @@ def plot_volume_over_time(hist, all_years=True):
     return fig
 
 
-def plot_daily_pct_change(hist, all_years=True):
-    hist['daily_pct_change'] = hist['Close'].pct_change()
+# window: the visible part of hist for the COMBINED chart. Returns always come from the daily
+# closes of the whole history, so the first visible day keeps its change.
+def plot_daily_pct_change(hist, all_years=True, window=None):
+    hist = get_indicators(hist_handle, hist).returns().to_frame('daily_pct_change')
     if all_years:
+        if window is not None:
+            hist = hist.loc[window.index[0]:window.index[-1]]
+        hist = lttb(hist, 'daily_pct_change')
         fig = px.line(hist, x=hist.index, y='daily_pct_change', color_discrete_map={'daily_pct_change': 'purple'})
         fig.update_layout(title='Daily Percentage Change in Closing Price',
                           xaxis_title='Date', yaxis_title='Percentage Change',
                           plot_bgcolor='rgba(0, 0, 0, 0)',
                           paper_bgcolor='rgba(0, 0, 0, 0)')
     else:
-        # Extract unique years and months from the index
-        year_range = hist.index.year.unique()
-        year_range = [int(year) for year in year_range]
-        month_range = range(0, 13)
-        # Set the default selected year and month to the most recent year and None
-        selected_year = year_range[-1]
-        selected_month = 0
-        # Create a dropdown to select the year
-        selected_year = st.selectbox('**Select Year**', year_range)
-        # Create a slider to select the month
-        selected_month = st.slider('**Select Month**', min_value=0, max_value=12, value=selected_month, step=1)
-        # Filter the data based on the selected year and month (if any)
-        filtered_df = hist[hist.index.year == selected_year]
-
-        if selected_month != 0:
-            filtered_df = filtered_df[filtered_df.index.month == selected_month]
-
-        filtered_df = filtered_df.sort_index()
+        filtered_df, selected_year, selected_month = select_year_month(hist)
         fig = px.line(filtered_df, x=filtered_df.index, y='daily_pct_change',
                       color_discrete_map={'daily_pct_change': 'purple'})
 
@@ -313,50 +286,316 @@ def plot_daily_pct_change(hist, all_years=True):
     return fig
 
 
-@st.cache_data
-def plot_rolling_average(hist, window=30, all_years=True):
-    hist['rolling_avg'] = hist['Close'].rolling(window=window).mean()
-    fig = px.line(hist, x=hist.index, y='rolling_avg')
+@registry.register('rolling_average', inputs=('handle', '_hist'), cache='data')
+def plot_rolling_average(handle, _hist, window=30, all_years=True):
+    rolling_avg = get_indicators(handle, _hist).rolling(window)[f'mean_{window}']
+    fig = px.line(x=rolling_avg.index, y=rolling_avg.to_numpy(), labels={'x': 'Date', 'y': 'rolling_avg'})
 
     fig.update_layout(title=f'Rolling Average of Closing Price over {window} Days', xaxis_title='Date',
                       yaxis_title='Price')
     return fig
 
 
-@st.cache_data
-def plot_closing_price_vs_volume(hist, all_years=True):
+# The rolling average of one year or month; averaged over the whole history, so the first days of
+# the selected period still average the window before them
+@registry.register('rolling_average_year')
+def rolling_average_year_wise(hist, window=30):
+    rolling_avg = get_indicators(hist_handle, hist).rolling(window)[f'mean_{window}'].to_frame('rolling_avg')
+    filtered_df, selected_year, selected_month = select_year_month(rolling_avg)
+    fig = px.line(filtered_df, x=filtered_df.index, y='rolling_avg')
+    period = selected_year if selected_month == 0 else f'{selected_month}/{selected_year}'
+    fig.update_layout(title=f'Rolling Average of Closing Price over {window} Days ({period})', xaxis_title='Date',
+                      yaxis_title='Price')
+    return fig
+
+
+@registry.register('price_vs_volume', inputs=('handle', '_hist'), cache='data')
+def plot_closing_price_vs_volume(handle, _hist, all_years=True):
+    hist = _hist
     fig = px.scatter(hist, x='Close', y='Volume', trendline='ols')
 
     fig.update_layout(title='Closing Price vs Volume Traded', xaxis_title='Closing Price', yaxis_title='Volume')
     return fig
 
 
-@st.cache_data
-def plot_dist_close(hist, all_years=True):
-    fig = px.histogram(hist, x='Close', nbins=20, opacity=0.7)
+# Histogram counts with the binned KDE (density.py) scaled to counts on top. Bars and curve are
+# computed here, so the browser gets 20 bars and one curve instead of every raw value.
+def plot_dist_histogram(values, name, nbins=20):
+    values = values.dropna().to_numpy(dtype='float64')
+    counts, edges = np.histogram(values, bins=nbins)
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges), opacity=0.7, name=name))
+    if len(np.unique(values)) > 1:
+        x, density = binned_kde(values)
+        fig.add_trace(go.Scatter(x=x, y=density * len(values) * (edges[1] - edges[0]), mode='lines',
+                                 name='Density'))
+    return fig
+
+
+@registry.register('dist_close', inputs=('handle', '_hist'), cache='data')
+def plot_dist_close(handle, _hist, all_years=True):
+    hist = _hist
+    fig = plot_dist_histogram(hist['Close'], 'Close')
 
     fig.update_layout(title='Distribution of Closing Price', xaxis_title='Closing Price', yaxis_title='Count')
     return fig
 
 
-@st.cache_data
-def plot_dist_volume(hist, all_years=True):
-    fig = px.histogram(hist, x='Volume', nbins=20, opacity=0.7)
+@registry.register('dist_volume', inputs=('handle', '_hist'), cache='data')
+def plot_dist_volume(handle, _hist, all_years=True):
+    hist = _hist
+    fig = plot_dist_histogram(hist['Volume'], 'Volume')
 
     fig.update_layout(title='Distribution of Volume Traded', xaxis_title='Volume', yaxis_title='Count')
     return fig
 
+# Whole-history bars of one granularity, resampled once per dataset
+@st.cache_data
+def get_bars(handle, freq, _hist):
+    return resample_ohlcv(_hist, freq)
+
+
+# The visible range of the history as daily bars, or as weekly / monthly / quarterly bars once
+# it holds more than max_bars days; returns the bars and their label ('Daily', 'Weekly', ...)
+def combined_bars(hist, key, max_bars=MAX_BARS):
+    window = visible_window(hist, key)
+    granularity = choose_granularity(len(window), max_bars)
+    if granularity is None:
+        st.caption('Daily bars')
+        return window, 'Daily'
+    freq, label = granularity
+    st.caption(f'{label} bars')
+    bars = get_bars(hist_handle, freq, hist)
+    return bars.loc[window.index[0]:window.index[-1]], label
+
+
+# combined_bars for the grouped OHLC bar charts: a history too long even for quarterly bars is
+# thinned to max_bars with minmax, keeping the bars that hold each stretch's lowest low and highest high
+def ohlc_bars(hist, key, max_bars=MAX_BARS):
+    bars, _ = combined_bars(hist, key, max_bars)
+    if len(bars) <= max_bars:
+        return bars
+    st.caption(f'Thinned to the {max_bars} bars holding the extremes')
+    return minmax(bars, max_bars)
+
+
+@st.cache_resource
+def get_price_store():
+    return PriceStore()
+
+
+# Paging / sorting state of the price table, one per dataset (sort orders are kept inside it)
+@st.cache_resource(max_entries=32)
+def get_paged_table(handle, _hist):
+    return PagedTable.from_store(get_price_store(), handle.symbol) or PagedTable.from_frame(_hist)
+
+
+# Arrow payload of the whole history, i.e. what st.dataframe(hist) used to send on every rerun
 @st.cache_data
-def convert_df(df):
-    return df.to_csv().encode('utf-8')
+def get_full_payload(handle, _hist):
+    return payload_bytes(_hist)
 
 
-if isinstance(st.session_state.json_tickers_meta, pd.DataFrame):
-    tickers_meta_j = st.session_state.json_tickers_meta
-# Fetching Session Data
-if isinstance(st.session_state.data, pd.DataFrame):
-    hist = st.session_state.data
-    csv = convert_df(hist)
+# Historical data as a paged table: only the current page's rows are sent to the browser
+def history_table(handle, hist):
+    table = get_paged_table(handle, hist)
+    first, last = hist.index[0].date(), hist.index[-1].date()
+    date_col, sort_col, order_col, size_col = st.columns([2, 1, 1, 1])
+    table_range = date_col.date_input('**Date Range**', value=(first, last), key='table_range')
+    start, end = table_range if len(table_range) == 2 else (first, last)
+    sort_column = sort_col.selectbox('**Sort By**', ['Date'] + COLUMNS, key='table_sort')
+    descending = order_col.selectbox('**Order**', ['Ascending', 'Descending'], key='table_order') == 'Descending'
+    page_size = size_col.selectbox('**Rows per Page**', PAGE_SIZES, key='table_page_size')
+
+    matching = table.count(start, end)
+    pages = max((matching + page_size - 1) // page_size, 1)
+    page_number = st.number_input(f'**Page** (of {pages})', min_value=1, max_value=pages, value=1, step=1,
+                                  key='table_page')
+    page = table.page(int(page_number) - 1, page_size, sort_column, descending, start, end)
+    st.dataframe(page)
+    st.caption(f"Rows {(int(page_number) - 1) * page_size + min(len(page), 1):,}-"
+               f"{(int(page_number) - 1) * page_size + len(page):,} of {matching:,} · page payload "
+               f"{payload_bytes(page) / 1e3:.1f} KB (whole history {get_full_payload(handle, hist) / 1e3:.1f} KB)")
+
+
+# Download form: symbols, date range, columns and format. The file is only built when asked for,
+# streamed chunk by chunk from the price store into a temporary file (export.py), handed to the
+# download button and deleted again.
+def export_form(symbol, hist):
+    store = get_price_store()
+    stored = store.symbols()
+    export_symbols = st.multiselect('**Symbols**', stored, default=[symbol] if symbol in stored else [])
+    first, last = hist.index[0].date(), hist.index[-1].date()
+    export_range = st.date_input('**Date Range**', value=(first, last))
+    start, end = export_range if len(export_range) == 2 else (first, last)
+    export_columns = st.multiselect('**Columns**', COLUMNS, default=COLUMNS)
+    export_format = st.selectbox('**Format**', list(FORMATS), format_func=str.upper)
+    if not export_symbols or not export_columns:
+        st.info("Pick at least one symbol and one column to export.")
+        return
+    if st.button('Prepare Download'):
+        path, file_name, mime = export_to_tempfile(store, export_symbols, export_format, start, end, export_columns)
+        try:
+            size = os.path.getsize(path)
+            with open(path, 'rb') as f:
+                st.download_button(label=f"Download {file_name} ({size / 1e6:.1f} MB)", data=f,
+                                   file_name=file_name, mime=mime)
+        finally:
+            os.remove(path)
+
+
+# COMBINED (whole visible range, resampled) and YEAR-WISE analyses of the dropdown views
+@registry.register('open_close')
+def open_close_combined(hist):
+    return plot_open_close(ohlc_bars(hist, 'open_close_window'), all_years=True)
+
+
+@registry.register('open_close_year')
+def open_close_year_wise(hist):
+    return plot_open_close(hist, all_years=False)
+
+
+@registry.register('high_low')
+def high_low_combined(hist):
+    return plot_high_low(ohlc_bars(hist, 'high_low_window'))
+
+
+@registry.register('high_low_year')
+def high_low_year_wise(hist):
+    return plot_high_low(hist, all_years=False)
+
+
+@registry.register('closing_price', theme=None)
+def closing_price_combined(hist):
+    return plot_closing_price_over_time(combined_bars(hist, 'close_window', CHART_POINTS)[0])
+
+
+@registry.register('closing_price_year', theme=None)
+def closing_price_year_wise(hist):
+    return plot_closing_price_over_time(hist, all_years=False)
+
+
+@registry.register('volume', theme=None)
+def volume_combined(hist):
+    bars, label = combined_bars(hist, 'volume_window', CHART_POINTS)
+    return plot_volume_over_time(bars, period=label)
+
+
+@registry.register('volume_year', theme=None)
+def volume_year_wise(hist):
+    return plot_volume_over_time(hist, all_years=False)
+
+
+@registry.register('pct_change')
+def pct_change_combined(hist):
+    return plot_daily_pct_change(hist, window=visible_window(hist, 'pct_change_window'))
+
+
+@registry.register('pct_change_year')
+def pct_change_year_wise(hist):
+    return plot_daily_pct_change(hist, all_years=False)
+
+
+# Dropdown option -> (heading, description, [(section label, analysis key), ...])
+VIEWS = OrderedDict([
+    ("Price Movement of Stocks (Candlestick Chart)", (
+        "#### Visualising Price Movement of Stocks (Candlestick Chart)",
+        ("A **candlestick chart** is a type of financial chart used to represent the *price movement* of "
+         "stocks. The chart displays the ```opening```, ```closing```, ```high```, and ```low``` prices of"
+         " the stock in a visually appealing way. The body of the candlestick represents the opening and "
+         "closing prices, while the wick or shadow represents the high and low prices. It is an important "
+         "tool for technical analysis and helps investors to identify trends and patterns in the stock "
+         "market. By analyzing candlestick charts, investors can make informed decisions about buying or "
+         "selling stocks."),
+        [(None, "candlestick")])),
+    ("Opening vs Closing Price", (
+        "#### Opening vs Closing Price",
+        ("The opening and closing prices of a stock are two of the most important pieces of information "
+         "for investors. The ```opening price``` is the price at which a stock opens for trading, while "
+         "the ```closing price``` is the price at which it closes. The difference between these two prices"
+         " can indicate the level of **investor sentiment** towards a particular stock. A large difference"
+         " between the opening and closing prices may suggest significant market volatility, while a small"
+         " difference may suggest a relatively stable market. By monitoring the opening and closing "
+         "prices, investors can better understand the market and make more informed decisions about buying"
+         " or selling stocks."),
+        [("COMBINED", "open_close"), ("YEAR-WISE", "open_close_year")])),
+    ("High vs Low Price", (
+        "#### Comparing High vs Low Price",
+        ("The high and low prices of a stock are important indicators of the stock's volatility. The high "
+         "price represents the highest price at which the stock was traded during a particular period, "
+         "while the low price represents the lowest price at which it was traded. By comparing the high "
+         "and low prices, investors can gain insights into the level of volatility of the stock market. A "
+         "high range between the high and low prices may suggest a more volatile market, while a low range"
+         " may suggest a more stable market. Understanding the high and low prices can help investors to "
+         "make better decisions about when to buy or sell stocks."),
+        [("COMBINED", "high_low"), ("YEAR-WISE", "high_low_year")])),
+    ("Closing Price over Time", (
+        "#### Visualising Closing Price over Time",
+        ("The closing price of a stock is the last price at which it was traded on a particular day. By "
+         "analyzing the closing price of a stock over time, investors can gain insights into the stock's "
+         "overall performance. The closing price over time can help investors to identify trends and "
+         "patterns in the stock market, which can inform investment decisions. By analyzing the closing "
+         "price over time, investors can determine the best time to buy or sell stocks."),
+        [("COMBINED", "closing_price"), ("YEAR-WISE", "closing_price_year")])),
+    ("Volume of Stocks Traded over Time", (
+        "#### Visualising Volume of Stocks Traded over Time",
+        ("The volume of stocks traded over time is a critical indicator of market sentiment. High trading "
+         "volume may suggest a bullish market, while low trading volume may suggest a bearish market. By "
+         "analyzing the volume of stocks traded over time, investors can gain insights into the level of "
+         "investor interest in a particular stock. This information can help investors to make more "
+         "informed decisions about buying or selling stocks."),
+        [("COMBINED", "volume"), ("YEAR-WISE", "volume_year")])),
+    ("Percentage Change in Closing Price", (
+        "#### Visualising Daily % Change in Closing Price",
+        ("The percentage change in the closing price of a stock is an important indicator of market "
+         "performance. It represents the percentage increase or decrease in the closing price of a stock "
+         "compared to its previous closing price. By monitoring the percentage change in the closing "
+         "price, investors can gain insights into the overall performance of the stock market. This "
+         "information can help investors to make informed decisions about buying or selling stocks."),
+        [("COMBINED", "pct_change"), ("YEAR-WISE", "pct_change_year")])),
+    ("Rolling Average of Closing Price over Time", (
+        "#### Visualising the Rolling Average of Closing Price over Time",
+        ("The rolling average of the closing price over time is a popular technical analysis tool used by "
+         "investors to identify trends in the stock market. It is calculated by taking the average closing"
+         " price of a stock over a specific time period, such as 50 or 200 days. By analyzing the rolling "
+         "average of the closing price, investors can gain insights into the overall performance of the "
+         "stock market. This information can help investors to make more informed decisions about buying "
+         "or selling stocks."),
+        [("COMBINED", "rolling_average"), ("YEAR-WISE", "rolling_average_year")])),
+    ("Closing Price vs Volume Traded", (
+        "#### Comparing Closing Price and Volume Traded",
+        ("The relationship between the closing price and the volume traded is an important indicator of "
+         "market sentiment. High trading volume with a rising closing price may suggest a bullish market, "
+         "while low trading volume with a falling closing price may suggest a bearish market. By analyzing"
+         " the relationship between the closing price and the volume traded, investors can gain insights "
+         "into the level of investor interest in a particular stock. This information can help investors "
+         "to make more informed decisions about buying or selling stocks. "),
+        [(None, "price_vs_volume")])),
+    ("Distribution of Closing Price", (
+        "#### Distribution of Closing Price",
+        ("The distribution of closing price is a graphical representation of the frequency of closing "
+         "prices of a stock. By analyzing the distribution of closing price, investors can gain insights "
+         "into the range of closing prices and how often they occur. This information can help investors "
+         "to understand the level of volatility of a particular stock. It can also provide insights into "
+         "the level of investor interest in the stock, as well as the overall performance of the stock "
+         "market."),
+        [(None, "dist_close")])),
+    ("Distribution of Volume Traded", (
+        "#### Distribution of Volume traded",
+        ("The distribution of volume traded is a graphical representation of the frequency of volume "
+         "traded for a particular stock. By analyzing the distribution of volume traded, investors can "
+         "gain insights into the level of investor interest in the stock. This information can help "
+         "investors to understand the level of liquidity of the stock, as well as the overall performance "
+         "of the stock market. It can also provide insights into potential trends and patterns in the "
+         "market, which can inform investment decisions."),
+        [(None, "dist_volume")])),
+])
+
+
+# Fetching Session Data: the session only holds the symbol, its history comes from the shared data cache
+if st.session_state.data_symbol:
+    hist = get_data_cache().frame(st.session_state.data_symbol)
+    hist_handle = get_data_cache().handle(st.session_state.data_symbol)
 if st.session_state.name_option_sb:
     comp_title = st.session_state.name_option_sb
 if st.session_state.data_symbol:
@@ -373,13 +612,9 @@ get_data(comp_symbol)
 #Dataset
 st.markdown("<h3 style='color: #00008b;'>Company Stock Historical Data</h3>", unsafe_allow_html=True)
 # st.markdown("## Company Stock Historical Data")
-st.download_button(
-    label="Download Data As CSV",
-    data=csv,
-    file_name='stocks_data.csv',
-    mime='text/csv',
-)
-st.dataframe(hist)
+with st.expander("**Download Data**"):
+    export_form(comp_symbol, hist)
+history_table(hist_handle, hist)
 
 
 #Plots
@@ -387,179 +622,17 @@ st.markdown("<h3 style='color: #00008b;'>Visual Analysis</h3>", unsafe_allow_htm
 
 # create a container for the selectbox and the plot
 plot_container = st.container()
-# List of all dropdown options
-options_dd = ['Price Movement of Stocks (Candlestick Chart)',
-              'Opening vs Closing Price',
-              'High vs Low Price',
-              'Closing Price over Time',
-              'Volume of Stocks Traded over Time',
-              'Percentage Change in Closing Price',
-              'Rolling Average of Closing Price over Time',
-              'Closing Price vs Volume Traded',
-              'Distribution of Closing Price',
-              'Distribution of Volume Traded']
-
 # display the selectbox in the container
-plot_type = plot_container.selectbox("**Pick a Analysis / Visualization Technique**", options=options_dd)
-# plot the selected option in the same container
+plot_type = plot_container.selectbox("**Pick a Analysis / Visualization Technique**", options=list(VIEWS))
+# plot the selected option in the same container, computing only the analyses it shows
+heading, description, sections = VIEWS[plot_type]
+analysis_inputs = {'hist': hist, 'handle': hist_handle, '_hist': hist}
 with plot_container:
-    if plot_type == "Price Movement of Stocks (Candlestick Chart)":
-        st.markdown("#### Visualising Price Movement of Stocks (Candlestick Chart)")
-        st.markdown("A **candlestick chart** is a type of financial "
-                    "chart used to represent the *price movement* "
-                    "of stocks. The chart displays the ```opening```, "
-                    "```closing```, ```high```, and ```low``` prices of the stock in "
-                    "a visually appealing way. The body of the candlestick "
-                    "represents the opening and closing prices, while "
-                    "the wick or shadow represents the high and low prices."
-                    " It is an important tool for technical analysis and helps "
-                    "investors to identify trends and patterns in the stock market. "
-                    "By analyzing candlestick charts, investors can make informed decisions about"
-                    " buying or selling stocks.")
-        fig = candlestick_plot(hist)
-        st.plotly_chart(fig)
-
-    if plot_type == 'Opening vs Closing Price':
-        st.markdown("#### Opening vs Closing Price")
-        st.markdown("The opening and closing prices of a stock are "
-                    "two of the most important pieces of information for investors. "
-                    "The ```opening price``` is the price at which a stock opens for trading, "
-                    "while the ```closing price``` is the price at which it closes. "
-                    "The difference between these two prices can indicate the level of **investor sentiment** "
-                    "towards a particular stock. "
-                    "A large difference between the opening and closing prices may "
-                    "suggest significant market volatility, "
-                    "while a small difference may suggest a relatively stable market. "
-                    "By monitoring the opening and closing prices, investors can better understand the market "
-                    "and make more informed decisions about buying or selling stocks.")
-
-        st.markdown("<h5 style = 'color: #964B00;'>COMBINED</h5>", unsafe_allow_html=True)
-        fig_all = plot_open_close(hist, all_years=True)
-        st.plotly_chart(fig_all)
-        st.markdown("<h5 style = 'color: #964B00;'>YEAR-WISE</h5>", unsafe_allow_html=True)
-        fig = plot_open_close(hist, all_years=False)
-        st.plotly_chart(fig)
-
-    elif plot_type == 'High vs Low Price':
-        st.markdown("#### Comparing High vs Low Price")
-        st.markdown("The high and low prices of a stock are important indicators of the stock's volatility. "
-                    "The high price represents the highest price at which the stock was traded during a"
-                    " particular period, while the low price represents the lowest price at which it was traded."
-                    " By comparing the high and low prices, investors can gain insights into the level of volatility"
-                    " of the stock market. A high range between the high and low prices may suggest a more "
-                    "volatile market, while a low range may suggest a more stable market. "
-                    "Understanding the high and low prices can help investors to make better decisions"
-                    " about when to buy or sell stocks.")
-        st.markdown("<h5 style = 'color: #964B00;'>COMBINED</h5>", unsafe_allow_html=True)
-        fig_all = plot_high_low(hist)
-        st.plotly_chart(fig_all)
-        st.markdown("<h5 style = 'color: #964B00;'>YEAR-WISE</h5>", unsafe_allow_html=True)
-        fig = plot_high_low(hist, all_years=False)
-        st.plotly_chart(fig)
-
-
-    elif plot_type == 'Closing Price over Time':
-        st.markdown("#### Visualising Closing Price over Time")
-        st.markdown("The closing price of a stock is the last price at which it was "
-                    "traded on a particular day. By analyzing the closing price of a stock "
-                    "over time, investors can gain insights into the stock's overall performance. "
-                    "The closing price over time can help investors to identify trends and patterns"
-                    " in the stock market, which can inform investment decisions. By analyzing "
-                    "the closing price over time, investors can determine the best time to"
-                    " buy or sell stocks.")
-        st.markdown("<h5 style = 'color: #964B00;'>COMBINED</h5>", unsafe_allow_html=True)
-        fig_all = plot_closing_price_over_time(hist)
-        st.plotly_chart(fig_all, theme=None)
-        st.markdown("<h5 style = 'color: #964B00;'>YEAR-WISE</h5>", unsafe_allow_html=True)
-        fig = plot_closing_price_over_time(hist, all_years=False)
-        st.plotly_chart(fig, theme=None)
-
-    elif plot_type == 'Volume of Stocks Traded over Time':
-        # Reset the color sequence to default
-
-        st.markdown("#### Visualising Volume of Stocks Traded over Time")
-        st.markdown("The volume of stocks traded over time is a critical indicator of market sentiment. "
-                    "High trading volume may suggest a bullish market, while low trading volume "
-                    "may suggest a bearish market. By analyzing the volume of stocks traded over time,"
-                    " investors can gain insights into the level of investor interest in a "
-                    "particular stock. This information can help investors to make more informed"
-                    " decisions about buying or selling stocks.")
-        st.markdown("<h5 style = 'color: #964B00;'>COMBINED</h5>", unsafe_allow_html=True)
-        fig_all = plot_volume_over_time(hist)
-        st.plotly_chart(fig_all, theme=None)
-        st.markdown("<h5 style = 'color: #964B00;'>YEAR-WISE</h5>", unsafe_allow_html=True)
-        fig = plot_volume_over_time(hist, all_years=False)
-        st.plotly_chart(fig, theme=None)
-
-
-    elif plot_type == 'Percentage Change in Closing Price':
-        st.markdown("#### Visualising Daily % Change in Closing Price")
-        st.markdown("The percentage change in the closing price of a stock is an "
-                    "important indicator of market performance. It represents the "
-                    "percentage increase or decrease in the closing price of a stock "
-                    "compared to its previous closing price. By monitoring the percentage"
-                    " change in the closing price, investors can gain insights into the "
-                    "overall performance of the stock market. This information can help "
-                    "investors to make informed decisions about buying or selling stocks.")
-        st.markdown("<h5 style = 'color: #964B00;'>COMBINED</h5>", unsafe_allow_html=True)
-
-        fig_all = plot_daily_pct_change(hist)
-        st.plotly_chart(fig_all)
-        st.markdown("<h5 style = 'color: #964B00;'>YEAR-WISE</h5>", unsafe_allow_html=True)
-        fig = plot_daily_pct_change(hist, all_years=False)
-        st.plotly_chart(fig)
-
-    elif plot_type == 'Rolling Average of Closing Price over Time':
-        st.markdown("#### Visualising the Rolling Average of Closing Price over Time")
-        st.markdown("The rolling average of the closing price over time is a popular technical "
-                    "analysis tool used by investors to identify trends in the stock market. "
-                    "It is calculated by taking the average closing price of a stock over a "
-                    "specific time period, such as 50 or 200 days. By analyzing the rolling "
-                    "average of the closing price, investors can gain insights into the overall "
-                    "performance of the stock market. This information can help investors to make "
-                    "more informed decisions about buying or selling stocks.")
-        fig_all = plot_rolling_average(hist)
-        st.plotly_chart(fig_all)
-        st.markdown("<h5 style = 'color: #964B00;'>YEAR-WISE</h5>", unsafe_allow_html=True)
-        fig = plot_rolling_average(hist, all_years=False)
-        st.plotly_chart(fig)
-
-
-    elif plot_type == 'Closing Price vs Volume Traded':
-        st.markdown("#### Comparing Closing Price and Volume Traded")
-        st.markdown("The relationship between the closing price and the volume traded "
-                    "is an important indicator of market sentiment. High trading volume "
-                    "with a rising closing price may suggest a bullish market, while low "
-                    "trading volume with a falling closing price may suggest a bearish market. "
-                    "By analyzing the relationship between the closing price and the volume traded,"
-                    " investors can gain insights into the level of investor interest "
-                    "in a particular stock. This information can help investors to make more "
-                    "informed decisions about buying or selling stocks. ")
-        fig = plot_closing_price_vs_volume(hist)
-        st.plotly_chart(fig)
-
-    elif plot_type == 'Distribution of Closing Price':
-        st.markdown("#### Distribution of Closing Price")
-        st.markdown("The distribution of closing price is a graphical "
-                    "representation of the frequency of closing prices of a stock. "
-                    "By analyzing the distribution of closing price, investors can gain "
-                    "insights into the range of closing prices and how often they occur. "
-                    "This information can help investors to understand the level of volatility "
-                    "of a particular stock. It can also provide insights into the level of investor"
-                    " interest in the stock, as well as the overall performance of the stock market.")
-        fig = plot_dist_close(hist)
-        st.plotly_chart(fig)
-
-    if plot_type == 'Distribution of Volume Traded':
-        st.markdown("#### Distribution of Volume traded")
-        st.markdown("The distribution of volume traded is a graphical"
-                    " representation of the frequency of volume traded for a "
-                    "particular stock. By analyzing the distribution of volume traded,"
-                    " investors can gain insights into the level of investor interest in "
-                    "the stock. This information can help investors to understand the level"
-                    " of liquidity of the stock, as well as the overall performance of the "
-                    "stock market. It can also provide insights into potential trends and "
-                    "patterns in the market, which can inform investment decisions.")
-        fig = plot_dist_volume(hist)
-        st.plotly_chart(fig)
-
+    st.markdown(heading)
+    st.markdown(description)
+    for label, key in sections:
+        if label:
+            st.markdown(f"<h5 style = 'color: #964B00;'>{label}</h5>", unsafe_allow_html=True)
+        registry.show(key, analysis_inputs)
+
+registry.report()
@@ -1,18 +1,26 @@
+import time
 import warnings
-import pmdarima
+from collections import OrderedDict
 
 warnings.filterwarnings('ignore')
 import pandas as pd
 import matplotlib.pyplot as plt
-from statsmodels.tsa.stattools import adfuller
-from statsmodels.tsa.seasonal import seasonal_decompose
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 
 import plotly.graph_objects as go
-import numpy as np
-from scipy.stats import gaussian_kde
 import streamlit as st
 
+from backtest import backtest
+from baselines import BASELINES, baseline_forecasts
+from batch_forecast import load_summary
+from data_cache import get_data_cache
+from diagnostics import DiagnosticsCache
+from downsample import lttb, visible_window
+from forecast_jobs import ForecastJobs
+from forecasting import ArimaForecaster, fingerprint, forecast_split, model_symbol
+from indicators import Indicators
+from render import PlotRegistry
+
 st.set_page_config(
     page_title="STONKS RABBI",
     page_icon="📈",
@@ -20,16 +28,75 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-# Fetching Session Data
-if isinstance(st.session_state.data, pd.DataFrame):
-    data = st.session_state.data
+# Seconds between status checks while a background fit is running
+POLL_SECONDS = 2
+
+# Processes used by the walk-forward backtest
+BACKTEST_WORKERS = 4
+
+# The charts of the expanders below; an expander's analysis is only computed once it is asked for
+registry = PlotRegistry()
+
+# Fetching Session Data: the session only holds the symbol, its history comes from the shared data cache
+if st.session_state.data_symbol:
+    data = get_data_cache().frame(st.session_state.data_symbol)
 else:
     pass
 
+
+# Fitting happens in a process pool shared by all sessions, so identical requests share one fit,
+# and fitted models are kept on disk (model_registry.py) so repeat visits skip the search entirely
+@st.cache_resource
+def get_forecast_jobs():
+    return ForecastJobs()
+
+
+# ADF / decomposition / KDE results on disk, keyed by symbol and data fingerprint (diagnostics.py)
+@st.cache_resource
+def get_diagnostics_cache():
+    return DiagnosticsCache()
+
+
+# Memoized rolling statistics of the symbol's history (indicators.py), shared across reruns
+@st.cache_resource(max_entries=32)
+def get_indicators(handle, _data):
+    return Indicators(_data)
+
+
+# Scores written by batch_forecast.py for this symbol, if the batch job has covered it
+@st.cache_data(ttl=600)
+def get_precomputed_summary(symbol):
+    return load_summary(symbol)
+
+
+# Walk-forward backtest of one model (auto_arima keeps the fitted model's order), cached per
+# dataset handle / settings
+@st.cache_data
+def run_backtest(handle, model_name, order, seasonal_order, horizon, folds, _close):
+    if model_name == ArimaForecaster.name:
+        prototype = ArimaForecaster(order=order, seasonal_order=seasonal_order)
+    else:
+        prototype = next(forecaster for forecaster in BASELINES if forecaster.name == model_name)()
+    return backtest(_close, prototype=prototype, horizon=horizon, max_folds=folds, workers=BACKTEST_WORKERS)
+
+
+# Baseline forecasts over the test period, drawn straight away while auto_arima is still fitting
+@st.cache_data
+def plot_baselines(handle, _close):
+    train_data, test_data = forecast_split(_close)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=test_data.index, y=test_data, name='Actual Test data'))
+    for name, pred in baseline_forecasts(train_data.to_numpy(), len(test_data)).items():
+        fig.add_trace(go.Scatter(x=test_data.index, y=pred, name=name.title()))
+    fig.update_layout(title='Baseline Predictions', xaxis_title='Date', yaxis_title='Closing Price')
+    return fig
+
+
 def plot_closing_price(stock_data):
+    close = lttb(stock_data['Close'])
     fig = go.Figure()
     fig.add_trace(
-        go.Scatter(x=stock_data.index, y=stock_data['Close'], mode='lines')
+        go.Scatter(x=close.index, y=close, mode='lines')
     )
     fig.update_layout(
         title='Stock Closing Price',
@@ -42,14 +109,19 @@ def plot_closing_price(stock_data):
     return fig
 
 
-def plot_distribution(stock_data):
-    df_close = stock_data['Close']
-    x = np.linspace(df_close.min(), df_close.max(), 1000)
-    density = gaussian_kde(df_close)(x)
+# The closing price over the range picked with the slider inside the expander
+@registry.register('closing_price', inputs=('data',))
+def closing_price_view(stock_data):
+    return plot_closing_price(visible_window(stock_data, 'close_window'))
+
+
+@registry.register('distribution', inputs=('data', 'symbol'))
+def plot_distribution(stock_data, symbol):
+    kde = get_diagnostics_cache().get(symbol, stock_data['Close'], 'kde')
 
     fig = go.Figure()
     fig.add_trace(
-        go.Scatter(x=x, y=density, mode='lines', fill='tozeroy', name='Close')
+        go.Scatter(x=kde['x'], y=kde['density'], mode='lines', fill='tozeroy', name='Close')
     )
     fig.update_layout(
         title='Distribution of Stock Closing Prices',
@@ -61,21 +133,24 @@ def plot_distribution(stock_data):
     return fig
 
 
-def test_stationarity(stock_data):
+@registry.register('stationarity', inputs=('data', 'symbol', 'handle'))
+def test_stationarity(stock_data, symbol, handle):
     df_close = stock_data['Close']
     # Determing rolling statistics
-    rolmean = df_close.rolling(12).mean()
-    rolstd = df_close.rolling(12).std()
+    rolling = get_indicators(handle, stock_data).rolling(12)
+    rolmean, rolstd = rolling['mean_12'], rolling['std_12']
 
+    # Each line thinned on its own, so every trace keeps its peaks
+    original, rolmean, rolstd = lttb(df_close), lttb(rolmean), lttb(rolstd)
     fig = go.Figure()
     fig.add_trace(
-        go.Scatter(x=stock_data.index, y=df_close, mode='lines', line=dict(color='blue'), name='Original')
+        go.Scatter(x=original.index, y=original, mode='lines', line=dict(color='blue'), name='Original')
     )
     fig.add_trace(
-        go.Scatter(x=stock_data.index, y=rolmean, mode='lines', line=dict(color='red'), name='Rolling Mean')
+        go.Scatter(x=rolmean.index, y=rolmean, mode='lines', line=dict(color='red'), name='Rolling Mean')
     )
     fig.add_trace(
-        go.Scatter(x=stock_data.index, y=rolstd, mode='lines', line=dict(color='black'), name='Rolling Std')
+        go.Scatter(x=rolstd.index, y=rolstd, mode='lines', line=dict(color='black'), name='Rolling Std')
     )
 
     fig.update_layout(
@@ -88,19 +163,14 @@ def test_stationarity(stock_data):
     )
     fig.update_traces(line_width=2)
 
-    adft = adfuller(df_close, autolag='AIC')
-    output = pd.Series(adft[0:4],
-                       index=['Test Statistics', 'p-value', 'No. of lags used', 'Number of observations used'])
-    for key, values in adft[4].items():
-        output['critical value (%s)' % key] = values
-    st.write(output)
+    st.write(get_diagnostics_cache().get(symbol, df_close, 'adf'))
 
     return fig
 
 
-def plot_seasonal_decompose(stock_data):
-    df_close = stock_data['Close']
-    result = seasonal_decompose(df_close, model='multiplicative', period=30)
+@registry.register('decomposition', inputs=('data', 'symbol'))
+def plot_seasonal_decompose(stock_data, symbol):
+    result = get_diagnostics_cache().get(symbol, stock_data['Close'], 'decompose')
 
     trace1 = go.Scatter(x=result.observed.index, y=result.observed, name='Observed')
     fig1 = go.Figure([trace1])
@@ -121,11 +191,11 @@ def plot_seasonal_decompose(stock_data):
     return fig1, fig2, fig3, fig4
 
 
-def plot_eliminate_trend(stock_data):
+@registry.register('eliminated_trend', inputs=('data', 'handle'))
+def plot_eliminate_trend(stock_data, handle):
     df_close = stock_data['Close']
-    df_log = np.log(df_close)
-    moving_avg = df_log.rolling(12).mean()
-    std_dev = df_log.rolling(12).std()
+    rolling = get_indicators(handle, stock_data).rolling(12, log=True)
+    moving_avg, std_dev = rolling['mean_12'], rolling['std_12']
 
     fig = go.Figure()
     fig.add_trace(
@@ -137,6 +207,7 @@ def plot_eliminate_trend(stock_data):
     return fig
 
 
+@registry.register('train_test_split', inputs=('data',))
 def plot_train_test_split(stock_data):
     df_close = stock_data['Close']
     train_data, test_data = df_close[3:int(len(df_close) * 0.9)], df_close[int(len(df_close) * 0.9):]
@@ -147,21 +218,7 @@ def plot_train_test_split(stock_data):
     return fig
 
 
-def plot_autoarima(data):
-    train_data, test_data = data[:int(len(data) * 0.7)], data[int(len(data) * 0.7):]
-    model_autoARIMA = pmdarima.auto_arima(train_data, start_p=0, start_q=0,
-                                          test='adf',  # use adftest to find optimal 'd'
-                                          max_p=3, max_q=3,  # maximum p and q
-                                          m=7,
-                                          max_d =  5,  # frequency of series
-                                          d=None,  # let model determine 'd'
-                                          seasonal=True,  # No Seasonality
-                                          start_P=0,
-                                          D=0,
-                                          trace=True,
-                                          error_action='ignore',
-                                          suppress_warnings=True,
-                                          stepwise=True)
+def plot_autoarima(test_data, model_autoARIMA):
     st.write(model_autoARIMA.summary())
     model_autoARIMA.plot_diagnostics(figsize=(15, 8))
     st.pyplot(plt)
@@ -169,22 +226,23 @@ def plot_autoarima(data):
     pred = model_autoARIMA.predict( n_periods=len(test_data))
 
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=data.index[-len(test_data):], y=test_data, name='Actual Test data'))
-    fig.add_trace(go.Scatter(x=data.index[-len(test_data):], y=pred, name='Predictions'))
+    fig.add_trace(go.Scatter(x=test_data.index, y=test_data, name='Actual Test data'))
+    fig.add_trace(go.Scatter(x=test_data.index, y=pred, name='Predictions'))
     fig.update_layout(title='autoARIMA Predictions', xaxis_title='Date', yaxis_title='Closing Price')
 
     st.plotly_chart(fig)
 
 
 # Fetching Session Data
-if isinstance(st.session_state.data, pd.DataFrame):
-    data = st.session_state.data
+if st.session_state.data_symbol:
+    data = get_data_cache().frame(st.session_state.data_symbol)
 if st.session_state.name_option_sb:
     comp_title = st.session_state.name_option_sb
 if st.session_state.data_symbol:
-    comp_symbol = st.session_state.data_symbol[0]
+    comp_symbol = st.session_state.data_symbol
 else:
     pass
+data_handle = get_data_cache().handle(comp_symbol)
 
 st.markdown("<h1 style='text-align: center; color: red;'>FORECASTING COMPANY STOCKS</h1>", unsafe_allow_html=True)
 
@@ -214,41 +272,66 @@ st.markdown("The ARIMA model summary and forecast plot can help evaluate the per
 
 
 st.markdown("### Chose From an Option Below")
-with st.spinner("This won't take long..."):
-    with st.expander("**Auto ARIMA Diagnostics**"):
-        plot_autoarima(data['Close'])
-
-# create expanders for each plot
-with st.expander("**Daily Closing Price Visualisation**"):
-    fig1 = plot_closing_price(data)
-    st.plotly_chart(fig1)
-
-with st.expander("**Distribution of Stock Closing Prices**"):
-    fig2 = plot_distribution(data)
-    st.plotly_chart(fig2)
-
-with st.expander("**Stationarity Data Test**"):
-    fig3 = test_stationarity(data)
-    st.plotly_chart(fig3)
-
-with st.expander("**Seasonal Decomposition Plot**"):
-    fig_a, fig_b, fig_c, fig_d = plot_seasonal_decompose(data)
-    st.plotly_chart(fig_a)
-    st.plotly_chart(fig_b)
-    st.plotly_chart(fig_c)
-    st.plotly_chart(fig_d)
-
-with st.expander("**Eliminated Trend Plot**"):
-    fig5 = plot_eliminate_trend(data)
-    st.plotly_chart(fig5)
-
-with st.expander("**Train Test Split Plot**"):
-    fig6 = plot_train_test_split(data)
-    st.plotly_chart(fig6)
-
-
-
-
-
-
-
+# Submitting the fit (or joining an identical one already queued) and rendering it once finished
+forecast_jobs = get_forecast_jobs()
+train_close, test_close = forecast_split(data['Close'])
+arima_job_id = forecast_jobs.submit(model_symbol(comp_symbol), train_close.to_numpy())
+arima_job = forecast_jobs.get(arima_job_id)
+with st.expander("**Auto ARIMA Diagnostics**"):
+    if arima_job.status == 'done':
+        st.caption(f"Model: {arima_job.mode} ({arima_job.elapsed:.1f}s)")
+        precomputed = get_precomputed_summary(model_symbol(comp_symbol))
+        if precomputed is not None and precomputed['train_fingerprint'] == fingerprint(train_close.to_numpy()):
+            st.markdown(f"**Test-set scores** (batch run of {precomputed['computed_at']:%Y-%m-%d %H:%M})")
+            st.write(pd.Series({key: precomputed[key] for key in ['order', 'seasonal_order', 'aic', 'mae', 'rmse', 'mape']}))
+        plot_autoarima(test_close, forecast_jobs.result(arima_job_id))
+    elif arima_job.status == 'failed':
+        st.error(f"Auto ARIMA fit failed: {arima_job.future.exception()}")
+    else:
+        st.info(f"Fitting auto ARIMA in the background ({arima_job.status}, {arima_job.elapsed:.0f}s so far). "
+                "The diagnostics will replace these baseline forecasts once it finishes.")
+        st.plotly_chart(plot_baselines(data_handle, data['Close']))
+
+with st.expander("**Walk-forward Backtest**"):
+    # Baselines can be scored right away, auto_arima once its order is known
+    bt_models = [forecaster.name for forecaster in BASELINES]
+    if arima_job.status == 'done':
+        fitted_model = forecast_jobs.result(arima_job_id)
+        bt_models = [ArimaForecaster.name] + bt_models
+    bt_selected = st.multiselect('**Models to Compare**', bt_models, default=bt_models)
+    bt_horizon = st.slider('**Forecast Horizon (days)**', min_value=1, max_value=30, value=5)
+    bt_folds = st.slider('**Number of Folds**', min_value=100, max_value=2000, value=500, step=100)
+    if st.button('Run Backtest'):
+        scores = {}
+        for model_name in bt_selected:
+            order, seasonal_order = ((fitted_model.order, fitted_model.seasonal_order)
+                                     if model_name == ArimaForecaster.name else (None, None))
+            result = run_backtest(data_handle, model_name, order, seasonal_order,
+                                  bt_horizon, bt_folds, data['Close'])
+            scores[model_name] = dict(result.summary, seconds=result.elapsed)
+        st.dataframe(pd.DataFrame(scores).T)
+
+# Expander title -> (checkbox label, analysis). Expanders cannot report being opened, so each one
+# computes its analysis only after its checkbox is ticked; ticked analyses come from their caches
+# (diagnostics.py, indicators.py) on later reruns, e.g. while the fit above is polling.
+DIAGNOSTIC_VIEWS = OrderedDict([
+    ("**Daily Closing Price Visualisation**", ('Show closing price', 'closing_price')),
+    ("**Distribution of Stock Closing Prices**", ('Compute distribution', 'distribution')),
+    ("**Stationarity Data Test**", ('Run stationarity test', 'stationarity')),
+    ("**Seasonal Decomposition Plot**", ('Compute decomposition', 'decomposition')),
+    ("**Eliminated Trend Plot**", ('Show eliminated trend', 'eliminated_trend')),
+    ("**Train Test Split Plot**", ('Show train / test split', 'train_test_split')),
+])
+analysis_inputs = {'data': data, 'symbol': comp_symbol, 'handle': data_handle}
+for title, (label, key) in DIAGNOSTIC_VIEWS.items():
+    with st.expander(title):
+        if st.checkbox(label, key=f'show_{key}'):
+            registry.show(key, analysis_inputs)
+
+registry.report()
+
+
+# Polling the background fit: rerun the page until the job has finished
+if arima_job.status in ('pending', 'running'):
+    time.sleep(POLL_SECONDS)
+    st.experimental_rerun()
@@ -0,0 +1,36 @@
+import pandas as pd
+import streamlit as st
+
+from data_cache import get_data_cache
+
+st.set_page_config(
+    page_title="STONKS RABBI (Cache Statistics)",
+    page_icon="📈",
+    layout="wide",
+    initial_sidebar_state="collapsed"
+)
+
+# Admin / debug view of the process-wide data cache (data_cache.py): what is loaded, how much
+# memory it takes, how many sessions hold each symbol and how well the cache is doing
+data_cache = get_data_cache()
+
+st.markdown("<h1 style='text-align: center; color: red;'>CACHE STATISTICS</h1>", unsafe_allow_html=True)
+
+if st.button('Evict Unused Datasets'):
+    st.write(f"**Evicted {data_cache.evict(unused=True)} dataset(s) no session was using.**")
+
+stats = data_cache.stats()
+entries_col, bytes_col, hits_col, evictions_col = st.columns(4)
+entries_col.metric('**Entries**', f"{stats['entries']} / {stats['max_entries']}",
+                   f"{stats['leased']} in use by {stats['sessions']} session(s)", delta_color='off')
+bytes_col.metric('**Bytes**', f"{stats['bytes'] / 2**20:.2f} MiB", f"limit {stats['max_bytes'] / 2**20:.0f} MiB",
+                 delta_color='off')
+hits_col.metric('**Hit Rate**', f"{stats['hit_rate']:.1%}", f"{stats['hits']} hits / {stats['misses']} misses",
+                delta_color='off')
+evictions_col.metric('**Evictions**', stats['evictions'])
+
+st.markdown("<h3 style='color: #00008b;'>Cached Datasets</h3>", unsafe_allow_html=True)
+snapshot = pd.DataFrame(data_cache.snapshot(), columns=['symbol', 'rows', 'bytes', 'sessions', 'hits', 'loaded_at'])
+snapshot['loaded_at'] = pd.to_datetime(snapshot['loaded_at'], unit='s').dt.strftime('%Y-%m-%d %H:%M:%S')
+snapshot['bytes'] = (snapshot['bytes'] / 1e3).round(1)
+st.dataframe(snapshot.rename(columns={'bytes': 'KB'}).set_index('symbol'))
@@ -0,0 +1,30 @@
+import numpy as np
+
+
+# Row ranges of every calendar year and month over a sorted DatetimeIndex, found with one pass
+# (searchsorted over year*12 + month) when built, so selecting a year or month afterwards is a
+# dictionary lookup and a positional slice instead of a scan of the whole history
+class PartitionIndex:
+
+    def __init__(self, index):
+        if not index.is_monotonic_increasing:
+            raise ValueError("PartitionIndex needs an index sorted by date")
+        months = np.asarray(index.year, dtype='int64') * 12 + np.asarray(index.month, dtype='int64') - 1
+        keys = np.unique(months)
+        starts = np.searchsorted(months, keys, side='left')
+        stops = np.searchsorted(months, keys, side='right')
+        self.month_slices = {(int(key // 12), int(key % 12) + 1): slice(int(start), int(stop))
+                             for key, start, stop in zip(keys, starts, stops)}
+
+        self.year_slices = {}
+        for (year, _), rows in self.month_slices.items():
+            first = self.year_slices.get(year, rows)
+            self.year_slices[year] = slice(first.start, rows.stop)
+        self.years = sorted(self.year_slices)
+        self.rows = len(index)
+
+    # Row slice of one year (month 0) or one month of it; an empty slice when there is no data
+    def rows_for(self, year, month=0):
+        if month:
+            return self.month_slices.get((year, month), slice(0, 0))
+        return self.year_slices.get(year, slice(0, 0))
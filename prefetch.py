@@ -0,0 +1,200 @@
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from price_store import PROVIDERS, FileProvider, PriceStore, get_provider, refresh
+
+# Universe scraped from the NASDAQ screener (see Pre-process/)
+NASDAQ_CSV = "Pre-process/nasdaq_data.csv"
+
+# Symbols already warmed by an earlier (possibly interrupted) run, one per line
+CHECKPOINT = "data/prefetch_checkpoint.txt"
+
+
+# NASDAQ screener notation -> Yahoo notation (BRK/A -> BRK-A, AAIC^B -> AAIC-PB)
+def yahoo_symbol(symbol):
+    return symbol.strip().replace('/', '-').replace('^', '-P')
+
+
+# Symbols from the screener CSV or from the ticker meta JSON dump, deduplicated in file order
+def read_symbols(path):
+    if path.lower().endswith('.json'):
+        with open(path) as f:
+            symbols = [doc['Symbol'] for doc in json.load(f)]
+    else:
+        symbols = pd.read_csv(path, usecols=['Symbol'])['Symbol'].dropna().tolist()
+    return list(dict.fromkeys(yahoo_symbol(symbol) for symbol in symbols if str(symbol).strip()))
+
+
+# Token bucket shared by all workers: at most `rate` provider calls per second, bursts up to `burst`
+class RateLimiter:
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# Append-only record of finished symbols so a rerun skips them
+class Checkpoint:
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.done = {line.strip() for line in f if line.strip()}
+
+    def mark(self, symbol):
+        if not self.path:
+            return
+        with self.lock:
+            self.done.add(symbol)
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(symbol + '\n')
+
+
+# Running totals for the throughput report
+class Metrics:
+
+    def __init__(self, total):
+        self.total = total
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        self.modes = {'full': 0, 'append': 0, 'noop': 0}
+        self.empty = 0
+        self.failed = {}
+        self.bytes = 0
+        self.retries = 0
+
+    @property
+    def finished(self):
+        return sum(self.modes.values()) + len(self.failed)
+
+    def record(self, result):
+        with self.lock:
+            self.modes[result.mode] += 1
+            self.bytes += result.bytes_fetched
+            if result.mode == 'full' and result.rows_fetched == 0:
+                self.empty += 1
+
+    def fail(self, symbol, error):
+        with self.lock:
+            self.failed[symbol] = repr(error)
+
+    def report(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return (f"{self.finished}/{self.total} symbols in {elapsed:.1f}s | "
+                f"{self.finished / elapsed:.2f} symbols/s | {self.bytes / elapsed / 1024:.1f} KiB/s | "
+                f"full={self.modes['full']} append={self.modes['append']} noop={self.modes['noop']} "
+                f"empty={self.empty} failed={len(self.failed)} retries={self.retries}")
+
+
+def _refresh_with_retries(symbol, store, provider, limiter, metrics, retries, backoff):
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        try:
+            return refresh(symbol, store=store, provider=provider)
+        except Exception:
+            if attempt == retries:
+                raise
+            with metrics.lock:
+                metrics.retries += 1
+            # Exponential backoff with jitter so workers do not retry in lockstep
+            time.sleep(backoff * (2 ** attempt) * (1 + random.random()))
+
+
+# Warming the store for every symbol not yet in the checkpoint, `workers` at a time
+def prefetch(symbols, store=None, provider=None, workers=8, rate=5.0, retries=3, backoff=1.0,
+             checkpoint=None, report_every=100):
+    store = store or PriceStore()
+    provider = provider or get_provider()
+    checkpoint = checkpoint or Checkpoint(None)
+
+    pending = [symbol for symbol in symbols if symbol not in checkpoint.done]
+    metrics = Metrics(len(pending))
+    limiter = RateLimiter(rate, burst=max(1, workers))
+    print(f"Prefetching {len(pending)} symbols ({len(symbols) - len(pending)} already checkpointed)")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_refresh_with_retries, symbol, store, provider, limiter, metrics, retries, backoff): symbol
+                   for symbol in pending}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                metrics.record(future.result())
+                checkpoint.mark(symbol)
+            except Exception as error:
+                metrics.fail(symbol, error)
+            if report_every and metrics.finished % report_every == 0:
+                print(metrics.report(), flush=True)
+
+    print(metrics.report())
+    return metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warm the local price store for a whole ticker universe.")
+    parser.add_argument('--symbols-file', default=NASDAQ_CSV,
+                        help="screener CSV with a Symbol column, or the ticker meta JSON dump")
+    parser.add_argument('--symbols', nargs='*', help="explicit symbols (overrides --symbols-file)")
+    parser.add_argument('--limit', type=int, help="only the first N symbols")
+    parser.add_argument('--provider', choices=sorted(PROVIDERS), help="defaults to STONKS_PRICE_PROVIDER / yahoo")
+    parser.add_argument('--files-dir', help="folder of <SYMBOL>.csv files for the file provider")
+    parser.add_argument('--store', help="store directory (defaults to STONKS_PRICE_STORE)")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--rate', type=float, default=5.0, help="max provider calls per second (0 = unlimited)")
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--backoff', type=float, default=1.0, help="base backoff in seconds")
+    parser.add_argument('--checkpoint', default=CHECKPOINT)
+    parser.add_argument('--restart', action='store_true', help="ignore and clear the existing checkpoint")
+    args = parser.parse_args(argv)
+
+    symbols = [yahoo_symbol(symbol) for symbol in args.symbols] if args.symbols else read_symbols(args.symbols_file)
+    if args.limit:
+        symbols = symbols[:args.limit]
+
+    if args.provider == FileProvider.name and args.files_dir:
+        provider = FileProvider.from_directory(args.files_dir)
+    else:
+        provider = get_provider(args.provider)
+    store = PriceStore(args.store) if args.store else PriceStore()
+
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    metrics = prefetch(symbols, store=store, provider=provider, workers=args.workers, rate=args.rate,
+                       retries=args.retries, backoff=args.backoff, checkpoint=Checkpoint(args.checkpoint))
+    for symbol, error in sorted(metrics.failed.items()):
+        print(f"FAILED {symbol}: {error}")
+    return 1 if metrics.failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
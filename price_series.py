@@ -0,0 +1,195 @@
+import argparse
+import json
+import os
+import pickle
+import tracemalloc
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from price_store import (COLUMNS, READ_ATTEMPTS, STORE_DIR, PriceStore, _atomic_save, _remove_stale_files,
+                         _write_meta, _writer_lock, days_index, load_history, to_days)
+
+# Where the compact copies of stored histories are kept so they can be memory-mapped
+COMPACT_DIR = os.environ.get("STONKS_COMPACT_STORE", "data/compact")
+
+# float32 keeps about 7 significant digits: every value is rounded to a relative error under 6e-8.
+# Prices below 2**17 (131,072) stay within 0.4 cent, so they still round to the stored cent; above
+# that the step grows past a cent (3.1 cents at BRK-A's ~500,000, i.e. off by up to 1.6 cents).
+# Volumes above 2**24 (~16.8M shares) are rounded too, e.g. by at most 32 shares on a 500M-share
+# day. forecasting.fingerprint hashes float32 values, so a compact series fingerprints like its source.
+DTYPE = np.float32
+
+
+# One symbol's history in the layout the price store uses, at half the width: an int64
+# epoch-day index and a single C-ordered float32 buffer shaped (len(COLUMNS), rows). The arrays
+# are read-only, so one series (possibly memory-mapped from COMPACT_DIR) can back the frames of
+# every session; to_frame() wraps the buffer without copying it.
+class PriceSeries:
+
+    def __init__(self, symbol, days, values):
+        if values.shape != (len(COLUMNS), len(days)):
+            raise ValueError(f"values shaped {values.shape}, expected {(len(COLUMNS), len(days))}")
+        self.symbol = symbol
+        self.days = days
+        self.values = values
+        for array in (self.days, self.values):
+            if array.flags.writeable:
+                array.flags.writeable = False
+        self.index = days_index(days)
+
+    @classmethod
+    def from_arrays(cls, symbol, days, values):
+        return cls(symbol, np.array(days, dtype='int64'), np.ascontiguousarray(values, dtype=DTYPE))
+
+    @classmethod
+    def from_frame(cls, symbol, frame):
+        return cls.from_arrays(symbol, to_days(frame.index), frame[COLUMNS].to_numpy(dtype='float64').T)
+
+    # The compact copy of a stored symbol, rebuilt whenever the store has been rewritten since.
+    # None when the symbol is not in the store.
+    @classmethod
+    def from_store(cls, store, symbol, root=COMPACT_DIR, mmap=True):
+        source = _source_stamp(store, symbol)
+        if source is None:
+            return None
+        folder = os.path.join(root, os.path.basename(store.path(symbol)))
+        meta = _read_meta(folder)
+        if meta is None or meta['source'] != source:
+            days, values = store.read_arrays(symbol, mmap=True)
+            cls.from_arrays(symbol, days, values).save(folder, source=source)
+        return cls.load(folder, mmap=mmap)
+
+    # <folder>/index.<version>.npy, values.<version>.npy and meta.json naming the version, published
+    # the way the price store publishes a write
+    def save(self, folder, source=None):
+        os.makedirs(folder, exist_ok=True)
+        meta = {'symbol': self.symbol, 'rows': len(self), 'dtype': np.dtype(DTYPE).name,
+                'columns': COLUMNS, 'source': source, 'version': uuid.uuid4().hex[:12]}
+        with _writer_lock(folder):
+            index_path, values_path = _array_paths(folder, meta)
+            _atomic_save(index_path, self.days)
+            _atomic_save(values_path, self.values)
+            _write_meta(folder, meta)
+            _remove_stale_files(folder, meta['version'])
+
+    # mmap=True maps the files read-only, so every process serving the symbol shares the page cache
+    @classmethod
+    def load(cls, folder, mmap=True):
+        mode = 'r' if mmap else None
+        for attempt in range(READ_ATTEMPTS):
+            meta = _read_meta(folder)
+            if meta is None:
+                return None
+            index_path, values_path = _array_paths(folder, meta)
+            try:
+                return cls(meta['symbol'], np.load(index_path, mmap_mode=mode), np.load(values_path, mmap_mode=mode))
+            except FileNotFoundError:
+                if attempt == READ_ATTEMPTS - 1:
+                    raise
+
+    def __len__(self):
+        return len(self.days)
+
+    def column(self, name):
+        return self.values[COLUMNS.index(name)]
+
+    # Bytes of the shared buffers (file-backed when memory-mapped) and the cached DatetimeIndex
+    @property
+    def nbytes(self):
+        return self.days.nbytes + self.values.nbytes + self.index.nbytes
+
+    # The history as the pages expect it. The frame's single float32 block is a view of the
+    # buffer and its index is the series' own, so each call only allocates the frame object.
+    def to_frame(self):
+        return pd.DataFrame(self.values.T, index=self.index, columns=COLUMNS, copy=False)
+
+
+# What the compact copy was built from: the store's row count, last bar and array version (new on
+# every write; the values file's modification time for stores written before versions)
+def _source_stamp(store, symbol):
+    meta = store.meta(symbol)
+    if meta is None:
+        return None
+    version = meta.get('version') or os.stat(store.array_paths(symbol, meta)[1]).st_mtime_ns
+    return [meta['rows'], meta['last_bar'], version]
+
+
+def _array_paths(folder, meta):
+    suffix = f".{meta['version']}" if meta.get('version') else ''
+    return os.path.join(folder, f'index{suffix}.npy'), os.path.join(folder, f'values{suffix}.npy')
+
+
+def _read_meta(folder):
+    meta_path = os.path.join(folder, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        return json.load(f)
+
+
+# Read-through load (price_store.load_history) returning the symbol's compact series
+def load_series(symbol, store=None, provider=None):
+    store = store or PriceStore()
+    ticker_data = load_history(symbol, store=store, provider=provider)
+    return PriceSeries.from_store(store, symbol) or PriceSeries.from_frame(symbol, ticker_data)
+
+
+def _traced_bytes(build, sessions):
+    tracemalloc.start()
+    try:
+        shared = build()
+        held = [shared() for _ in range(sessions)]
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del held
+    return current, peak
+
+
+# Heap held by `sessions` sessions of one symbol: each with its own float64 frame (what the
+# st.cache_data loader handed out, one unpickled copy per call) vs each with a view of a single
+# shared series, in memory or memory-mapped (the mapped buffer is file-backed and not traced)
+def benchmark(store, symbol, sessions=200, root=COMPACT_DIR):
+    frame = store.read(symbol, mmap=False)
+    payload = pickle.dumps(frame)
+    PriceSeries.from_store(store, symbol, root=root)
+
+    results = {
+        'float64 copy per session': _traced_bytes(lambda: (lambda: pickle.loads(payload)), sessions),
+        'shared float32 series': _traced_bytes(
+            lambda: PriceSeries.from_store(store, symbol, root=root, mmap=False).to_frame, sessions),
+        'shared float32 series (mmap)': _traced_bytes(
+            lambda: PriceSeries.from_store(store, symbol, root=root, mmap=True).to_frame, sessions),
+    }
+    series = PriceSeries.from_store(store, symbol, root=root, mmap=False)
+    compact = series.to_frame()
+    price_error = np.nanmax(np.abs(compact[COLUMNS[:-1]].to_numpy('float64') / frame[COLUMNS[:-1]].to_numpy('float64') - 1))
+    volume_error = np.nanmax(np.abs(compact['Volume'].to_numpy('float64') - frame['Volume'].to_numpy('float64')))
+
+    baseline = results['float64 copy per session'][0]
+    print(f"{symbol}: {len(frame):,} rows, {sessions} sessions")
+    for name, (current, peak) in results.items():
+        print(f"  {name:<30} {current / 1e6:8.2f} MB held ({current / sessions / 1e3:7.1f} KB / session, "
+              f"peak {peak / 1e6:.2f} MB)  {baseline / max(current, 1):5.1f}x")
+    print(f"  float32 rounding: prices {price_error:.1e} relative, volume {volume_error:.0f} shares at most")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-session memory of float64 frames vs shared compact series.")
+    parser.add_argument('--symbols', nargs='*', help="stored symbols (default: every symbol in the store)")
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--store', default=STORE_DIR)
+    parser.add_argument('--compact', default=COMPACT_DIR)
+    args = parser.parse_args(argv)
+
+    store = PriceStore(args.store)
+    for symbol in args.symbols or store.symbols():
+        benchmark(store, symbol, args.sessions, root=args.compact)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,420 @@
+import json
+import os
+import re
+import tempfile
+import uuid
+from collections import namedtuple
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers of one symbol are not serialised across processes
+    fcntl = None
+
+# Columns kept for every symbol (same selection load_data always made)
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+
+# Where the per-symbol files live, overridable for deployments with a mounted volume
+STORE_DIR = os.environ.get("STONKS_PRICE_STORE", "data/prices")
+
+# Daily bars exported from Yahoo Finance (MSFT), used to seed the offline provider
+SAMPLE_CSV = "Raw (Extra)/sample_timeseries_data.csv"
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+# Bar dates are stored as int64 day numbers since 1970-01-01; these helpers are the only place
+# that converts between the two, for the store and everything reading its arrays
+def to_days(index):
+    return (index.values.astype('datetime64[D]') - _EPOCH).astype('int64')
+
+
+def days_index(days):
+    return pd.DatetimeIndex((_EPOCH + np.asarray(days).astype('timedelta64[D]')).astype('datetime64[ns]'), name='Date')
+
+
+def day_number(value):
+    return (np.datetime64(pd.Timestamp(value).date(), 'D') - _EPOCH).astype('int64')
+
+
+# Positions [first, stop) of the bars between start and end (inclusive dates, None = open)
+def day_bounds(days, start=None, end=None):
+    first = 0 if start is None else int(np.searchsorted(days, day_number(start), side='left'))
+    stop = len(days) if end is None else int(np.searchsorted(days, day_number(end), side='right'))
+    return first, max(first, stop)
+
+
+# Empty frame with the expected layout, returned when a provider has nothing for a symbol
+def empty_frame():
+    frame = pd.DataFrame(columns=COLUMNS, dtype='float64')
+    frame.index = pd.DatetimeIndex([], name='Date')
+    return frame
+
+
+# Bringing any provider output to the store layout: sorted unique DatetimeIndex + COLUMNS
+def normalise(frame):
+    if frame is None or len(frame) == 0:
+        return empty_frame()
+    frame = frame[COLUMNS].copy()
+    frame.index = pd.DatetimeIndex(frame.index).tz_localize(None).normalize()
+    frame.index.name = 'Date'
+    frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+    return frame
+
+
+# ---------------------------------------------------------------------------
+# Providers
+# ---------------------------------------------------------------------------
+
+# Interface every price source implements; start=None means "the whole history"
+class PriceProvider:
+    name = "base"
+
+    def fetch(self, symbol, start=None):
+        raise NotImplementedError
+
+
+# Live Yahoo Finance source (what load_data used to call directly)
+class YahooProvider(PriceProvider):
+    name = "yahoo"
+
+    def fetch(self, symbol, start=None):
+        if start is None:
+            ticker_data = yf.download(symbol, period='max', progress=False)
+        else:
+            ticker_data = yf.download(symbol, start=pd.Timestamp(start).strftime('%Y-%m-%d'), progress=False)
+        return normalise(ticker_data)
+
+
+# Offline source reading one CSV per symbol (Yahoo export format, dd/mm/yy dates)
+class FileProvider(PriceProvider):
+    name = "file"
+
+    def __init__(self, files=None, date_format='%d/%m/%y'):
+        self.files = files if files is not None else {"MSFT": SAMPLE_CSV}
+        self.date_format = date_format
+
+    # Every <SYMBOL>.csv inside folder, e.g. a local mirror used to dry-run batch jobs
+    @classmethod
+    def from_directory(cls, folder, date_format='%d/%m/%y'):
+        files = {os.path.splitext(name)[0].upper(): os.path.join(folder, name)
+                 for name in os.listdir(folder) if name.lower().endswith('.csv')}
+        return cls(files, date_format=date_format)
+
+    def fetch(self, symbol, start=None):
+        path = self.files.get(symbol)
+        if path is None or not os.path.exists(path):
+            return empty_frame()
+        ticker_data = pd.read_csv(path)
+        ticker_data.index = pd.to_datetime(ticker_data.pop('Date'), format=self.date_format)
+        ticker_data = normalise(ticker_data)
+        if start is not None:
+            ticker_data = ticker_data[ticker_data.index >= pd.Timestamp(start)]
+        return ticker_data
+
+
+# In-memory source for tests and dry runs; records every fetch so callers can assert on deltas
+class MemoryProvider(PriceProvider):
+    name = "memory"
+
+    def __init__(self, frames=None):
+        self.frames = {symbol: normalise(frame) for symbol, frame in (frames or {}).items()}
+        self.calls = []
+
+    def fetch(self, symbol, start=None):
+        self.calls.append((symbol, start))
+        ticker_data = self.frames.get(symbol)
+        if ticker_data is None:
+            return empty_frame()
+        if start is not None:
+            ticker_data = ticker_data[ticker_data.index >= pd.Timestamp(start)]
+        return ticker_data.copy()
+
+
+PROVIDERS = {
+    YahooProvider.name: YahooProvider,
+    FileProvider.name: FileProvider,
+}
+
+
+# Provider picked through STONKS_PRICE_PROVIDER (defaults to live Yahoo data)
+def get_provider(name=None):
+    name = name or os.environ.get("STONKS_PRICE_PROVIDER", YahooProvider.name)
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown price provider '{name}', expected one of {sorted(PROVIDERS)}")
+    return PROVIDERS[name]()
+
+
+# ---------------------------------------------------------------------------
+# On-disk store
+# ---------------------------------------------------------------------------
+
+# One directory per symbol holding:
+#   index.<version>.npy  -> int64 days since epoch, ascending
+#   values.<version>.npy -> float64 array shaped (len(COLUMNS), rows), one contiguous row per column
+#   meta.json            -> symbol, row count, last-bar date and the version of the arrays
+# A write saves both arrays under a new version and then publishes it by replacing meta.json, so
+# readers always get an index and values of the same write. Writers of a symbol take turns on
+# <folder>/.lock; readers never wait (a reader whose version was removed meanwhile follows the
+# new meta.json). Stores written before arrays were versioned keep index.npy / values.npy.
+class PriceStore:
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+
+    def path(self, symbol):
+        safe = symbol.upper().replace('/', '_').replace(os.sep, '_')
+        return os.path.join(self.root, safe)
+
+    def meta(self, symbol):
+        meta_path = os.path.join(self.path(symbol), 'meta.json')
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            return json.load(f)
+
+    def last_bar(self, symbol):
+        meta = self.meta(symbol)
+        if meta is None or meta['last_bar'] is None:
+            return None
+        return pd.Timestamp(meta['last_bar'])
+
+    def symbols(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(entry for entry in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, entry, 'meta.json')))
+
+    def size_bytes(self, symbol):
+        folder = self.path(symbol)
+        if not os.path.isdir(folder):
+            return 0
+        return sum(os.path.getsize(os.path.join(folder, name)) for name in os.listdir(folder))
+
+    # Index and values files of the version meta points at
+    def array_paths(self, symbol, meta):
+        suffix = f".{meta['version']}" if meta.get('version') else ''
+        folder = self.path(symbol)
+        return os.path.join(folder, f'index{suffix}.npy'), os.path.join(folder, f'values{suffix}.npy')
+
+    # Raw arrays, memory-mapped read-only by default so repeated reads share the page cache
+    def read_arrays(self, symbol, mmap=True):
+        mode = 'r' if mmap else None
+        for attempt in range(READ_ATTEMPTS):
+            meta = self.meta(symbol)
+            if meta is None:
+                return None
+            index_path, values_path = self.array_paths(symbol, meta)
+            try:
+                return np.load(index_path, mmap_mode=mode), np.load(values_path, mmap_mode=mode)
+            except FileNotFoundError:
+                # replaced by a newer write since meta.json was read
+                if attempt == READ_ATTEMPTS - 1:
+                    raise
+
+    def read(self, symbol, mmap=True):
+        arrays = self.read_arrays(symbol, mmap=mmap)
+        if arrays is None:
+            return None
+        days, values = arrays
+        frame = pd.DataFrame(np.array(values).T, index=days_index(days), columns=COLUMNS)
+        if not frame['Volume'].isna().any():
+            frame['Volume'] = frame['Volume'].astype('int64')
+        return frame
+
+    def write(self, symbol, frame):
+        frame = normalise(frame)
+        folder = self.path(symbol)
+        os.makedirs(folder, exist_ok=True)
+
+        days = to_days(frame.index)
+        values = np.ascontiguousarray(frame[COLUMNS].to_numpy(dtype='float64').T)
+        meta = {
+            'symbol': symbol.upper(),
+            'rows': int(len(frame)),
+            'first_bar': frame.index[0].strftime('%Y-%m-%d') if len(frame) else None,
+            'last_bar': frame.index[-1].strftime('%Y-%m-%d') if len(frame) else None,
+            'columns': COLUMNS,
+            'refreshed_at': pd.Timestamp.today().strftime('%Y-%m-%d'),
+            'version': uuid.uuid4().hex[:12],
+        }
+
+        with _writer_lock(folder):
+            index_path, values_path = self.array_paths(symbol, meta)
+            _atomic_save(index_path, days)
+            _atomic_save(values_path, values)
+            _write_meta(folder, meta)
+            _remove_stale_files(folder, meta['version'])
+        return meta
+
+    # Recording that the symbol was checked against the provider today, without touching the bars
+    def mark_refreshed(self, symbol):
+        folder = self.path(symbol)
+        if self.meta(symbol) is None:
+            return None
+        with _writer_lock(folder):
+            meta = self.meta(symbol)
+            meta['refreshed_at'] = pd.Timestamp.today().strftime('%Y-%m-%d')
+            _write_meta(folder, meta)
+        return meta
+
+
+# Times a reader re-reads meta.json when the version it pointed at was removed under it
+READ_ATTEMPTS = 5
+
+_ARRAY_FILE = re.compile(r'(index|values)(\.[0-9a-f]+)?\.npy$')
+
+
+@contextmanager
+def _writer_lock(folder):
+    with open(os.path.join(folder, '.lock'), 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+# Array files of other versions and temp files of crashed writes (called under the writer lock)
+def _remove_stale_files(folder, version):
+    keep = {f'index.{version}.npy', f'values.{version}.npy'}
+    for name in os.listdir(folder):
+        if name not in keep and (_ARRAY_FILE.match(name) or name.endswith('.tmp')):
+            try:
+                os.remove(os.path.join(folder, name))
+            except OSError:
+                pass
+
+
+# Writing to a uniquely named temp file next to path and renaming it into place
+def _atomic_write(path, write, mode='wb'):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _atomic_save(path, array):
+    _atomic_write(path, lambda f: np.save(f, array))
+
+
+# meta.json replaced atomically; the store writes it last, so readers never see half a write
+def _write_meta(folder, meta):
+    _atomic_write(os.path.join(folder, 'meta.json'), lambda f: json.dump(meta, f), mode='w')
+
+
+# ---------------------------------------------------------------------------
+# Incremental refresh
+# ---------------------------------------------------------------------------
+
+# mode is one of 'full' (history rewritten), 'append' (new bars added) or 'noop' (already up to date)
+RefreshResult = namedtuple('RefreshResult', ['symbol', 'mode', 'reason', 'rows_added', 'rows_fetched', 'bytes_fetched'])
+
+# Bars re-requested before the last stored date, used to detect split / dividend revisions
+OVERLAP_BARS = 5
+
+# Business days that may be missing between two bars before we call it a gap (holidays, market closures)
+MAX_MISSING_BDAYS = 3
+
+
+# Pairs of consecutive bars separated by more than max_missing business days
+def find_gaps(index, max_missing=MAX_MISSING_BDAYS):
+    if len(index) < 2:
+        return []
+    days = index.values.astype('datetime64[D]')
+    missing = np.busday_count(days[:-1], days[1:]) - 1
+    positions = np.flatnonzero(missing > max_missing)
+    return [(index[i], index[i + 1]) for i in positions]
+
+
+# Overlapping bars whose Close / Adj Close no longer match what we stored (adjustments after splits or dividends)
+def find_revisions(stored, fetched, rtol=1e-6):
+    common = stored.index.intersection(fetched.index)
+    old = stored.loc[common, ['Close', 'Adj Close']].to_numpy(dtype='float64')
+    new = fetched.loc[common, ['Close', 'Adj Close']].to_numpy(dtype='float64')
+    changed = ~np.isclose(old, new, rtol=rtol, equal_nan=True).all(axis=1)
+    return common[changed]
+
+
+def _full_refresh(symbol, store, provider, reason):
+    ticker_data = provider.fetch(symbol)
+    if len(ticker_data):
+        store.write(symbol, ticker_data)
+    return RefreshResult(symbol, 'full', reason, len(ticker_data), len(ticker_data),
+                         int(ticker_data.memory_usage(index=True).sum()))
+
+
+# Bringing one stored symbol up to date by fetching only the bars after the overlap window.
+# Anything that makes the delta untrustworthy (no stored copy, no overlap, revised closes,
+# missing trading days) falls back to a full rewrite of that symbol alone.
+def refresh(symbol, store=None, provider=None, overlap=OVERLAP_BARS, max_missing=MAX_MISSING_BDAYS):
+    store = store or PriceStore()
+    provider = provider or get_provider()
+
+    stored = store.read(symbol)
+    if stored is None or len(stored) == 0:
+        return _full_refresh(symbol, store, provider, 'not stored')
+
+    last_bar = stored.index[-1]
+    overlap_start = stored.index[max(0, len(stored) - overlap)]
+    fetched = provider.fetch(symbol, start=overlap_start)
+    bytes_fetched = int(fetched.memory_usage(index=True).sum())
+
+    if len(fetched) == 0:
+        store.mark_refreshed(symbol)
+        return RefreshResult(symbol, 'noop', 'provider returned no bars', 0, 0, bytes_fetched)
+
+    if len(stored.index.intersection(fetched.index)) == 0:
+        return _full_refresh(symbol, store, provider, 'no overlap with stored history')
+
+    revised = find_revisions(stored, fetched)
+    if len(revised):
+        return _full_refresh(symbol, store, provider, f'{len(revised)} revised bars since {revised[0].date()}')
+
+    new_bars = fetched[fetched.index > last_bar]
+    if len(new_bars) == 0:
+        store.mark_refreshed(symbol)
+        return RefreshResult(symbol, 'noop', 'up to date', 0, len(fetched), bytes_fetched)
+
+    gaps = find_gaps(stored.index[-1:].append(new_bars.index), max_missing=max_missing)
+    if gaps:
+        return _full_refresh(symbol, store, provider, f'gap between {gaps[0][0].date()} and {gaps[0][1].date()}')
+
+    store.write(symbol, pd.concat([stored, new_bars]))
+    return RefreshResult(symbol, 'append', 'new bars', len(new_bars), len(fetched), bytes_fetched)
+
+
+# True when the last stored bar is older than the last completed business day and
+# the symbol has not already been checked against the provider today
+def is_stale(symbol, store):
+    meta = store.meta(symbol)
+    if meta is None or meta['last_bar'] is None:
+        return True
+    if meta.get('refreshed_at') == pd.Timestamp.today().strftime('%Y-%m-%d'):
+        return False
+    expected = pd.Timestamp.today().normalize() - pd.offsets.BDay(1)
+    return pd.Timestamp(meta['last_bar']) < expected
+
+
+# Read-through load: local store first, the provider only for a first load or a stale delta
+def load_history(symbol, store=None, provider=None, refresh_stale=True):
+    store = store or PriceStore()
+    provider = provider or get_provider()
+
+    if store.meta(symbol) is None or (refresh_stale and is_stale(symbol, store)):
+        refresh(symbol, store=store, provider=provider)
+
+    ticker_data = store.read(symbol)
+    if ticker_data is None:
+        return empty_frame()
+    return ticker_data
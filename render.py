@@ -0,0 +1,55 @@
+import time
+from collections import OrderedDict, namedtuple
+
+import pandas as pd
+import streamlit as st
+
+# How an analysis' compute function is cached: not at all (it draws widgets, or is cheap), as data
+# (st.cache_data, result copied per call), or as a shared object (st.cache_resource)
+CACHE_POLICIES = {
+    None: lambda compute: compute,
+    'data': st.cache_data,
+    'resource': st.cache_resource,
+}
+
+# One analysis a page can show: its compute function (returning a figure or a tuple of figures),
+# the names of the page inputs it takes, its cache policy and the options passed to st.plotly_chart
+Analysis = namedtuple('Analysis', ['key', 'compute', 'inputs', 'cache', 'chart'])
+
+
+# The analyses of one page. Pages register them once at import time and then only call show()
+# for what is on screen, so a rerun computes the visible analyses and nothing else; each show()
+# is timed for the per-rerun report.
+class PlotRegistry:
+
+    def __init__(self):
+        self.analyses = OrderedDict()
+        self.timings = []
+
+    def register(self, key, inputs=('hist',), cache=None, **chart):
+        if cache not in CACHE_POLICIES:
+            raise ValueError(f"Unknown cache policy {cache!r}, expected one of {sorted(map(str, CACHE_POLICIES))}")
+
+        def decorator(compute):
+            self.analyses[key] = Analysis(key, CACHE_POLICIES[cache](compute), tuple(inputs), cache, chart)
+            return compute
+        return decorator
+
+    # Computing one analysis from the page inputs (a dict by input name) and drawing its figures
+    def show(self, key, inputs):
+        analysis = self.analyses[key]
+        started = time.perf_counter()
+        figures = analysis.compute(*[inputs[name] for name in analysis.inputs])
+        computed = time.perf_counter()
+        for figure in figures if isinstance(figures, (list, tuple)) else [figures]:
+            st.plotly_chart(figure, **analysis.chart)
+        self.timings.append((key, analysis.cache or '-', computed - started, time.perf_counter() - computed))
+
+    def report(self, container=None):
+        container = container or st.sidebar
+        timings = pd.DataFrame(self.timings, columns=['analysis', 'cache', 'compute (ms)', 'draw (ms)'])
+        timings[['compute (ms)', 'draw (ms)']] *= 1000
+        with container.expander('Render timings'):
+            st.caption(f"{len(timings)} of {len(self.analyses)} analyses rendered in "
+                       f"{timings[['compute (ms)', 'draw (ms)']].to_numpy().sum():.0f}ms this rerun")
+            st.dataframe(timings.round(1))
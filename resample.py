@@ -0,0 +1,31 @@
+import numpy as np
+
+# How each column combines into a longer bar
+AGGREGATION = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Adj Close': 'last', 'Volume': 'sum'}
+
+# Bar sizes from finest to coarsest, with the rough number of trading days each one spans
+GRANULARITIES = [('W-FRI', 'Weekly', 5), ('M', 'Monthly', 21), ('Q', 'Quarterly', 63)]
+
+# Most bars a grouped bar chart stays readable with
+MAX_BARS = 250
+
+
+# OHLCV bars per calendar period (weekly bars end on Friday), each labelled with its first trading day.
+# Partial periods at either end of the history are kept as they are.
+def resample_ohlcv(frame, freq):
+    columns = {column: how for column, how in AGGREGATION.items() if column in frame.columns}
+    periods = frame.index.to_period(freq)
+    bars = frame.groupby(periods, sort=True).agg(columns)
+    bars.index = frame.index[np.unique(periods.asi8, return_index=True)[1]]
+    return bars.dropna(subset=['Close']) if 'Close' in bars.columns else bars
+
+
+# Finest granularity that keeps a range of daily bars within max_bars: None (daily) when the range
+# already fits, otherwise (freq, label) of the first one that does, or the coarsest one
+def choose_granularity(n_days, max_bars=MAX_BARS):
+    if n_days <= max_bars:
+        return None
+    for freq, label, days in GRANULARITIES:
+        if n_days / days <= max_bars:
+            return freq, label
+    return GRANULARITIES[-1][:2]
@@ -0,0 +1,81 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from price_store import COLUMNS, day_bounds, days_index, to_days
+
+# Rows per page offered by the overview table
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+# Bytes of a frame as Streamlit ships it to the browser (an Arrow IPC stream)
+def payload_bytes(frame):
+    table = pa.Table.from_pandas(frame, preserve_index=True)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().size
+
+
+# Server side of the overview page's price table: sorting, date filtering and paging happen over
+# the stored arrays (memory-mapped when they come from the price store), and only the rows of the
+# requested page are turned into a DataFrame. Sort orders are computed once per column/direction.
+class PagedTable:
+
+    def __init__(self, days, values):
+        self.days = days
+        self.values = values
+        self.orders = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_store(cls, store, symbol):
+        arrays = store.read_arrays(symbol, mmap=True)
+        return None if arrays is None else cls(*arrays)
+
+    @classmethod
+    def from_frame(cls, frame):
+        return cls(to_days(frame.index), np.ascontiguousarray(frame[COLUMNS].to_numpy(dtype='float64').T))
+
+    def __len__(self):
+        return len(self.days)
+
+    # Row positions in sorted order; 'Date' is the stored order, NaNs sort last either way
+    def order(self, column='Date', descending=False):
+        key = (column, descending)
+        with self.lock:
+            if key in self.orders:
+                return self.orders[key]
+        if column == 'Date':
+            positions = np.arange(len(self.days))
+        else:
+            values = np.asarray(self.values[COLUMNS.index(column)])
+            positions = np.argsort(-values if descending else values, kind='stable')
+        if column == 'Date' and descending:
+            positions = positions[::-1]
+        with self.lock:
+            self.orders[key] = positions
+        return positions
+
+    # Positions [first, stop) of the rows between start and end (inclusive dates, None = open)
+    def bounds(self, start=None, end=None):
+        return day_bounds(self.days, start, end)
+
+    def count(self, start=None, end=None):
+        first, stop = self.bounds(start, end)
+        return stop - first
+
+    # One page of the rows between start and end sorted by column, as a DataFrame
+    def page(self, number=0, size=PAGE_SIZES[0], column='Date', descending=False, start=None, end=None):
+        first, stop = self.bounds(start, end)
+        positions = self.order(column, descending)
+        if first > 0 or stop < len(self.days):
+            positions = positions[(positions >= first) & (positions < stop)]
+        rows = positions[number * size:(number + 1) * size]
+
+        frame = pd.DataFrame(np.asarray(self.values[:, rows]).T, index=days_index(self.days[rows]), columns=COLUMNS)
+        if not frame['Volume'].isna().any():
+            frame['Volume'] = frame['Volume'].astype('int64')
+        return frame
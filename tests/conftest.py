@@ -0,0 +1,21 @@
+import os
+import sys
+import types
+
+import pytest
+
+# The app's modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# Streamlit runs each page as __main__ with __file__ pointing at the page; a spawned worker that
+# re-imported it would fail the way a real page does outside a session
+@pytest.fixture
+def streamlit_main(monkeypatch, tmp_path):
+    page = tmp_path / '3_Fake_Page.py'
+    page.write_text("raise AttributeError('st.session_state has no attribute \"data_symbol\"')\n")
+    main = types.ModuleType('__main__')
+    main.__file__ = str(page)
+    main.__spec__ = None
+    monkeypatch.setitem(sys.modules, '__main__', main)
+    return main
@@ -0,0 +1,13 @@
+import numpy as np
+
+from backtest import backtest
+from baselines import BASELINES
+
+
+def test_parallel_backtest_from_streamlit_like_main(streamlit_main):
+    series = 100 + np.cumsum(np.random.default_rng(1).normal(size=300))
+    prototype = BASELINES[0]()
+    sequential = backtest(series, prototype=prototype, horizon=5, max_folds=40, workers=1)
+    parallel = backtest(series, prototype=prototype, horizon=5, max_folds=40, workers=2)
+    np.testing.assert_allclose(parallel.forecasts, sequential.forecasts)
+    assert parallel.summary['folds'] == 40
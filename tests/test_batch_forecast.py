@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from batch_forecast import (PARTS_DIR, forecast_symbol, has_part, load_predictions, load_summary, merge_parts, run,
+                            write_part)
+from forecasting import ARIMA_PARAMS, fingerprint, forecast_split, model_symbol
+from model_registry import ModelRegistry
+from price_store import PriceStore
+
+
+def make_result(symbol, mae):
+    summary = {'symbol': symbol, 'order': '(1, 1, 1)', 'mae': mae, 'computed_at': pd.Timestamp('2024-01-02')}
+    predictions = pd.DataFrame({'symbol': symbol, 'Date': pd.bdate_range('2024-01-01', periods=3),
+                                'actual': [1.0, 2.0, 3.0], 'predicted': [1.5, 2.5, mae]})
+    return summary, predictions
+
+
+def test_parts_are_merged_into_the_result_tables(tmp_path):
+    results_dir = str(tmp_path)
+    write_part(*make_result('AAA', 1.0), results_dir)
+    write_part(*make_result('BBB', 2.0), results_dir)
+    assert has_part('AAA', results_dir) and load_summary('AAA', results_dir) is None
+
+    assert merge_parts(results_dir) == 2
+    assert load_summary('AAA', results_dir)['mae'] == 1.0
+    assert load_predictions('BBB', results_dir)['predicted'].tolist() == [1.5, 2.5, 2.0]
+    assert os.listdir(tmp_path / PARTS_DIR) == []
+    assert merge_parts(results_dir) == 0
+
+    # a later part replaces the symbol's rows and keeps every other symbol's
+    write_part(*make_result('AAA', 3.0), results_dir)
+    merge_parts(results_dir)
+    assert load_summary('AAA', results_dir)['mae'] == 3.0
+    assert len(load_predictions('AAA', results_dir)) == 3
+    assert load_summary('BBB', results_dir)['mae'] == 2.0
+
+
+def test_resumed_run_skips_finished_symbols_and_merges_their_parts(tmp_path):
+    # parts left behind by an interrupted run: nothing is recomputed, everything is merged
+    results_dir = str(tmp_path)
+    write_part(*make_result('AAA', 1.0), results_dir)
+    write_part(*make_result('BBB', 2.0), results_dir)
+
+    summaries, failed = run(['AAA', 'BBB'], workers=1, results_dir=results_dir, resume=True)
+    assert (summaries, failed) == ([], {})
+    assert load_summary('AAA', results_dir)['mae'] == 1.0
+    assert load_summary('BBB', results_dir)['mae'] == 2.0
+
+
+def test_batch_model_is_the_one_the_page_looks_up(tmp_path):
+    index = pd.bdate_range('2022-01-03', periods=120, name='Date')
+    close = 100 + np.cumsum(np.random.default_rng(4).normal(size=len(index)))
+    close[[10, 50]] = np.nan
+    history = pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                            'Adj Close': close, 'Volume': 1000}, index=index)
+    PriceStore(str(tmp_path / 'prices')).write('BRK-A', history)
+    params = dict(ARIMA_PARAMS, seasonal=False, max_p=1, max_q=1)
+
+    # the batch job gets Yahoo symbols, the page the ticker metadata's
+    summary, _ = forecast_symbol('BRK-A', store_root=str(tmp_path / 'prices'), model_dir=str(tmp_path / 'models'),
+                                 params=params)
+    train_close, test_close = forecast_split(history['Close'])
+    assert (summary['n_train'], summary['n_test']) == (len(train_close), len(test_close))
+    registry = ModelRegistry(str(tmp_path / 'models'))
+    assert registry.get(model_symbol('BRK/A'), fingerprint(train_close.to_numpy()), params) is not None
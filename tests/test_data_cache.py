@@ -0,0 +1,53 @@
+import gc
+
+import numpy as np
+import pandas as pd
+
+from data_cache import DataCache
+from price_series import PriceSeries
+from price_store import COLUMNS
+
+
+def load(symbol, rows=100):
+    index = pd.bdate_range('2024-01-01', periods=rows, name='Date')
+    return PriceSeries.from_frame(symbol, pd.DataFrame(np.ones((rows, len(COLUMNS))), index=index, columns=COLUMNS))
+
+
+def test_least_recently_used_symbol_is_evicted_first():
+    cache = DataCache(load, max_entries=2)
+    cache.get('AAA')
+    cache.get('BBB')
+    cache.get('AAA')
+    cache.get('CCC')
+    assert ('AAA' in cache, 'BBB' in cache, 'CCC' in cache) == (True, False, True)
+    assert cache.stats()['evictions'] == 1
+
+
+def test_leased_symbols_survive_eviction_until_their_leases_are_dropped():
+    cache = DataCache(load, max_entries=1)
+    leases = [cache.lease('AAA'), cache.lease('AAA')]
+    assert cache.refs('AAA') == 2
+    cache.get('BBB')
+    # over the limit, but AAA is held by two sessions
+    assert 'AAA' in cache and 'BBB' not in cache
+
+    leases.pop()
+    gc.collect()
+    assert cache.refs('AAA') == 1
+    assert cache.evict(unused=True) == 0
+
+    leases.clear()
+    gc.collect()
+    assert cache.refs('AAA') == 0
+    assert cache.evict() == 0  # within max_entries again
+    assert cache.evict(unused=True) == 1
+    assert 'AAA' not in cache
+
+
+def test_byte_limit_counts_the_shared_series():
+    one = load('AAA').nbytes
+    cache = DataCache(load, max_bytes=2 * one)
+    for symbol in ['AAA', 'BBB', 'CCC']:
+        cache.get(symbol)
+    assert cache.stats()['bytes'] <= 2 * one
+    assert 'AAA' not in cache
@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+from dataset import dataset_handle
+
+
+def make_frame(n=50):
+    close = np.linspace(100, 150, n)
+    return pd.DataFrame({'Close': close, 'Volume': np.arange(n) * 1000},
+                        index=pd.date_range('2021-01-01', periods=n, freq='B'))
+
+
+def test_same_content_same_handle():
+    assert dataset_handle('TEST', make_frame()) == dataset_handle('TEST', make_frame())
+
+
+def test_revised_older_bar_changes_handle():
+    frame = make_frame()
+    revised = frame.copy()
+    revised.iloc[3, 0] *= 0.5  # a split adjustment rewriting an old close
+    before, after = dataset_handle('TEST', frame), dataset_handle('TEST', revised)
+    assert before[:4] == after[:4]
+    assert before != after
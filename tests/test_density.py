@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from scipy.stats import gaussian_kde
+
+from density import binned_kde, linear_binning, max_relative_error, scott_bandwidth
+
+
+def random_walk(size, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size)) / np.sqrt(size / 7500))
+
+
+def bimodal(size, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.concatenate([rng.normal(20, 2, size // 2), rng.normal(60, 8, size - size // 2)])
+
+
+def test_bandwidth_matches_scipy():
+    values = random_walk(5_000)
+    assert scott_bandwidth(values) == pytest.approx(np.sqrt(gaussian_kde(values).covariance[0, 0]), rel=1e-12)
+
+
+def test_linear_binning_keeps_every_sample():
+    values = random_walk(2_000)
+    weights = linear_binning(values, values.min(), values.max(), 100)
+    assert weights.sum() == pytest.approx(len(values))
+    assert weights.min() >= 0
+
+
+@pytest.mark.parametrize('values', [random_walk(10_000), random_walk(50_000, seed=1), bimodal(20_000)],
+                         ids=['random walk', 'long random walk', 'bimodal'])
+def test_error_against_exact_kde_is_bounded(values):
+    assert max_relative_error(values) < 1e-3
+
+
+def test_tails_match_exact_kde():
+    values = bimodal(20_000)
+    x, density = binned_kde(values)
+    exact = gaussian_kde(values)(x)
+    peak = exact.max()
+    for tail in (slice(0, 25), slice(-25, None)):
+        np.testing.assert_allclose(density[tail], exact[tail], atol=1e-3 * peak)
+    assert density.min() >= 0
+
+
+def test_nans_are_dropped():
+    values = random_walk(3_000)
+    with_nans = np.concatenate([values, [np.nan] * 10])
+    np.testing.assert_array_equal(binned_kde(with_nans)[1], binned_kde(values)[1])
+
+
+def test_constant_values_have_no_density():
+    with pytest.raises(ValueError):
+        binned_kde(np.full(10, 5.0))
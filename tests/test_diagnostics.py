@@ -0,0 +1,60 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import diagnostics
+from diagnostics import DiagnosticsCache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setitem(diagnostics.DIAGNOSTICS, 'mean', lambda close: float(np.mean(close)))
+    monkeypatch.setitem(diagnostics.DIAGNOSTICS, 'last', lambda close: float(close.iloc[-1]))
+    return DiagnosticsCache(str(tmp_path), memory_entries=0)
+
+
+def close_prices(seed, n=50):
+    return pd.Series(100 + np.random.default_rng(seed).normal(size=n).cumsum())
+
+
+def test_results_share_the_fingerprint_folder_and_are_read_back(cache, tmp_path):
+    close = close_prices(1)
+    mean, last = cache.get('ABC', close, 'mean'), cache.get('ABC', close, 'last')
+    assert (cache.get('ABC', close, 'mean'), cache.get('ABC', close, 'last')) == (mean, last)
+    assert (cache.hits, cache.misses) == (2, 2)
+
+    folders = os.listdir(tmp_path / 'ABC')
+    assert len(folders) == 1
+    assert sorted(os.listdir(tmp_path / 'ABC' / folders[0])) == ['last.pkl', 'mean.pkl']
+
+
+def test_new_fingerprint_replaces_the_old_folder(cache, tmp_path):
+    cache.get('ABC', close_prices(1), 'mean')
+    old = os.listdir(tmp_path / 'ABC')
+    cache.get('ABC', close_prices(2), 'mean')
+    new = os.listdir(tmp_path / 'ABC')
+    assert len(new) == 1 and new != old
+
+
+def test_concurrent_writers_never_fail_or_leave_temp_folders(cache, tmp_path):
+    series = [close_prices(seed) for seed in range(4)]
+    errors = []
+
+    def work(close):
+        try:
+            for _ in range(20):
+                for name in ('mean', 'last'):
+                    assert cache.get('ABC', close, name) == diagnostics.DIAGNOSTICS[name](close)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=work, args=(close,)) for close in series]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert not [entry for entry in os.listdir(tmp_path / 'ABC') if entry.startswith('.')]
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from downsample import minmax
+from resample import MAX_BARS, resample_ohlcv
+
+
+def quarterly_bars(years=80, seed=0):
+    index = pd.bdate_range('1940-01-01', periods=years * 252, name='Date')
+    close = 50 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.01, len(index))))
+    daily = pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+                          'Volume': 1000}, index=index)
+    return resample_ohlcv(daily, 'Q')
+
+
+def test_minmax_thins_long_bar_histories_to_max_bars():
+    bars = quarterly_bars()
+    assert len(bars) > MAX_BARS
+    kept = minmax(bars, MAX_BARS)
+    assert len(kept) <= MAX_BARS
+    assert kept.index.is_monotonic_increasing
+    assert kept['High'].max() == bars['High'].max()
+    assert kept['Low'].min() == bars['Low'].min()
+
+
+def test_minmax_keeps_every_bar_that_fits():
+    bars = quarterly_bars(years=20)
+    pd.testing.assert_frame_equal(minmax(bars, MAX_BARS), bars)
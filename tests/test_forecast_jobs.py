@@ -0,0 +1,42 @@
+import sys
+
+import numpy as np
+
+from forecast_jobs import ForecastJobs
+from forecasting import ARIMA_PARAMS, fingerprint
+from model_registry import ModelRegistry
+
+SMALL_SEARCH = dict(ARIMA_PARAMS, seasonal=False, max_p=1, max_q=1)
+
+
+def test_uncached_fit_from_streamlit_like_main(streamlit_main, tmp_path):
+    values = 100 + np.cumsum(np.random.default_rng(0).normal(size=150))
+    jobs = ForecastJobs(max_workers=1, registry=ModelRegistry(str(tmp_path / 'models')))
+    try:
+        job_id = jobs.submit('TEST', values, SMALL_SEARCH)
+        assert sys.modules['__main__'] is streamlit_main
+        model = jobs.result(job_id, timeout=300)
+        assert jobs.get(job_id).mode == 'full'
+        assert len(model.predict(5)) == 5
+    finally:
+        jobs.pool.shutdown()
+
+
+def test_registry_lookup_runs_outside_the_job_lock(tmp_path):
+    values = 100 + np.cumsum(np.random.default_rng(1).normal(size=150))
+    registry = ModelRegistry(str(tmp_path / 'models'))
+    jobs = ForecastJobs(max_workers=1, registry=registry)
+    try:
+        registry.put('TEST', fingerprint(values), SMALL_SEARCH, 'fitted model', n_train=len(values))
+        lookup = registry.get
+
+        def get(*args):
+            assert not jobs.lock.locked()
+            return lookup(*args)
+
+        registry.get = get
+        job_id = jobs.submit('TEST', values, SMALL_SEARCH)
+        assert jobs.submit('TEST', values, SMALL_SEARCH) == job_id
+        assert (jobs.result(job_id), jobs.get(job_id).mode) == ('fitted model', 'cached')
+    finally:
+        jobs.pool.shutdown()
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from forecasting import (ARIMA_PARAMS, FULL_SEARCH_EVERY_DAYS, MAX_WARM_UPDATES, fit_autoarima, full_search_due,
+                         refresh_model)
+
+SMALL_SEARCH = dict(ARIMA_PARAMS, seasonal=False, m=1, max_p=1, max_q=1)
+
+
+def random_walk(n, seed=0):
+    return 100 + np.cumsum(np.random.default_rng(seed).normal(size=n))
+
+
+def test_without_a_base_model_the_full_search_runs():
+    model, mode = refresh_model(random_walk(150), SMALL_SEARCH)
+    assert mode == 'full'
+    assert model.arima_res_.nobs == 150
+
+
+def test_new_bars_in_line_with_the_model_warm_update_it():
+    values = random_walk(160)
+    base = fit_autoarima(values[:150], SMALL_SEARCH)
+    order = base.order
+    model, mode = refresh_model(values, SMALL_SEARCH, base_model=base, n_base=150)
+    assert mode == 'update'
+    assert model is base and model.order == order
+    assert model.arima_res_.nobs == 160
+
+
+def test_new_bars_far_off_the_model_fall_back_to_a_full_search():
+    values = random_walk(160)
+    values[150:] += 500  # a jump far beyond the recent one-step errors
+    base = fit_autoarima(values[:150], SMALL_SEARCH)
+    model, mode = refresh_model(values, SMALL_SEARCH, base_model=base, n_base=150)
+    assert mode == 'full (degraded)'
+    assert model is not base and model.arima_res_.nobs == 160
+
+
+@pytest.mark.parametrize('age_days, updates, due', [(1, 0, False), (FULL_SEARCH_EVERY_DAYS + 1, 0, True),
+                                                    (1, MAX_WARM_UPDATES, True)])
+def test_full_search_schedule(age_days, updates, due):
+    now = 1_700_000_000
+    latest = {'full_fit_at': now - age_days * 86400, 'updates': updates}
+    assert full_search_due(latest, now) is due
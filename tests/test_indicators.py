@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from indicators import Indicators
+
+
+def make_frame(n=300):
+    close = 100 + np.cumsum(np.random.default_rng(2).normal(size=n))
+    return pd.DataFrame({'Close': close, 'High': close + 1, 'Low': close - 1},
+                        index=pd.date_range('2020-01-01', periods=n, freq='B'))
+
+
+def test_rolling_accepts_a_list_of_windows():
+    frame = make_frame()
+    indicators = Indicators(frame)
+    rolling = indicators.rolling([12, 30])
+    assert list(rolling.columns) == ['mean_12', 'mean_30', 'std_12', 'std_30']
+    for window in (12, 30):
+        expected = frame['Close'].rolling(window)
+        np.testing.assert_allclose(rolling[f'mean_{window}'], expected.mean(), rtol=1e-9)
+        np.testing.assert_allclose(rolling[f'std_{window}'], expected.std(), rtol=1e-7)
+
+
+def test_rolling_list_and_tuple_share_one_memo_entry():
+    indicators = Indicators(make_frame())
+    first = indicators.rolling([12, 30])
+    assert indicators.rolling((12, 30)) is first
+    assert indicators.rolling(np.array([12, 30])) is first
+    assert indicators.hits == 2
+    assert not first['mean_12'].to_numpy().flags.writeable
+
+
+# Wilder's smoothing as usually written: the first average is the mean of the first `window`
+# values, each later one (previous * (window - 1) + value) / window
+def wilder_reference(values, window):
+    out = np.full(len(values), np.nan)
+    out[window - 1] = values[:window].mean()
+    for t in range(window, len(values)):
+        out[t] = (out[t - 1] * (window - 1) + values[t]) / window
+    return out
+
+
+def test_rsi_seeds_wilder_smoothing_with_the_first_window_mean():
+    frame = make_frame()
+    change = np.diff(frame['Close'].to_numpy())
+    gains = wilder_reference(np.clip(change, 0, None), 14)
+    losses = wilder_reference(np.clip(-change, 0, None), 14)
+    expected = np.concatenate([[np.nan], 100 - 100 / (1 + gains / losses)])
+    rsi = Indicators(frame).rsi(14)
+    assert rsi.iloc[:14].isna().all()
+    np.testing.assert_allclose(rsi, expected, rtol=1e-9)
+
+
+def test_atr_seeds_wilder_smoothing_with_the_first_window_mean():
+    frame = make_frame()
+    previous = frame['Close'].shift()
+    true_range = np.fmax(frame['High'] - frame['Low'],
+                         np.fmax((frame['High'] - previous).abs(), (frame['Low'] - previous).abs()))
+    atr = Indicators(frame).atr(14)
+    assert atr.iloc[:13].isna().all()
+    np.testing.assert_allclose(atr, wilder_reference(true_range.to_numpy(), 14), rtol=1e-9)
@@ -0,0 +1,56 @@
+import os
+
+from forecasting import ARIMA_PARAMS
+from model_registry import ModelRegistry, model_key
+
+
+def stored_at(registry, symbol, mtime):
+    key = registry.put(symbol, f'{symbol}-fingerprint', ARIMA_PARAMS, f'{symbol} model', n_train=100)
+    os.utime(registry.path(key), (mtime, mtime))
+    return key
+
+
+def test_least_recently_used_model_is_evicted_first(tmp_path):
+    registry = ModelRegistry(str(tmp_path), max_models=2)
+    stored_at(registry, 'AAA', 1_000)
+    stored_at(registry, 'BBB', 2_000)
+    # reading AAA makes it the most recently used one
+    assert registry.get('AAA', 'AAA-fingerprint', ARIMA_PARAMS) == 'AAA model'
+    registry.put('CCC', 'CCC-fingerprint', ARIMA_PARAMS, 'CCC model', n_train=100)
+
+    assert registry.get('BBB', 'BBB-fingerprint', ARIMA_PARAMS) is None
+    assert registry.get('AAA', 'AAA-fingerprint', ARIMA_PARAMS) == 'AAA model'
+    assert registry.get('CCC', 'CCC-fingerprint', ARIMA_PARAMS) == 'CCC model'
+    stats = registry.stats()
+    assert (stats['models'], stats['evictions']) == (2, 1)
+    # latest-model pointers are not models and are never evicted
+    assert registry.latest('BBB', ARIMA_PARAMS)['key'] == model_key('BBB', 'BBB-fingerprint', ARIMA_PARAMS)
+
+
+def test_byte_limit_evicts_oldest_models(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    for mtime, symbol in enumerate(['AAA', 'BBB', 'CCC'], start=1):
+        stored_at(registry, symbol, mtime * 1_000)
+    registry.max_bytes = registry.stats()['bytes'] - 1
+    assert registry.evict() == 1
+    assert registry.get('AAA', 'AAA-fingerprint', ARIMA_PARAMS) is None
+    assert registry.get('BBB', 'BBB-fingerprint', ARIMA_PARAMS) == 'BBB model'
+
+
+def test_latest_pointer_counts_warm_updates_since_the_last_full_search(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    assert registry.latest('AAA', ARIMA_PARAMS) is None
+
+    registry.put('AAA', 'fp-1', ARIMA_PARAMS, 'full model', n_train=100)
+    first = registry.latest('AAA', ARIMA_PARAMS)
+    assert (first['key'], first['n_train'], first['updates']) == (model_key('AAA', 'fp-1', ARIMA_PARAMS), 100, 0)
+
+    registry.put('AAA', 'fp-2', ARIMA_PARAMS, 'updated model', n_train=101, mode='update')
+    second = registry.latest('AAA', ARIMA_PARAMS)
+    assert (second['fingerprint'], second['n_train'], second['updates']) == ('fp-2', 101, 1)
+    assert second['full_fit_at'] == first['full_fit_at']
+    assert registry.get_entry(second['key'])['model'] == 'updated model'
+
+    registry.put('AAA', 'fp-3', ARIMA_PARAMS, 'degraded model', n_train=102, mode='full (degraded)')
+    third = registry.latest('AAA', ARIMA_PARAMS)
+    assert third['updates'] == 0 and third['full_fit_at'] > first['full_fit_at']
@@ -0,0 +1,55 @@
+import numpy as np
+import pmdarima
+import pytest
+
+import order_search
+import worker_pool
+from forecasting import ARIMA_PARAMS, fit_autoarima
+from model_registry import model_key
+
+SMALL_SEARCH = dict(ARIMA_PARAMS, seasonal=False, max_p=2, max_q=2, stepwise=False)
+SMALL_SEASONAL_SEARCH = dict(ARIMA_PARAMS, m=4, D=None, max_p=1, max_q=1, max_P=1, max_Q=1, stepwise=False)
+
+
+@pytest.fixture
+def series():
+    return 50 + np.cumsum(np.random.default_rng(4).normal(size=120))
+
+
+def test_parallel_search_selects_the_sequential_order(monkeypatch, streamlit_main, series):
+    monkeypatch.setattr(order_search, 'worker_count', lambda requested=None: requested)
+    sequential = order_search.search(series, SMALL_SEARCH, workers=1, time_budget=0)
+    parallel = order_search.search(series, SMALL_SEARCH, workers=2, time_budget=0)
+    assert sequential.evaluated == parallel.evaluated == sequential.candidates == 9
+    assert (parallel.order, parallel.seasonal_order) == (sequential.order, sequential.seasonal_order)
+    assert parallel.aic == pytest.approx(sequential.aic)
+
+
+def test_single_cpu_searches_in_process(monkeypatch, series):
+    monkeypatch.setattr(worker_pool, 'available_cpus', lambda: 1)
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("a process pool was started on a single CPU")
+    monkeypatch.setattr(order_search, 'SpawnPool', no_pool)
+    result = order_search.search(series, SMALL_SEARCH, workers=8, time_budget=0)
+    assert result.evaluated == result.candidates
+
+
+@pytest.mark.parametrize('params', [SMALL_SEARCH, SMALL_SEASONAL_SEARCH], ids=['non-seasonal', 'seasonal'])
+def test_search_selects_auto_arimas_exhaustive_choice(params):
+    rng = np.random.default_rng(1)
+    values = 10 * np.sin(np.arange(160) * np.pi / 2) + 50 + np.cumsum(rng.normal(size=160))
+    expected = pmdarima.auto_arima(values, **params)
+    result = order_search.search(values, params, workers=1, time_budget=0)
+    assert (result.order, result.seasonal_order) == (expected.order, expected.seasonal_order)
+    assert result.aic == pytest.approx(expected.aic())
+
+
+def test_search_mode_picks_the_engine_and_the_model_key(monkeypatch, series):
+    calls = []
+    monkeypatch.setattr(order_search, 'search', lambda values, params: calls.append(params) or
+                        order_search.SearchResult('grid model', *[None] * 7))
+    assert fit_autoarima(series, SMALL_SEARCH) == 'grid model'
+    assert fit_autoarima(series, dict(SMALL_SEARCH, stepwise=True)).order is not None
+    assert calls == [SMALL_SEARCH]
+    assert model_key('TEST', 'abc', SMALL_SEARCH) != model_key('TEST', 'abc', dict(SMALL_SEARCH, stepwise=True))
@@ -0,0 +1,171 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from price_store import (COLUMNS, MemoryProvider, PriceStore, day_bounds, day_number, days_index, find_gaps,
+                         find_revisions, load_history, refresh, to_days)
+
+
+def make_history(n=120, start='2022-01-03'):
+    index = pd.bdate_range(start, periods=n, name='Date')
+    close = 100 + np.cumsum(np.random.default_rng(3).normal(size=n))
+    return pd.DataFrame({'Open': close - 0.5, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Adj Close': close * 0.98, 'Volume': np.arange(n) * 1000 + 5000}, index=index)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceStore(str(tmp_path / 'prices'))
+
+
+def stored_with(store, history, rows):
+    provider = MemoryProvider({'TEST': history.iloc[:rows]})
+    assert refresh('TEST', store=store, provider=provider).mode == 'full'
+    return provider
+
+
+def test_first_refresh_writes_full_history(store):
+    history = make_history()
+    result = refresh('TEST', store=store, provider=MemoryProvider({'TEST': history}))
+    assert (result.mode, result.reason, result.rows_added) == ('full', 'not stored', len(history))
+    pd.testing.assert_frame_equal(store.read('TEST'), history[COLUMNS], check_freq=False)
+
+
+def test_new_bars_are_appended_from_the_overlap_window(store):
+    history = make_history()
+    provider = stored_with(store, history, 100)
+    provider.frames['TEST'] = history
+    provider.calls.clear()
+
+    result = refresh('TEST', store=store, provider=provider)
+    assert (result.mode, result.rows_added) == ('append', 20)
+    assert provider.calls == [('TEST', history.index[95])]
+    assert result.rows_fetched == 25
+    pd.testing.assert_frame_equal(store.read('TEST'), history[COLUMNS], check_freq=False)
+
+
+def test_up_to_date_symbol_is_a_noop(store):
+    history = make_history()
+    provider = stored_with(store, history, len(history))
+    result = refresh('TEST', store=store, provider=provider)
+    assert (result.mode, result.reason, result.rows_added) == ('noop', 'up to date', 0)
+
+
+def test_revised_overlap_triggers_full_rewrite(store):
+    history = make_history()
+    provider = stored_with(store, history, 100)
+    revised = history.copy()
+    revised[['Close', 'Adj Close']] = revised[['Close', 'Adj Close']] / 2  # 2:1 split adjusts every bar
+    provider.frames['TEST'] = revised
+    provider.calls.clear()
+
+    result = refresh('TEST', store=store, provider=provider)
+    assert result.mode == 'full' and result.reason.startswith('5 revised bars')
+    assert provider.calls[-1] == ('TEST', None)
+    np.testing.assert_allclose(store.read('TEST')['Close'], revised['Close'])
+
+
+def test_missing_trading_days_trigger_full_rewrite(store):
+    history = make_history()
+    provider = stored_with(store, history, 100)
+    provider.frames['TEST'] = history.drop(history.index[100:110])
+
+    result = refresh('TEST', store=store, provider=provider)
+    assert result.mode == 'full' and result.reason.startswith('gap between')
+    assert len(store.read('TEST')) == len(history) - 10
+
+
+def test_find_gaps_tolerates_holidays():
+    index = pd.bdate_range('2022-01-03', periods=30)
+    assert find_gaps(index.delete([5, 6, 7])) == []
+    assert find_gaps(index.delete([5, 6, 7, 8])) == [(index[4], index[9])]
+
+
+def test_find_revisions_reports_changed_closes_only():
+    history = make_history(10)
+    fetched = history.copy()
+    fetched.loc[fetched.index[2], 'Adj Close'] += 1
+    fetched.loc[fetched.index[4], 'Volume'] += 1
+    assert list(find_revisions(history, fetched)) == [history.index[2]]
+
+
+def test_load_history_reads_the_store_without_fetching(store):
+    history = make_history()
+    provider = stored_with(store, history, len(history))
+    provider.calls.clear()
+    loaded = load_history('TEST', store=store, provider=provider, refresh_stale=False)
+    assert provider.calls == []
+    assert len(loaded) == len(history)
+
+
+def test_day_numbers_round_trip_and_bound_date_ranges():
+    index = make_history(10).index
+    days = to_days(index)
+    pd.testing.assert_index_equal(days_index(days), index, check_exact=True)
+    assert day_number(index[3]) == days[3]
+    assert day_bounds(days) == (0, 10)
+    assert day_bounds(days, index[2], index[5]) == (2, 6)
+    assert day_bounds(days, '2022-01-08', '2022-01-09') == (5, 5)  # a weekend holds no bars
+    assert day_bounds(days, index[5], index[2]) == (5, 5)
+
+
+def test_rewrite_publishes_one_version_and_removes_the_old_one(store):
+    history = make_history()
+    first = store.write('TEST', history.iloc[:60])
+    second = store.write('TEST', history)
+    assert first['version'] != second['version']
+    folder = store.path('TEST')
+    arrays = sorted(name for name in os.listdir(folder) if name.endswith('.npy'))
+    assert arrays == [f"index.{second['version']}.npy", f"values.{second['version']}.npy"]
+    assert not [name for name in os.listdir(folder) if name.endswith('.tmp')]
+    assert len(store.read('TEST')) == len(history)
+
+
+def test_unversioned_store_still_reads(store):
+    history = make_history(30)
+    meta = store.write('TEST', history)
+    index_path, values_path = store.array_paths('TEST', meta)
+    folder = store.path('TEST')
+    os.rename(index_path, os.path.join(folder, 'index.npy'))
+    os.rename(values_path, os.path.join(folder, 'values.npy'))
+    del meta['version']
+    with open(os.path.join(folder, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    pd.testing.assert_frame_equal(store.read('TEST'), store.read('TEST', mmap=False))
+    assert len(store.read('TEST')) == 30
+
+
+def test_readers_never_see_arrays_of_different_writes(store):
+    history = make_history(200)
+    store.write('TEST', history.iloc[:100])
+    done = threading.Event()
+    errors = []
+
+    def writer():
+        try:
+            for rows in range(101, 161):
+                store.write('TEST', history.iloc[:rows])
+        except Exception as error:
+            errors.append(error)
+        finally:
+            done.set()
+
+    def reader():
+        try:
+            while not done.is_set():
+                days, values = store.read_arrays('TEST')
+                assert values.shape == (len(COLUMNS), len(days))
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert store.meta('TEST')['rows'] == 160
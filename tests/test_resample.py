@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from resample import choose_granularity, resample_ohlcv
+
+
+def daily_history():
+    # Wed 2024-01-03 .. Fri 2024-01-19, without Mon 2024-01-15 (a holiday)
+    index = pd.bdate_range('2024-01-03', '2024-01-19', name='Date').drop(pd.Timestamp('2024-01-15'))
+    n = len(index)
+    rng = np.random.default_rng(5)
+    close = 100 + np.cumsum(rng.normal(size=n))
+    return pd.DataFrame({'Open': close + rng.normal(size=n), 'High': close + 2 + rng.random(n),
+                         'Low': close - 2 - rng.random(n), 'Close': close, 'Adj Close': close * 0.99,
+                         'Volume': rng.integers(1_000, 5_000, n)}, index=index)
+
+
+def test_weekly_bars_take_first_max_min_last_and_sum():
+    daily = daily_history()
+    bars = resample_ohlcv(daily, 'W-FRI')
+    weeks = [daily.loc['2024-01-03':'2024-01-05'], daily.loc['2024-01-08':'2024-01-12'],
+             daily.loc['2024-01-16':'2024-01-19']]
+    assert list(bars.index) == [week.index[0] for week in weeks]
+    for (_, bar), week in zip(bars.iterrows(), weeks):
+        assert bar['Open'] == week['Open'].iloc[0]
+        assert bar['High'] == week['High'].max()
+        assert bar['Low'] == week['Low'].min()
+        assert bar['Close'] == week['Close'].iloc[-1]
+        assert bar['Adj Close'] == week['Adj Close'].iloc[-1]
+        assert bar['Volume'] == week['Volume'].sum()
+
+
+def test_bars_cover_every_day_once():
+    daily = daily_history()
+    bars = resample_ohlcv(daily, 'M')
+    assert len(bars) == 1
+    assert bars['Volume'].sum() == daily['Volume'].sum()
+
+
+@pytest.mark.parametrize('n_days, expected', [(250, None), (251, ('W-FRI', 'Weekly')),
+                                              (2_000, ('M', 'Monthly')), (50_000, ('Q', 'Quarterly'))])
+def test_choose_granularity_picks_the_finest_that_fits(n_days, expected):
+    assert choose_granularity(n_days) == expected
@@ -0,0 +1,44 @@
+import mongomock
+import pytest
+
+from ticker_meta import MongoTickerMeta, TickerMetaStore, open_meta_store, read_dump
+
+
+@pytest.fixture(scope='module')
+def sqlite_store(tmp_path_factory):
+    return TickerMetaStore(db_path=str(tmp_path_factory.mktemp('meta') / 'tickers_meta.sqlite'))
+
+
+@pytest.fixture
+def mongo_store():
+    store = MongoTickerMeta(mongomock.MongoClient())
+    store.load_dump()
+    return store
+
+
+def test_backends_list_the_same_names_in_dump_order(sqlite_store, mongo_store):
+    dump = read_dump()
+    assert mongo_store.names() == sqlite_store.names()
+    assert mongo_store.names()[0] == [doc['Name'] for doc in dump]
+    assert len(mongo_store) == len(sqlite_store) == len(dump)
+
+
+def test_backends_agree_on_symbols_and_documents(sqlite_store, mongo_store):
+    names, symbols = sqlite_store.names()
+    for name, symbol in list(zip(names, symbols))[::97]:
+        assert mongo_store.symbol_for_name(name) == sqlite_store.symbol_for_name(name) == symbol
+        assert mongo_store.document(symbol) == sqlite_store.document(symbol)
+    assert mongo_store.symbol_for_name('No Such Company') is None
+
+
+def test_names_keep_insertion_order_without_positions():
+    client = mongomock.MongoClient()
+    store = MongoTickerMeta(client)
+    store.collection.insert_many([{'Symbol': symbol, 'Name': f'{symbol} Inc'} for symbol in ['ZZZ', 'AAA', 'MMM']])
+    assert store.names() == (['ZZZ Inc', 'AAA Inc', 'MMM Inc'], ['ZZZ', 'AAA', 'MMM'])
+
+
+def test_open_meta_store_uses_a_given_client():
+    client = mongomock.MongoClient()
+    MongoTickerMeta(client).load_dump()
+    assert isinstance(open_meta_store(client=client), MongoTickerMeta)
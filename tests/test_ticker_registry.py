@@ -0,0 +1,32 @@
+import pytest
+
+import ticker_registry
+from ticker_meta import TickerMetaStore
+from ticker_registry import FUZZY_PREFIX_LENGTH, TickerRegistry
+
+
+@pytest.fixture(scope='module')
+def registry(tmp_path_factory):
+    return TickerRegistry(TickerMetaStore(db_path=str(tmp_path_factory.mktemp('meta') / 'tickers_meta.sqlite')))
+
+
+def test_prefix_search_matches_names_and_symbols(registry):
+    assert 'Microsoft Corporation Common Stock' in registry.search('micro')
+    assert registry.search('msft')[0] == 'Microsoft Corporation Common Stock'
+    assert registry.search('') == tuple(registry.names[:50])
+
+
+def test_fuzzy_search_uses_the_heads_built_at_start_up(registry, monkeypatch):
+    # a query no prefix matches must not rebuild anything from the name list
+    monkeypatch.setattr(registry, 'names', None)
+    monkeypatch.setattr(ticker_registry.difflib, 'get_close_matches',
+                        lambda query, heads, **kwargs: [head for head in heads if head == 'microsoft'[:len(query)]])
+    assert registry._search('mircosoft') == ('Microsoft Corporation Common Stock',)
+
+
+def test_fuzzy_search_tolerates_typos_and_long_queries(registry):
+    assert registry.search('mircosoft') == ('Microsoft Corporation Common Stock',)
+    assert registry.search('nvida') == ('NVIDIA Corporation Common Stock',)
+    assert registry.search('tesal')[0] == 'Tesla Inc. Common Stock'
+    long_query = 'microsfot corporation common stock' + ' x' * FUZZY_PREFIX_LENGTH
+    assert 'Microsoft Corporation Common Stock' in registry.search(long_query)
@@ -0,0 +1,183 @@
+import json
+import os
+import sqlite3
+import threading
+import zipfile
+
+import streamlit as st
+from pymongo import ASCENDING, MongoClient
+from pymongo.errors import PyMongoError
+
+# Mongo export of the tickers_meta_ref collection (also shipped zipped as <file>.zip)
+META_JSON = "Raw (Extra)/finance.tickers_meta_ref.json"
+
+# Indexed copy of the dump, rebuilt whenever the dump changes
+META_DB = os.environ.get("STONKS_META_DB", "data/tickers_meta.sqlite")
+
+# MongoDB backend, used when a URI is configured (the JSON dump stays the fallback)
+MONGO_URI = os.environ.get("STONKS_MONGO_URI")
+MONGO_DB = os.environ.get("STONKS_MONGO_DB", "finance")
+MONGO_COLLECTION = os.environ.get("STONKS_MONGO_COLLECTION", "tickers_meta_ref")
+MONGO_POOL_SIZE = int(os.environ.get("STONKS_MONGO_POOL_SIZE", "20"))
+
+
+# Reading the raw dump from the .json file or, when only the archive is present, from the .json.zip
+def read_dump(source=META_JSON):
+    if os.path.exists(source):
+        with open(source) as f:
+            return json.load(f)
+    with zipfile.ZipFile(source + '.zip') as archive:
+        member = next(name for name in archive.namelist()
+                      if name.endswith(os.path.basename(source)) and not name.startswith('__MACOSX'))
+        return json.loads(archive.read(member))
+
+
+def _source_path(source):
+    return source if os.path.exists(source) else source + '.zip'
+
+
+def _source_stamp(source):
+    stat = os.stat(_source_path(source))
+    return f"{stat.st_size}:{int(stat.st_mtime)}"
+
+
+# Converting the dump once into SQLite: one row per symbol with the name (indexed) and the
+# full document stored as compact JSON, so the app never parses the whole dump again
+def build_index(source=META_JSON, db_path=META_DB):
+    docs = read_dump(source)
+    folder = os.path.dirname(db_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+    tmp_path = db_path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    connection = sqlite3.connect(tmp_path)
+    with connection:
+        connection.execute("CREATE TABLE tickers (symbol TEXT PRIMARY KEY, name TEXT NOT NULL, "
+                           "position INTEGER NOT NULL, doc TEXT NOT NULL)")
+        connection.execute("CREATE INDEX tickers_name ON tickers (name)")
+        connection.execute("CREATE TABLE info (key TEXT PRIMARY KEY, value TEXT)")
+        connection.executemany(
+            "INSERT OR REPLACE INTO tickers VALUES (?, ?, ?, ?)",
+            ((doc['Symbol'], doc['Name'], position,
+              json.dumps({key: value for key, value in doc.items() if key != '_id'}, separators=(',', ':')))
+             for position, doc in enumerate(docs)))
+        connection.execute("INSERT INTO info VALUES ('source_stamp', ?)", (_source_stamp(source),))
+    connection.close()
+    os.replace(tmp_path, db_path)
+    return len(docs)
+
+
+def _index_is_current(source, db_path):
+    if not os.path.exists(db_path):
+        return False
+    connection = sqlite3.connect(db_path)
+    try:
+        row = connection.execute("SELECT value FROM info WHERE key = 'source_stamp'").fetchone()
+    except sqlite3.DatabaseError:
+        return False
+    finally:
+        connection.close()
+    return row is not None and row[0] == _source_stamp(source)
+
+
+# Read side of the metadata: Name/Symbol columns for the dropdown, one full document on demand
+class TickerMetaStore:
+
+    def __init__(self, db_path=META_DB, source=META_JSON):
+        if not _index_is_current(source, db_path):
+            build_index(source, db_path)
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+
+    def _query(self, sql, params=()):
+        with self.lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    # Names and symbols in dump order (the order the dropdown always used)
+    def names(self):
+        rows = self._query("SELECT name, symbol FROM tickers ORDER BY position")
+        return [row[0] for row in rows], [row[1] for row in rows]
+
+    def symbol_for_name(self, name):
+        rows = self._query("SELECT symbol FROM tickers WHERE name = ? ORDER BY position LIMIT 1", (name,))
+        return rows[0][0] if rows else None
+
+    def document(self, symbol):
+        rows = self._query("SELECT doc FROM tickers WHERE symbol = ?", (symbol,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def __len__(self):
+        return self._query("SELECT COUNT(*) FROM tickers")[0][0]
+
+
+# Dump order, the order both backends list names in: the position field written by load_dump,
+# then insertion order (_id) for documents loaded some other way
+DUMP_ORDER = [('position', ASCENDING), ('_id', ASCENDING)]
+
+
+# Same interface as TickerMetaStore over the tickers_meta_ref collection. Every query is a
+# projection on an indexed field, so no session ever holds more than the rows it displays.
+class MongoTickerMeta:
+
+    def __init__(self, client, db=MONGO_DB, collection=MONGO_COLLECTION):
+        self.collection = client[db][collection]
+        self.collection.create_index([('Symbol', ASCENDING)])
+        self.collection.create_index([('Name', ASCENDING)])
+        self.collection.create_index(DUMP_ORDER)
+
+    # Copying the JSON dump into the collection (first-time setup, or seeding a mongomock client)
+    def load_dump(self, source=META_JSON):
+        docs = [dict({key: value for key, value in doc.items() if key != '_id'}, position=position)
+                for position, doc in enumerate(read_dump(source))]
+        self.collection.delete_many({})
+        self.collection.insert_many(docs)
+        return len(docs)
+
+    def names(self):
+        cursor = self.collection.find({}, {'_id': 0, 'Name': 1, 'Symbol': 1}).sort(DUMP_ORDER)
+        names, symbols = [], []
+        for doc in cursor:
+            names.append(doc['Name'])
+            symbols.append(doc['Symbol'])
+        return names, symbols
+
+    def symbol_for_name(self, name):
+        doc = self.collection.find_one({'Name': name}, {'_id': 0, 'Symbol': 1}, sort=DUMP_ORDER)
+        return doc['Symbol'] if doc else None
+
+    def document(self, symbol):
+        return self.collection.find_one({'Symbol': symbol}, {'_id': 0, 'position': 0})
+
+    def __len__(self):
+        return self.collection.estimated_document_count()
+
+
+# Pooled client shared by the whole process (MongoClient is thread-safe)
+@st.cache_resource
+def get_mongo_client(uri=MONGO_URI):
+    return MongoClient(uri, maxPoolSize=MONGO_POOL_SIZE, serverSelectionTimeoutMS=3000)
+
+
+# Backend picked through STONKS_META_BACKEND ('mongo' or 'file'); defaults to Mongo when
+# STONKS_MONGO_URI is set and falls back to the JSON dump when the server cannot be reached
+def open_meta_store(backend=None, client=None):
+    backend = backend or os.environ.get("STONKS_META_BACKEND", "mongo" if MONGO_URI or client else "file")
+    if backend == "mongo":
+        try:
+            client = client or get_mongo_client()
+            client.admin.command('ping')
+            return MongoTickerMeta(client)
+        except PyMongoError as error:
+            st.warning(f"MongoDB unavailable ({error.__class__.__name__}), using the bundled JSON metadata.")
+    elif backend != "file":
+        raise ValueError(f"Unknown metadata backend '{backend}', expected 'mongo' or 'file'")
+    return TickerMetaStore()
+
+
+# One metadata store per process, shared by every session and page
+@st.cache_resource
+def get_meta_store():
+    return open_meta_store()
@@ -0,0 +1,104 @@
+import difflib
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import lru_cache
+
+import streamlit as st
+
+from ticker_meta import get_meta_store
+
+# Parsed documents kept in memory after their first lookup
+DOCUMENT_CACHE_SIZE = 256
+
+# Longest name prefix the fuzzy search compares; longer queries are compared on this many characters
+FUZZY_PREFIX_LENGTH = 32
+
+
+# In-memory lookup tables over the metadata store: dict lookups for name -> symbol and
+# symbol -> document, and a sorted key list for prefix search from the Home page search box
+class TickerRegistry:
+
+    def __init__(self, meta_store, document_cache_size=DOCUMENT_CACHE_SIZE):
+        self.meta_store = meta_store
+        self.names, self.symbols = meta_store.names()
+
+        # First listing wins on duplicate names, the same row the old boolean mask picked
+        self.name_to_symbol = {}
+        for name, symbol in zip(self.names, self.symbols):
+            self.name_to_symbol.setdefault(name, symbol)
+        self.symbol_to_name = dict(zip(self.symbols, self.names))
+
+        # (lowercase key, position in dump) sorted by key, over both names and symbols
+        keys = [(name.lower(), position) for position, name in enumerate(self.names)]
+        keys += [(symbol.lower(), position) for position, symbol in enumerate(self.symbols)]
+        keys.sort()
+        self._keys = [key for key, _ in keys]
+        self._positions = [position for _, position in keys]
+
+        # Fuzzy-search candidates: for every prefix length, lowercase name prefix -> names sharing it
+        self._heads = [{} for _ in range(FUZZY_PREFIX_LENGTH)]
+        for name in self.names:
+            lower_name = name.lower()
+            for length, heads in enumerate(self._heads, 1):
+                heads.setdefault(lower_name[:length], []).append(name)
+
+        self._documents = OrderedDict()
+        self._document_cache_size = document_cache_size
+        self._lock = threading.Lock()
+
+        # Every rerun repeats the last query, so keep recent answers around
+        self.search = lru_cache(maxsize=1024)(self._search)
+
+    def __len__(self):
+        return len(self.names)
+
+    def symbol_for_name(self, name):
+        return self.name_to_symbol.get(name)
+
+    def name_for_symbol(self, symbol):
+        return self.symbol_to_name.get(symbol)
+
+    def document(self, symbol):
+        with self._lock:
+            if symbol in self._documents:
+                self._documents.move_to_end(symbol)
+                return self._documents[symbol]
+        doc = self.meta_store.document(symbol)
+        if doc is not None:
+            with self._lock:
+                self._documents[symbol] = doc
+                if len(self._documents) > self._document_cache_size:
+                    self._documents.popitem(last=False)
+        return doc
+
+    # Company names whose name or symbol starts with query (case-insensitive), topped up with
+    # close fuzzy matches when the prefix alone finds fewer than limit names
+    def _search(self, query, limit=50):
+        query = query.strip().lower()
+        if not query:
+            return tuple(self.names[:limit])
+
+        matches = {}
+        start = bisect_left(self._keys, query)
+        for position in range(start, len(self._keys)):
+            if len(matches) >= limit or not self._keys[position].startswith(query):
+                break
+            matches.setdefault(self.names[self._positions[position]])
+
+        if len(matches) < limit:
+            # Fuzzy-compare against name prefixes of the query's length, so typos in the first word still match
+            query = query[:FUZZY_PREFIX_LENGTH]
+            heads = self._heads[len(query) - 1]
+            for head in difflib.get_close_matches(query, heads, n=limit, cutoff=0.75):
+                for name in heads[head]:
+                    if len(matches) >= limit:
+                        break
+                    matches.setdefault(name)
+        return tuple(matches)
+
+
+# Built once per process and shared by every session
+@st.cache_resource
+def get_ticker_registry():
+    return TickerRegistry(get_meta_store())
@@ -0,0 +1,47 @@
+import multiprocessing
+import os
+import sys
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor
+
+# Stand-in __main__ while workers start: no __spec__ and no __file__, so a spawned worker has
+# nothing to re-import
+_WORKER_MAIN = types.ModuleType('__main__')
+
+_main_lock = threading.Lock()
+
+
+# Process pool for code running inside Streamlit. A spawned worker re-imports the parent's
+# __main__ before unpickling its task, and Streamlit runs every page as __main__ with __file__
+# set to the page, so a worker would re-run the page (and die on its session state). Workers
+# are only started from submit(), which swaps in a bare __main__ for the duration. spawn rather
+# than fork: the Streamlit server process is multi-threaded.
+class SpawnPool(ProcessPoolExecutor):
+
+    def __init__(self, max_workers=None):
+        super().__init__(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def submit(self, fn, /, *args, **kwargs):
+        with _main_lock:
+            main = sys.modules.get('__main__')
+            sys.modules['__main__'] = _WORKER_MAIN
+            try:
+                return super().submit(fn, *args, **kwargs)
+            finally:
+                # a page run that started meanwhile installed its own __main__, leave that one
+                if sys.modules.get('__main__') is _WORKER_MAIN:
+                    sys.modules['__main__'] = main
+
+
+# CPUs this process may run on (the affinity mask where the platform has one)
+def available_cpus():
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+# Worker processes worth starting for `requested` (None = one per CPU): more processes than CPUs
+# only add start-up and scheduling cost
+def worker_count(requested=None):
+    return max(1, min(requested or available_cpus(), available_cpus()))